@@ -0,0 +1,200 @@
+import asyncio
+import hashlib
+import heapq
+import logging
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+
+from analyzer.ai_analyzer import Opportunity
+from core import metrics
+from config import DEDUP_DB_PATH, DEDUP_TTL, DEDUP_POLICY, DEDUP_MIN_EDGE_GROWTH
+
+logger = logging.getLogger(__name__)
+
+_CHECKS = metrics.counter("alerts_dedup_total", "Decisões do dedup de alertas (sent, duplicate)", ("result",))
+_SENT, _DUPLICATE = _CHECKS.labels(result="sent"), _CHECKS.labels(result="duplicate")
+
+
+@dataclass
+class SentRecord:
+    sent_at: float
+    expires_at: float
+    edge: float
+
+
+# ── Políticas ──────────────────────────────────────────────────────────────────
+class MarketDirectionPolicy:
+    """Mesmo mercado + mesma direção não é reenviado dentro do TTL."""
+
+    name = "market_direction"
+
+    def key(self, opp: Opportunity) -> str:
+        raw = f"{opp.market.condition_id}:{opp.direction}"
+        return hashlib.md5(raw.encode()).hexdigest()
+
+    def allows(self, opp: Opportunity, previous: SentRecord | None) -> bool:
+        return previous is None
+
+
+class EdgeGrowthPolicy(MarketDirectionPolicy):
+    """
+    Como MarketDirectionPolicy, mas realerta dentro do TTL se o edge
+    cresceu mais que `min_growth` em relação ao último alerta enviado.
+    """
+
+    name = "edge_growth"
+
+    def __init__(self, min_growth: float = DEDUP_MIN_EDGE_GROWTH):
+        self.min_growth = min_growth
+
+    def allows(self, opp: Opportunity, previous: SentRecord | None) -> bool:
+        return previous is None or abs(opp.edge) - abs(previous.edge) > self.min_growth
+
+
+POLICIES = {
+    MarketDirectionPolicy.name: MarketDirectionPolicy,
+    EdgeGrowthPolicy.name: EdgeGrowthPolicy,
+}
+
+
+# ── Store ──────────────────────────────────────────────────────────────────────
+class DedupStore:
+    """
+    Registro de alertas enviados, persistido em SQLite (modo WAL).
+
+    Sobrevive a restarts e pode ser compartilhado por vários processos do
+    bot na mesma máquina: a decisão de enviar é tomada dentro de uma
+    transação BEGIN IMMEDIATE, então dois processos nunca enviam o mesmo
+    alerta. Em memória ficam um dict (lookup O(1)) e um heap de expiração
+    (limpeza O(log n) por entrada expirada), em vez de varrer tudo a cada
+    verificação.
+
+    No event loop use check_and_mark_async: a transação pode esperar até
+    `timeout` pelo lock de outro processo e roda numa thread.
+    """
+
+    _PURGE_INTERVAL = 60  # segundos entre limpezas das linhas expiradas no SQLite
+
+    def __init__(self, path: str = DEDUP_DB_PATH, ttl: float = DEDUP_TTL, policy=None,
+                 clock=time.time):
+        self.ttl = ttl
+        self.clock = clock  # injetável: o replay usa o horário gravado das notícias
+        self.policy = policy or POLICIES.get(DEDUP_POLICY, MarketDirectionPolicy)()
+        self._records: dict[str, SentRecord] = {}
+        self._expiry: list[tuple[float, str]] = []   # heap (expires_at, key)
+        self._last_purge = 0.0
+        self._lock = threading.Lock()   # conexão e registros usados pela thread do check_and_mark_async
+
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._db = sqlite3.connect(path, timeout=5, isolation_level=None, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS sent ("
+            " key TEXT PRIMARY KEY, sent_at REAL NOT NULL,"
+            " expires_at REAL NOT NULL, edge REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS sent_expires ON sent (expires_at)")
+        self._load()
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    async def check_and_mark_async(self, opp: Opportunity, now: float | None = None) -> bool:
+        """
+        check_and_mark sem bloquear o event loop: duplicadas já conhecidas em
+        memória saem direto; a transação (que com vários workers disputa o
+        lock do SQLite) roda numa thread.
+        """
+        now = now or self.clock()
+        if self._known_duplicate(opp, now):
+            _DUPLICATE.inc()
+            return False
+        return await asyncio.to_thread(self.check_and_mark, opp, now)
+
+    def check_and_mark(self, opp: Opportunity, now: float | None = None) -> bool:
+        """
+        Decide se a oportunidade deve ser enviada e, se sim, já a registra.
+        Retorna False para duplicadas.
+        """
+        now = now or self.clock()
+        with self._lock:
+            return self._check_and_mark(opp, now)
+
+    def _known_duplicate(self, opp: Opportunity, now: float) -> bool:
+        # Caminho rápido: um registro válido em memória que a política recusa
+        # continua recusando — outros processos só acrescentam registros.
+        cached = self._records.get(self.policy.key(opp))
+        return cached is not None and cached.expires_at > now and not self.policy.allows(opp, cached)
+
+    def _check_and_mark(self, opp: Opportunity, now: float) -> bool:
+        self._purge(now)
+        key = self.policy.key(opp)
+        if self._known_duplicate(opp, now):
+            _DUPLICATE.inc()
+            return False
+
+        self._db.execute("BEGIN IMMEDIATE")
+        try:
+            row = self._db.execute(
+                "SELECT sent_at, expires_at, edge FROM sent WHERE key = ? AND expires_at > ?",
+                (key, now),
+            ).fetchone()
+            previous = SentRecord(*row) if row else None
+            if previous is not None and self._records.get(key) != previous:
+                self._remember(key, previous)  # registrado por outro processo
+
+            if not self.policy.allows(opp, previous):
+                self._db.execute("COMMIT")
+                _DUPLICATE.inc()
+                return False
+
+            record = SentRecord(sent_at=now, expires_at=now + self.ttl, edge=opp.edge)
+            self._db.execute(
+                "INSERT INTO sent (key, sent_at, expires_at, edge) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET sent_at = excluded.sent_at, "
+                "expires_at = excluded.expires_at, edge = excluded.edge",
+                (key, record.sent_at, record.expires_at, record.edge),
+            )
+            self._db.execute("COMMIT")
+        except BaseException:
+            self._db.execute("ROLLBACK")
+            raise
+
+        self._remember(key, record)
+        _SENT.inc()
+        return True
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+    def _load(self):
+        now = self.clock()
+        rows = self._db.execute(
+            "SELECT key, sent_at, expires_at, edge FROM sent WHERE expires_at > ?", (now,)
+        ).fetchall()
+        for key, sent_at, expires_at, edge in rows:
+            self._remember(key, SentRecord(sent_at, expires_at, edge))
+        if rows:
+            logger.info(f"🗂️  {len(rows)} alertas recentes carregados do histórico de deduplicação")
+
+    def _remember(self, key: str, record: SentRecord):
+        self._records[key] = record
+        heapq.heappush(self._expiry, (record.expires_at, key))
+
+    def _purge(self, now: float):
+        while self._expiry and self._expiry[0][0] <= now:
+            expires_at, key = heapq.heappop(self._expiry)
+            record = self._records.get(key)
+            # entradas antigas do heap (registro renovado depois) são só descartadas
+            if record is not None and record.expires_at == expires_at:
+                del self._records[key]
+
+        if now - self._last_purge > self._PURGE_INTERVAL:
+            self._last_purge = now
+            self._db.execute("DELETE FROM sent WHERE expires_at <= ?", (now,))
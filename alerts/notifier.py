@@ -1,11 +1,20 @@
+import asyncio
 import logging
-import requests
+
+import aiohttp
+
 from analyzer.ai_analyzer import Opportunity
+from alerts.scheduler import RetryAfter, SendScheduler
+from core import metrics
+from core.http import AsyncHTTPPool
 from polymarket.client import PolymarketClient
 from config import TELEGRAM_BOT_TOKEN, TELEGRAM_ALERT_CHAT_ID
 
 logger = logging.getLogger(__name__)
-poly_client = PolymarketClient()
+
+_SEND = metrics.histogram("telegram_send_seconds", "Duração do envio de mensagens na Bot API")
+_SENT = metrics.counter("telegram_send_total", "Mensagens enviadas à Bot API (ok, error)", ("result",))
+_SENT_OK, _SENT_ERROR = _SENT.labels(result="ok"), _SENT.labels(result="error")
 
 # Caracteres especiais do MarkdownV2 do Telegram que precisam ser escapados
 _MD_SPECIAL = r"\_*[]()~`>#+-=|{}.!"
@@ -26,12 +35,55 @@ def _esc(text: str) -> str:
 
 
 class TelegramNotifier:
-    """Envia alertas formatados para o seu Telegram pessoal."""
+    """
+    Envia alertas formatados para o seu Telegram pessoal.
+
+    Cada send_* tem uma versão *_async que usa o pool HTTP compartilhado;
+    o pipeline live usa só as assíncronas para não travar o event loop.
+
+    Com scheduled=True os alertas passam pelo SendScheduler (limites da
+    Bot API, 429 e batching por chat) em vez de um POST direto; é o modo
+    do bot live, que pode mandar a mesma oportunidade para muitos chats.
+    """
 
     BASE_URL = f"https://api.telegram.org/bot{TELEGRAM_BOT_TOKEN}"
 
+    def __init__(self, http: AsyncHTTPPool | None = None, base_url: str = BASE_URL,
+                 chat_id: str = TELEGRAM_ALERT_CHAT_ID, scheduled: bool = False):
+        self.http = http or AsyncHTTPPool()
+        self.base_url = base_url  # injetável: benchmarks apontam para um Bot API local
+        self.chat_id = chat_id
+        self.scheduler = SendScheduler(self.deliver) if scheduled else None
+
     def send_opportunity(self, opp: Opportunity):
         """Formata e envia um alerta de oportunidade."""
+        self._send(self._format_opportunity(opp))
+
+    async def send_opportunity_async(self, opp: Opportunity, chat_ids: list[str] | None = None):
+        """Envia o alerta para `chat_ids` (padrão: TELEGRAM_ALERT_CHAT_ID); formata uma vez só."""
+        text = self._format_opportunity(opp)
+        chats = chat_ids if chat_ids is not None else [self.chat_id]
+        if self.scheduler is not None:
+            for chat_id in chats:
+                self.scheduler.submit(chat_id, text)
+            return
+        await asyncio.gather(*(self._send_async(text, chat_id) for chat_id in chats))
+
+    def send_startup(self, channels: list[str]):
+        """Avisa que o bot foi iniciado."""
+        self._send(self._format_startup(channels))
+
+    async def send_startup_async(self, channels: list[str]):
+        await self._send_async(self._format_startup(channels))
+
+    def send_error(self, error: str):
+        self._send(self._format_error(error))
+
+    async def send_error_async(self, error: str):
+        await self._send_async(self._format_error(error))
+
+    @staticmethod
+    def _format_opportunity(opp: Opportunity) -> str:
         direction_emoji = "🟢" if opp.direction == "YES" else "🔴"
 
         # Números formatados — serão escapados pelo _esc()
@@ -42,7 +94,7 @@ class TelegramNotifier:
         news_preview = opp.news_text[:200]
         ellipsis_md  = "\\.\\.\\." if len(opp.news_text) > 200 else ""
 
-        market_url = poly_client.get_market_url(opp.market)
+        market_url = PolymarketClient.get_market_url(opp.market)
 
         text = (
             f"🚨 *OPORTUNIDADE DETECTADA*\n\n"
@@ -58,11 +110,10 @@ class TelegramNotifier:
             f"💡 *Por quê:* {_esc(opp.reasoning)}\n\n"
             f"🔗 [Abrir na Polymarket]({market_url})"
         )
+        return text
 
-        self._send(text)
-
-    def send_startup(self, channels: list[str]):
-        """Avisa que o bot foi iniciado."""
+    @staticmethod
+    def _format_startup(channels: list[str]) -> str:
         channels_str = "\n".join(
             f"  • `{_esc(c)}`" for c in channels if c.strip()
         )
@@ -72,27 +123,72 @@ class TelegramNotifier:
             f"🎯 Edge mínimo configurado nos settings\n"
             f"⏳ Aguardando notícias\\.\\.\\."
         )
-        self._send(text)
+        return text
 
-    def send_error(self, error: str):
+    @staticmethod
+    def _format_error(error: str) -> str:
         # Dentro de blocos ```, apenas \ e ` precisam ser escapados
         safe = error[:500].replace("\\", "\\\\").replace("`", "\\`")
-        text = f"⚠️ *Erro no bot:*\n```\n{safe}\n```"
-        self._send(text)
+        return f"⚠️ *Erro no bot:*\n```\n{safe}\n```"
+
+    async def close(self):
+        """Esvazia a fila do scheduler (se houver) antes de encerrar."""
+        if self.scheduler is not None:
+            await self.scheduler.stop()
+
+    async def deliver(self, chat_id: str, text: str):
+        """
+        Um sendMessage, usado pelo SendScheduler: levanta RetryAfter no 429 e
+        aiohttp.ClientError nos demais erros, para o scheduler decidir o reenvio.
+        """
+        with _SEND.time():
+            status, data = await self.http.post_json_status(
+                f"{self.base_url}/sendMessage", self._payload(text, chat_id)
+            )
+        if status == 429:
+            _SENT_ERROR.inc()
+            params = data.get("parameters") or {} if isinstance(data, dict) else {}
+            raise RetryAfter(float(params.get("retry_after", 1)))
+        if status >= 400:
+            _SENT_ERROR.inc()
+            description = data.get("description", "") if isinstance(data, dict) else ""
+            raise aiohttp.ClientError(f"Bot API respondeu {status}: {description}")
+        _SENT_OK.inc()
+        logger.info(f"📤 Alerta enviado para {chat_id}")
+
+    @staticmethod
+    def _payload(text: str, chat_id: str = TELEGRAM_ALERT_CHAT_ID) -> dict:
+        return {
+            "chat_id": chat_id,
+            "text": text,
+            "parse_mode": "MarkdownV2",
+            "disable_web_page_preview": False,
+        }
 
     def _send(self, text: str):
+        import requests  # só o caminho síncrono usa; o live vai pelo pool aiohttp
         try:
-            resp = requests.post(
-                f"{self.BASE_URL}/sendMessage",
-                json={
-                    "chat_id": TELEGRAM_ALERT_CHAT_ID,
-                    "text": text,
-                    "parse_mode": "MarkdownV2",
-                    "disable_web_page_preview": False,
-                },
-                timeout=10,
-            )
-            resp.raise_for_status()
+            with _SEND.time():
+                resp = requests.post(
+                    f"{self.base_url}/sendMessage",
+                    json=self._payload(text, self.chat_id),
+                    timeout=10,
+                )
+                resp.raise_for_status()
+            _SENT_OK.inc()
+            logger.info("📤 Alerta enviado com sucesso")
+        except Exception as e:
+            _SENT_ERROR.inc()
+            logger.error(f"Erro ao enviar alerta: {e}")
+
+    async def _send_async(self, text: str, chat_id: str | None = None):
+        try:
+            with _SEND.time():
+                await self.http.post_json(
+                    f"{self.base_url}/sendMessage", self._payload(text, chat_id or self.chat_id)
+                )
+            _SENT_OK.inc()
             logger.info("📤 Alerta enviado com sucesso")
         except Exception as e:
+            _SENT_ERROR.inc()
             logger.error(f"Erro ao enviar alerta: {e}")
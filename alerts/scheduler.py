@@ -0,0 +1,206 @@
+import asyncio
+import heapq
+import logging
+import time
+from collections import deque
+from dataclasses import dataclass
+
+from core import metrics
+from config import TELEGRAM_GLOBAL_RATE, TELEGRAM_CHAT_RATE, TELEGRAM_GROUP_RATE
+
+logger = logging.getLogger(__name__)
+
+_QUEUE = metrics.gauge("telegram_queue_depth", "Mensagens aguardando envio na Bot API")
+_WAIT = metrics.histogram("telegram_queue_wait_seconds", "Tempo entre enfileirar a mensagem e a Bot API aceitar")
+_BATCH = metrics.histogram("telegram_batch_size", "Alertas agrupados por mensagem enviada",
+                           buckets=(1, 2, 3, 5, 10, 20))
+_RETRIES = metrics.counter("telegram_retries_total", "Reenvios na Bot API (rate_limited, error)", ("reason",))
+_RETRY_429, _RETRY_ERROR = _RETRIES.labels(reason="rate_limited"), _RETRIES.labels(reason="error")
+_DROPPED = metrics.counter("telegram_dropped_total", "Mensagens descartadas depois de esgotar os reenvios")
+
+MAX_MESSAGE_CHARS = 4096        # limite de texto do sendMessage
+_SEPARATOR = "\n\n━━━━━━━━━━━━━━━━\n\n"
+
+
+class RetryAfter(Exception):
+    """A Bot API respondeu 429; `retry_after` é a espera pedida (parameters.retry_after)."""
+
+    def __init__(self, retry_after: float):
+        super().__init__(f"429 Too Many Requests (retry_after={retry_after}s)")
+        self.retry_after = retry_after
+
+
+@dataclass
+class _Outbound:
+    text: str
+    enqueued_at: float
+    attempts: int = 0
+
+
+class SendScheduler:
+    """
+    Fila de saída para a Bot API respeitando os limites do Telegram.
+
+    - global: até `global_rate` mensagens/s do bot inteiro, espaçadas em
+      vez de em rajada (a janela do Telegram é deslizante)
+    - por chat: `chat_rate` mensagens/s em chats privados e `group_rate`
+      em grupos/canais (chat_id negativo); uma mensagem por chat em voo,
+      então a ordem dentro de cada chat é preservada
+    - 429: a mensagem volta para o início da fila do chat, que só é
+      liberado depois de `retry_after`; outros erros são reenviados com
+      espera exponencial até `max_retries`
+    - batching: alertas que se acumulam num chat enquanto ele espera o
+      próprio limite saem juntos numa mensagem (até 4096 caracteres), em
+      vez de ficarem cada vez mais atrasados
+
+    `send(chat_id, text)` é quem fala com a Bot API (TelegramNotifier.deliver)
+    e levanta RetryAfter no 429. O despachante sobe no primeiro submit().
+    """
+
+    def __init__(self, send, global_rate: float = TELEGRAM_GLOBAL_RATE,
+                 chat_rate: float = TELEGRAM_CHAT_RATE, group_rate: float = TELEGRAM_GROUP_RATE,
+                 max_retries: int = 3, max_chars: int = MAX_MESSAGE_CHARS):
+        self.send = send
+        self.global_rate = global_rate
+        self.chat_rate = chat_rate
+        self.group_rate = group_rate
+        self.max_retries = max_retries
+        self.max_chars = max_chars
+
+        self._pending: dict[str, deque[_Outbound]] = {}
+        self._next_allowed: dict[str, float] = {}
+        self._ready: list[tuple[float, int, str]] = []     # heap (liberado em, seq, chat)
+        self._scheduled: set[str] = set()                   # chats no heap
+        self._inflight: set[str] = set()
+        self._seq = 0
+        self._next_global = 0.0
+        self._wakeup = asyncio.Event()
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self._task: asyncio.Task | None = None
+        self._sends: set[asyncio.Task] = set()
+        _QUEUE.set_function(self.depth)
+
+    def depth(self) -> int:
+        return sum(len(q) for q in self._pending.values())
+
+    def submit(self, chat_id: str, text: str):
+        """Enfileira uma mensagem para o chat; retorna na hora."""
+        self._pending.setdefault(chat_id, deque()).append(_Outbound(text, time.monotonic()))
+        self._idle.clear()
+        self._schedule(chat_id)
+        self.start()
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._dispatch_loop())
+
+    async def flush(self):
+        """Espera a fila esvaziar (inclusive os envios em voo)."""
+        await self._idle.wait()
+
+    async def stop(self, timeout: float = 10.0):
+        """Tenta esvaziar a fila por até `timeout` segundos e encerra o despachante."""
+        try:
+            await asyncio.wait_for(self.flush(), timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"📮 {self.depth()} mensagens ainda na fila do Telegram ao encerrar")
+        for task in [self._task, *self._sends]:
+            if task is not None:
+                task.cancel()
+        await asyncio.gather(*(t for t in [self._task, *self._sends] if t is not None), return_exceptions=True)
+        self._task = None
+
+    def _interval(self, chat_id: str) -> float:
+        rate = self.group_rate if chat_id.startswith("-") else self.chat_rate
+        return 1.0 / rate if rate > 0 else 0.0
+
+    def _schedule(self, chat_id: str):
+        if chat_id in self._scheduled or chat_id in self._inflight or not self._pending.get(chat_id):
+            return
+        self._seq += 1
+        heapq.heappush(self._ready, (self._next_allowed.get(chat_id, 0.0), self._seq, chat_id))
+        self._scheduled.add(chat_id)
+        self._wakeup.set()
+
+    def _take_slot(self, now: float) -> float:
+        """Reserva a próxima vaga do limite global; retorna quanto esperar se ainda não chegou."""
+        if self.global_rate <= 0:
+            return 0.0
+        if now < self._next_global:
+            return self._next_global - now
+        self._next_global = now + 1.0 / self.global_rate
+        return 0.0
+
+    async def _dispatch_loop(self):
+        while True:
+            if not self._ready:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+
+            now = time.monotonic()
+            ready_at = self._ready[0][0]
+            wait = ready_at - now if ready_at > now else self._take_slot(now)
+            if wait > 0:
+                # acorda antes se chegar um chat liberado mais cedo
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), wait)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            _, _, chat_id = heapq.heappop(self._ready)
+            self._scheduled.discard(chat_id)
+            batch = self._take_batch(chat_id)
+            self._inflight.add(chat_id)
+            task = asyncio.create_task(self._deliver(chat_id, batch))
+            self._sends.add(task)
+            task.add_done_callback(self._sends.discard)
+
+    def _take_batch(self, chat_id: str) -> list[_Outbound]:
+        queue = self._pending[chat_id]
+        batch = [queue.popleft()]
+        size = len(batch[0].text)
+        while queue and size + len(_SEPARATOR) + len(queue[0].text) <= self.max_chars:
+            size += len(_SEPARATOR) + len(queue[0].text)
+            batch.append(queue.popleft())
+        return batch
+
+    async def _deliver(self, chat_id: str, batch: list[_Outbound]):
+        now = time.monotonic()
+        next_allowed = now + self._interval(chat_id)
+        try:
+            await self.send(chat_id, _SEPARATOR.join(m.text for m in batch))
+            done = time.monotonic()
+            for m in batch:
+                _WAIT.observe(done - m.enqueued_at)
+            _BATCH.observe(len(batch))
+        except RetryAfter as e:
+            _RETRY_429.inc()
+            logger.warning(f"⏳ Telegram pediu {e.retry_after:.0f}s de espera no chat {chat_id}")
+            next_allowed = max(next_allowed, time.monotonic() + e.retry_after)
+            self._pending[chat_id].extendleft(reversed(batch))
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            for m in batch:
+                m.attempts += 1
+            retry = [m for m in batch if m.attempts <= self.max_retries]
+            if len(retry) < len(batch):
+                _DROPPED.inc(len(batch) - len(retry))
+                logger.error(f"Alerta descartado após {self.max_retries} tentativas (chat {chat_id}): {e}")
+            if retry:
+                _RETRY_ERROR.inc()
+                next_allowed = max(next_allowed, time.monotonic() + 2 ** retry[0].attempts)
+                self._pending[chat_id].extendleft(reversed(retry))
+        finally:
+            self._inflight.discard(chat_id)
+            self._next_allowed[chat_id] = next_allowed
+            if self._pending.get(chat_id):
+                self._schedule(chat_id)
+            else:
+                self._pending.pop(chat_id, None)
+                if not self._pending and not self._inflight:
+                    self._idle.set()
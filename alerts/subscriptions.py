@@ -0,0 +1,239 @@
+"""
+Assinaturas de alertas: quem recebe cada oportunidade.
+
+Cada assinatura é um chat do Telegram (privado, grupo ou canal de uma mesa)
+com os próprios filtros: edge mínimo, direções, palavras-chave na pergunta
+do mercado e categorias da Gamma API. Ficam num JSON (SUBSCRIPTIONS_PATH),
+recarregado sozinho quando o arquivo muda.
+
+Administração:
+  python -m alerts.subscriptions list
+  python -m alerts.subscriptions add --chat -1001234 --min-edge 0.1 --keyword "bitcoin" --category Crypto
+  python -m alerts.subscriptions remove --chat -1001234
+"""
+
+import argparse
+import bisect
+import json
+import logging
+import os
+import time
+from dataclasses import asdict, dataclass
+
+from analyzer.ai_analyzer import Opportunity
+from analyzer.market_index import tokenize
+from core import metrics
+from config import SUBSCRIPTIONS_PATH, TELEGRAM_ALERT_CHAT_ID
+
+logger = logging.getLogger(__name__)
+
+_COUNT = metrics.gauge("subscriptions", "Assinaturas de alertas carregadas")
+_MATCH = metrics.histogram("subscriptions_match_seconds", "Tempo para achar os assinantes de uma oportunidade",
+                           buckets=(0.00001, 0.00005, 0.0001, 0.0005, 0.001, 0.005))
+_RECIPIENTS = metrics.histogram("subscriptions_recipients", "Chats que recebem cada oportunidade",
+                                buckets=(0, 1, 2, 5, 10, 50, 100, 500, 1000))
+
+_DIRECTIONS = ("YES", "NO")
+
+
+@dataclass(frozen=True)
+class Subscription:
+    """
+    Filtros de um chat. Com `keywords` e/ou `categories`, o mercado precisa
+    casar com pelo menos um deles (uma palavra-chave casa quando todos os
+    seus termos aparecem na pergunta); sem nenhum, vale qualquer mercado.
+    `min_edge` 0 fica só com o MIN_EDGE_THRESHOLD global do analyzer.
+    """
+
+    chat_id: str
+    min_edge: float = 0.0
+    directions: tuple[str, ...] = _DIRECTIONS
+    keywords: tuple[str, ...] = ()
+    categories: tuple[str, ...] = ()
+    name: str = ""
+
+    @classmethod
+    def from_dict(cls, d: dict) -> "Subscription":
+        return cls(
+            chat_id    = str(d["chat_id"]),
+            min_edge   = float(d.get("min_edge", 0.0)),
+            directions = tuple(x.upper() for x in d.get("directions") or _DIRECTIONS),
+            keywords   = tuple(d.get("keywords") or ()),
+            categories = tuple(d.get("categories") or ()),
+            name       = d.get("name", ""),
+        )
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+class SubscriptionRegistry:
+    """
+    Assinaturas indexadas para o fan-out não varrer todos os chats a cada
+    oportunidade:
+
+    - palavras-chave: índice invertido pelo primeiro termo de cada uma; os
+      termos da pergunta do mercado trazem só as candidatas, que são
+      conferidas por inteiro
+    - categorias: dicionário categoria → assinaturas
+    - sem filtro de tema: por direção, uma lista ordenada por `min_edge`;
+      um bisect pelo edge da oportunidade devolve o prefixo que passa
+
+    Edge e direção das candidatas por tema são conferidos um a um (são poucas).
+    """
+
+    def __init__(self, subscriptions=(), path: str = "", reload_interval: float = 5.0):
+        self.path = path
+        self.reload_interval = reload_interval
+        self._mtime = 0.0
+        self._checked_at = time.monotonic()
+        self._build(list(subscriptions))
+        _COUNT.set_function(lambda: len(self._subs))
+
+    @classmethod
+    def from_path(cls, path: str = SUBSCRIPTIONS_PATH, default_chat: str = TELEGRAM_ALERT_CHAT_ID,
+                  **kwargs) -> "SubscriptionRegistry":
+        """
+        Carrega as assinaturas de `path`. Sem arquivo, o único destino é o
+        TELEGRAM_ALERT_CHAT_ID, sem filtros — o comportamento de antes.
+        """
+        registry = cls([Subscription(default_chat)], path=path, **kwargs)
+        registry.reload()
+        return registry
+
+    def __len__(self) -> int:
+        return len(self._subs)
+
+    @property
+    def subscriptions(self) -> list[Subscription]:
+        return list(self._subs)
+
+    def reload(self) -> bool:
+        """Relê o arquivo se ele mudou desde a última carga. Retorna True se recarregou."""
+        self._checked_at = time.monotonic()
+        if not self.path:
+            return False
+        try:
+            mtime = os.stat(self.path).st_mtime
+            if mtime == self._mtime:
+                return False
+            subs = load_subscriptions(self.path)
+        except FileNotFoundError:
+            return False
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logger.error(f"Erro ao carregar assinaturas ({self.path}): {e}")
+            return False
+        self._mtime = mtime
+        self._build(subs)
+        logger.info(f"📬 {len(subs)} assinaturas de alertas carregadas de {self.path}")
+        return True
+
+    def match(self, opp: Opportunity) -> list[str]:
+        """Chats que devem receber a oportunidade, sem repetição."""
+        if self.reload_interval and time.monotonic() - self._checked_at > self.reload_interval:
+            self.reload()
+
+        started = time.perf_counter()
+        edge = abs(opp.edge)
+        direction = opp.direction.upper()
+        matched: set[int] = set()
+
+        edges, ids = self._open.get(direction, ((), ()))
+        matched.update(ids[:bisect.bisect_right(edges, edge)])
+
+        terms = set(tokenize(opp.market.question))
+        candidates = set(self._by_category.get(opp.market.category.lower(), ()))
+        for term in terms:
+            for i, kw_terms in self._by_term.get(term, ()):
+                if i not in candidates and kw_terms <= terms:
+                    candidates.add(i)
+        for i in candidates:
+            sub = self._subs[i]
+            if edge >= sub.min_edge and direction in sub.directions:
+                matched.add(i)
+
+        chats = list(dict.fromkeys(self._subs[i].chat_id for i in sorted(matched)))
+        _MATCH.observe(time.perf_counter() - started)
+        _RECIPIENTS.observe(len(chats))
+        return chats
+
+    def _build(self, subs: list[Subscription]):
+        by_term: dict[str, list[tuple[int, frozenset[str]]]] = {}
+        by_category: dict[str, list[int]] = {}
+        open_subs: dict[str, list[tuple[float, int]]] = {d: [] for d in _DIRECTIONS}
+
+        for i, sub in enumerate(subs):
+            if not sub.keywords and not sub.categories:
+                for d in sub.directions:
+                    open_subs.setdefault(d, []).append((sub.min_edge, i))
+                continue
+            for kw in sub.keywords:
+                kw_terms = tokenize(kw)
+                if kw_terms:
+                    by_term.setdefault(kw_terms[0], []).append((i, frozenset(kw_terms)))
+            for cat in sub.categories:
+                by_category.setdefault(cat.lower(), []).append(i)
+
+        # troca tudo de uma vez: match() nunca vê um índice pela metade
+        self._subs = subs
+        self._by_term = by_term
+        self._by_category = by_category
+        self._open = {
+            d: ([e for e, _ in sorted(rows)], [i for _, i in sorted(rows)])
+            for d, rows in open_subs.items()
+        }
+
+
+def load_subscriptions(path: str) -> list[Subscription]:
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    return [Subscription.from_dict(d) for d in data.get("subscriptions", [])]
+
+
+def save_subscriptions(path: str, subs: list[Subscription]):
+    if os.path.dirname(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({"subscriptions": [s.to_dict() for s in subs]}, f, ensure_ascii=False, indent=2)
+    os.replace(tmp, path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--path", default=SUBSCRIPTIONS_PATH)
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    sub.add_parser("list")
+    add = sub.add_parser("add")
+    add.add_argument("--chat", required=True)
+    add.add_argument("--name", default="")
+    add.add_argument("--min-edge", type=float, default=0.0)
+    add.add_argument("--direction", action="append", choices=_DIRECTIONS, help="padrão: as duas")
+    add.add_argument("--keyword", action="append", default=[])
+    add.add_argument("--category", action="append", default=[])
+    remove = sub.add_parser("remove")
+    remove.add_argument("--chat", required=True)
+    args = parser.parse_args()
+
+    subs = load_subscriptions(args.path) if os.path.exists(args.path) else []
+    if args.cmd == "add":
+        subs.append(Subscription(
+            chat_id=args.chat, name=args.name, min_edge=args.min_edge,
+            directions=tuple(args.direction or _DIRECTIONS),
+            keywords=tuple(args.keyword), categories=tuple(args.category),
+        ))
+        save_subscriptions(args.path, subs)
+    elif args.cmd == "remove":
+        kept = [s for s in subs if s.chat_id != args.chat]
+        print(f"{len(subs) - len(kept)} assinaturas removidas")
+        subs = kept
+        save_subscriptions(args.path, subs)
+
+    for s in subs:
+        filters = ", ".join(s.keywords + tuple(f"#{c}" for c in s.categories)) or "todos os mercados"
+        print(f"{s.chat_id:>16}  edge ≥ {s.min_edge:.0%}  {'/'.join(s.directions):<7} {filters}"
+              + (f"  ({s.name})" if s.name else ""))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,38 @@
 import json
 import logging
+import time
 from dataclasses import dataclass
-from anthropic import Anthropic
 from polymarket.client import Market
-from config import ANTHROPIC_API_KEY, MIN_EDGE_THRESHOLD
+from analyzer.market_index import MarketIndex
+from analyzer.limiter import RateLimitedError
+from analyzer.json_stream import OpportunityStreamParser, parse_json_response
+from analyzer.prompt import MarketTable, build_prompt, pack_markets
+from analyzer.providers import build_providers
+from analyzer.router import LLMRouter
+from core import metrics
+from config import (
+    MIN_EDGE_THRESHOLD,
+    PRESELECT_TOP_K, PRESELECT_MIN_SCORE, PROMPT_MARKET_TOKENS,
+)
 
 logger = logging.getLogger(__name__)
 
+_ANALYZE = metrics.histogram("analyzer_analyze_seconds", "Duração de analyze/analyze_batch", ("mode",))
+_ANALYZE_SINGLE, _ANALYZE_BATCH, _ANALYZE_STREAM = (
+    _ANALYZE.labels(mode=m) for m in ("single", "batch", "stream")
+)
+_LLM_REQUEST = metrics.histogram("llm_request_seconds", "Duração das chamadas ao LLM")
+_LLM_FIRST_TOKEN = metrics.histogram("llm_first_token_seconds", "Tempo até o primeiro token no modo streaming")
+_FIRST_OPPORTUNITY = metrics.histogram("llm_first_opportunity_seconds",
+                                       "Início da chamada ao LLM → primeira oportunidade completa (streaming)")
+_PARSE = metrics.histogram("llm_parse_seconds", "Parse e validação do JSON devolvido pelo LLM",
+                           buckets=(0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05))
+_ERRORS = metrics.counter("llm_errors_total", "Falhas na análise (parse = JSON inválido, other)", ("kind",))
+_PARSE_ERRORS, _OTHER_ERRORS = _ERRORS.labels(kind="parse"), _ERRORS.labels(kind="other")
+_PRESELECT = metrics.histogram("analyzer_preselect_seconds", "Pré-seleção local (BM25) por notícia")
+_PROMPT_DROPPED = metrics.counter("prompt_markets_dropped_total",
+                                  "Mercados candidatos que não couberam no orçamento de tokens do prompt")
+
 
 @dataclass
 class Opportunity:
@@ -22,113 +48,316 @@ class Opportunity:
 
 class AIAnalyzer:
     """
-    Usa Claude para:
+    Usa o LLM (Claude e, opcionalmente, outros provedores via LLMRouter) para:
     1. Verificar se uma notícia é relevante para algum mercado
     2. Estimar a probabilidade "real" do evento
     3. Calcular o edge em relação ao preço atual
     """
 
-    def __init__(self):
-        self.client = Anthropic(api_key=ANTHROPIC_API_KEY)
+    def __init__(self, client=None, router: LLMRouter | None = None,
+                 top_k: int = PRESELECT_TOP_K, min_score: float = PRESELECT_MIN_SCORE,
+                 prompt_budget: int = PROMPT_MARKET_TOKENS):
+        # client injetável: um stub local no formato do SDK da Anthropic (benchmarks,
+        # replay). router injetável: vários provedores, inclusive stubs.
+        self.llm = router or LLMRouter(build_providers(anthropic_client=client))
+        self.index = MarketIndex()
+        self.top_k = top_k
+        self.min_score = min_score
+        self.prompt_budget = prompt_budget
+        self._verdict_handlers = []
+
+    @property
+    def client(self):
+        """Cliente SDK da Anthropic (criado no primeiro uso), em qualquer posição de LLM_PROVIDERS."""
+        for provider in self.llm.providers:
+            if provider.name.partition(":")[0] == "anthropic":
+                return provider.client
+        raise AttributeError("nenhum provedor anthropic configurado")
+
+    def on_verdict(self, handler):
+        """
+        Registra callback chamado a cada veredito do LLM, com
+        (news, itens_json_da_notícia, oportunidades). Serve para gravar
+        respostas (replay) e o histórico de vereditos.
+        """
+        self._verdict_handlers.append(handler)
+
+    def _emit_verdict(self, news: dict, items: list[dict], opportunities: list[Opportunity]):
+        for cb in self._verdict_handlers:
+            try:
+                cb(news, items, opportunities)
+            except Exception as e:
+                logger.error(f"Erro no callback de veredito: {e}")
+
+    def update_index(self, markets: list[Market]) -> None:
+        """Sincroniza o índice local com o catálogo (ligado em PolymarketClient.on_refresh)."""
+        self.index.update(markets)
+
+    def preselect(self, news: dict, markets: list[Market]) -> list[Market]:
+        """
+        Escolhe localmente os mercados candidatos para a notícia (BM25),
+        em vez de mandar o catálogo inteiro ao LLM.
+        Com PRESELECT_TOP_K=0 devolve o catálogo inteiro: o prompt leva os de
+        maior volume até o orçamento de tokens (PROMPT_MARKET_TOKENS).
+        """
+        if self.top_k <= 0:
+            return markets
+
+        with _PRESELECT.time():
+            if not len(self.index):
+                self.index.update(markets)
+
+            market_by_id = {m.condition_id: m for m in markets}
+            hits = self.index.search(news["text"], self.top_k, self.min_score)
+            return [market_by_id[cid] for cid, _ in hits if cid in market_by_id]
+
+    def build_prompt(self, news: dict, markets: list[Market]) -> str:
+        """Prompt de uma notícia: instruções fixas, tabela compacta de mercados e a notícia."""
+        return self._prompt([news], markets)[0]
 
-    def analyze(self, news: dict, markets: list[Market]) -> list[Opportunity]:
+    def build_batch_prompt(self, news_list: list[dict], markets: list[Market]) -> str:
+        """Prompt com várias notícias numeradas e um único bloco de mercados."""
+        return self._prompt(news_list, markets)[0]
+
+    def _prompt(self, news_list: list[dict], markets: list[Market]) -> tuple[str, MarketTable]:
+        table = pack_markets(markets, self.prompt_budget)
+        if table.dropped:
+            _PROMPT_DROPPED.inc(table.dropped)
+        return build_prompt(news_list, table), table
+
+    def analyze(self, news: dict, markets: list[Market],
+                candidates: list[Market] | None = None) -> list[Opportunity]:
         """
         Recebe uma notícia e lista de mercados.
         Retorna oportunidades com edge acima do threshold.
+        `candidates` permite reaproveitar uma pré-seleção já calculada.
         """
+        with _ANALYZE_SINGLE.time():
+            return self._analyze(news, markets, candidates)
+
+    def _analyze(self, news: dict, markets: list[Market],
+                 candidates: list[Market] | None) -> list[Opportunity]:
         if not markets:
             return []
 
-        # Monta contexto compacto dos mercados para o LLM
-        markets_summary = [
-            {
-                "id": m.condition_id,
-                "question": m.question,
-                "yes_price": round(m.yes_price, 3),
-                "no_price": round(m.no_price, 3),
-                "volume_24h": round(m.volume_24h, 0),
-            }
-            for m in markets[:80]  # limita pra não explodir o contexto
-        ]
-
-        prompt = f"""Você é um trader quantitativo especializado em mercados de previsão (Polymarket).
-
-NOTÍCIA RECEBIDA:
-Canal: {news['channel']}
-Horário: {news['timestamp']}
-Texto: {news['text']}
-
-MERCADOS ATIVOS NA POLYMARKET (YES_PRICE = probabilidade implícita do mercado):
-{json.dumps(markets_summary, ensure_ascii=False, indent=2)}
-
-SUA TAREFA:
-1. Identifique APENAS os mercados que são diretamente afetados por essa notícia.
-2. Para cada mercado afetado, estime a probabilidade REAL do evento (considerando a notícia).
-3. Calcule o edge: (true_prob - yes_price) para YES, ou (true_prob - no_price) para NO.
-4. Retorne SOMENTE mercados com edge absoluto >= {MIN_EDGE_THRESHOLD} (ou seja, {MIN_EDGE_THRESHOLD * 100:.0f}%).
-
-Responda EXCLUSIVAMENTE em JSON válido, sem texto extra:
-{{
-  "opportunities": [
-    {{
-      "market_id": "condition_id do mercado",
-      "direction": "YES" ou "NO",
-      "true_prob": 0.XX,
-      "edge": 0.XX,
-      "reasoning": "explicação curta em português de por que a notícia afeta esse mercado"
-    }}
-  ]
-}}
-
-Se nenhum mercado for afetado com edge suficiente, retorne: {{"opportunities": []}}
-"""
-
-        try:
-            response = self.client.messages.create(
-                model="claude-haiku-4-5-20251001",
-                max_tokens=1000,
-                messages=[{"role": "user", "content": prompt}],
-            )
-
-            raw = response.content[0].text.strip()
-            # Remove markdown se vier com ```json
-            if raw.startswith("```"):
-                raw = raw.split("```")[1]
-                if raw.startswith("json"):
-                    raw = raw[4:]
-            data = json.loads(raw)
+        if candidates is None:
+            candidates = self.preselect(news, markets)
+        if not candidates:
+            logger.info("🔎 Nenhum mercado candidato para essa notícia (pré-seleção local)")
+            return []
 
-            opportunities = []
-            market_by_id = {m.condition_id: m for m in markets}
+        prompt, table = self._prompt([news], candidates)
 
-            for opp in data.get("opportunities", []):
-                market = market_by_id.get(opp["market_id"])
-                if not market:
-                    continue
-
-                edge = float(opp["edge"])
-                if abs(edge) < MIN_EDGE_THRESHOLD:
-                    continue
-
-                current_price = market.yes_price if opp["direction"] == "YES" else market.no_price
-
-                opportunities.append(Opportunity(
-                    market=market,
-                    direction=opp["direction"],
-                    current_price=current_price,
-                    true_prob=float(opp["true_prob"]),
-                    edge=edge,
-                    reasoning=opp["reasoning"],
-                    news_text=news["text"],
-                    news_channel=news["channel"],
-                ))
+        try:
+            raw = self._complete(prompt, max_tokens=1000)
+            parse_started = time.perf_counter()
+            data = parse_json_response(raw)
+            # O LLM só vê os mercados da tabela: IDs curtos (ou condition_id) → Market
+            items = data.get("opportunities", [])
+            opportunities = self._to_opportunities(items, news, table.by_id)
+            _PARSE.observe(time.perf_counter() - parse_started)
+            self._emit_verdict(news, table.resolve(items), opportunities)
 
             logger.info(f"🔍 Análise concluída: {len(opportunities)} oportunidade(s) encontrada(s)")
             return opportunities
 
         except json.JSONDecodeError as e:
+            _PARSE_ERRORS.inc()
             logger.error(f"Erro ao parsear resposta do LLM: {e}")
             return []
+        except RateLimitedError:
+            raise
         except Exception as e:
+            _OTHER_ERRORS.inc()
             logger.error(f"Erro na análise: {e}")
             return []
+
+    def analyze_stream(self, news: dict, markets: list[Market],
+                       candidates: list[Market] | None = None,
+                       on_opportunity=None) -> list[Opportunity]:
+        """
+        Como analyze, mas consome a resposta do LLM como stream de tokens:
+        cada oportunidade é validada e entregue a `on_opportunity(opp)` assim
+        que o objeto dela fecha no JSON, sem esperar o resto da resposta.
+        Retorna a lista completa no fim (cache de repostagens, vereditos).
+        Roda em thread: `on_opportunity` é chamado na thread da análise.
+        """
+        with _ANALYZE_STREAM.time():
+            return self._analyze_stream(news, markets, candidates, on_opportunity)
+
+    def _analyze_stream(self, news: dict, markets: list[Market],
+                        candidates: list[Market] | None, on_opportunity) -> list[Opportunity]:
+        if not markets:
+            return []
+
+        if candidates is None:
+            candidates = self.preselect(news, markets)
+        if not candidates:
+            logger.info("🔎 Nenhum mercado candidato para essa notícia (pré-seleção local)")
+            return []
+
+        prompt, table = self._prompt([news], candidates)
+        market_by_id = table.by_id
+        parser = OpportunityStreamParser()
+        items: list[dict] = []
+        opportunities: list[Opportunity] = []
+        started = time.perf_counter()
+        parse_time = 0.0
+
+        try:
+            for chunk in self._stream(prompt, max_tokens=1000):
+                parse_started = time.perf_counter()
+                for item in parser.feed(chunk):
+                    items.append(item)
+                    try:
+                        found = self._to_opportunities([item], news, market_by_id)
+                    except (KeyError, TypeError, ValueError) as e:
+                        _PARSE_ERRORS.inc()
+                        logger.warning(f"Oportunidade inválida na resposta do LLM, ignorada: {e}")
+                        continue
+                    for opp in found:
+                        if not opportunities:
+                            _FIRST_OPPORTUNITY.observe(time.perf_counter() - started)
+                        opportunities.append(opp)
+                        if on_opportunity is not None:
+                            on_opportunity(opp)
+                parse_time += time.perf_counter() - parse_started
+
+            parser.result()  # resposta truncada ou malformada conta como erro de parse
+            _PARSE.observe(parse_time)
+            self._emit_verdict(news, table.resolve(items), opportunities)
+
+            logger.info(f"🔍 Análise (streaming) concluída: {len(opportunities)} oportunidade(s) encontrada(s)")
+            return opportunities
+
+        # Oportunidades já entregues continuam valendo mesmo se o resto da resposta falhar
+        except json.JSONDecodeError as e:
+            _PARSE_ERRORS.inc()
+            logger.error(f"Erro ao parsear resposta do LLM (streaming): {e}")
+            return opportunities
+        except RateLimitedError:
+            raise
+        except Exception as e:
+            _OTHER_ERRORS.inc()
+            logger.error(f"Erro na análise (streaming): {e}")
+            return opportunities
+
+    def analyze_batch(self, news_list: list[dict], markets: list[Market],
+                      candidates: list[list[Market]] | None = None) -> list[list[Opportunity]]:
+        """
+        Analisa várias notícias numa única chamada ao LLM.
+        Os candidatos de todas as notícias vão num bloco só de mercados, e
+        cada oportunidade volta com `news_index` para ser atribuída à notícia
+        de origem. Retorna uma lista de oportunidades por notícia, na ordem.
+        `candidates` (um por notícia) reaproveita pré-seleções já calculadas
+        e filtradas, como em analyze.
+        """
+        if len(news_list) == 1:
+            return [self.analyze(news_list[0], markets, candidates[0] if candidates else None)]
+        with _ANALYZE_BATCH.time():
+            return self._analyze_batch(news_list, markets, candidates)
+
+    def _analyze_batch(self, news_list: list[dict], markets: list[Market],
+                       per_news: list[list[Market]] | None) -> list[list[Opportunity]]:
+        results: list[list[Opportunity]] = [[] for _ in news_list]
+        if not markets or not news_list:
+            return results
+
+        if per_news is None:
+            per_news = [self.preselect(news, markets) for news in news_list]
+        candidates: dict[str, Market] = {}
+        for selected in per_news:
+            for m in selected:
+                candidates.setdefault(m.condition_id, m)
+        if not candidates:
+            logger.info("🔎 Nenhum mercado candidato para o lote (pré-seleção local)")
+            return results
+
+        prompt, table = self._prompt(news_list, list(candidates.values()))
+
+        try:
+            raw = self._complete(prompt, max_tokens=600 + 400 * len(news_list))
+            parse_started = time.perf_counter()
+            data = parse_json_response(raw)
+            market_by_id = table.by_id
+
+            by_news: dict[int, list[dict]] = {}
+            for opp in data.get("opportunities", []):
+                idx = int(opp.get("news_index", -1))
+                if 0 <= idx < len(news_list):
+                    by_news.setdefault(idx, []).append(opp)
+
+            for idx, news in enumerate(news_list):
+                results[idx] = self._to_opportunities(by_news.get(idx, []), news, market_by_id)
+            _PARSE.observe(time.perf_counter() - parse_started)
+            for idx, news in enumerate(news_list):
+                self._emit_verdict(news, table.resolve(by_news.get(idx, [])), results[idx])
+
+            total = sum(len(r) for r in results)
+            logger.info(
+                f"🔍 Lote de {len(news_list)} notícias analisado: "
+                f"{total} oportunidade(s) encontrada(s)"
+            )
+            return results
+
+        except json.JSONDecodeError as e:
+            _PARSE_ERRORS.inc()
+            logger.error(f"Erro ao parsear resposta do LLM (lote): {e}")
+            return results
+        except RateLimitedError:
+            raise
+        except Exception as e:
+            _OTHER_ERRORS.inc()
+            logger.error(f"Erro na análise (lote): {e}")
+            return results
+
+    def _complete(self, prompt: str, max_tokens: int) -> str:
+        """
+        Resposta completa do primeiro provedor que devolver JSON válido
+        (hedge e failover no LLMRouter). 429/529 de todos sobem como
+        RateLimitedError para o AdaptiveLimiter.
+        """
+        with _LLM_REQUEST.time():
+            return self.llm.complete(prompt, max_tokens, validate=parse_json_response)
+
+    def _stream(self, prompt: str, max_tokens: int):
+        """Gera os pedaços de texto da resposta à medida que chegam (do provedor que responder primeiro)."""
+        started = time.perf_counter()
+        try:
+            first = True
+            for text in self.llm.stream(prompt, max_tokens):
+                if first:
+                    _LLM_FIRST_TOKEN.observe(time.perf_counter() - started)
+                    first = False
+                yield text
+        finally:
+            _LLM_REQUEST.observe(time.perf_counter() - started)
+
+    @staticmethod
+    def _to_opportunities(items: list[dict], news: dict, market_by_id: dict[str, Market]) -> list[Opportunity]:
+        """Valida os itens do JSON e monta as Opportunity com edge acima do threshold."""
+        opportunities = []
+
+        for opp in items:
+            market = market_by_id.get(opp["market_id"])
+            if not market:
+                continue
+
+            edge = float(opp["edge"])
+            if abs(edge) < MIN_EDGE_THRESHOLD:
+                continue
+
+            current_price = market.yes_price if opp["direction"] == "YES" else market.no_price
+
+            opportunities.append(Opportunity(
+                market=market,
+                direction=opp["direction"],
+                current_price=current_price,
+                true_prob=float(opp["true_prob"]),
+                edge=edge,
+                reasoning=opp["reasoning"],
+                news_text=news["text"],
+                news_channel=news["channel"],
+            ))
+
+        return opportunities
@@ -0,0 +1,64 @@
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class MicroBatcher:
+    """
+    Junta itens que chegam numa janela curta e processa todos de uma vez.
+
+    submit() devolve o resultado do próprio item: quem chama continua
+    enxergando uma notícia → uma lista de oportunidades, mas por baixo
+    várias notícias compartilham uma única chamada ao LLM. O lote é
+    despachado quando a janela (`window` segundos, contada a partir do
+    primeiro item) fecha ou quando atinge `max_items`.
+
+    `process_batch` é uma corrotina que recebe a lista de itens e devolve
+    uma lista de resultados na mesma ordem.
+    """
+
+    def __init__(self, process_batch, window: float, max_items: int):
+        self.process_batch = process_batch
+        self.window = window
+        self.max_items = max_items
+        self._pending: list[tuple[object, asyncio.Future]] = []
+        self._timer: asyncio.TimerHandle | None = None
+        self._tasks: set[asyncio.Task] = set()
+
+    async def submit(self, item):
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((item, future))
+
+        if len(self._pending) >= self.max_items:
+            self._flush()
+        elif self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(self.window, self._flush)
+
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        batch, self._pending = self._pending, []
+        if batch:
+            task = asyncio.create_task(self._run(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch: list[tuple[object, asyncio.Future]]):
+        try:
+            results = await self.process_batch([item for item, _ in batch])
+        except Exception as e:
+            logger.error(f"Erro ao processar lote de {len(batch)} itens: {e}")
+            results = [e] * len(batch)
+
+        for (_, future), result in zip(batch, results):
+            if future.done():
+                continue
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
@@ -0,0 +1,237 @@
+import asyncio
+import logging
+import threading
+import time
+from dataclasses import dataclass
+
+import numpy as np
+
+from analyzer.ai_analyzer import Opportunity
+from analyzer.limiter import news_timestamp
+from core import metrics
+from polymarket.client import Market
+from polymarket.columnar import ColumnarMarketStore
+from config import MIN_EDGE_THRESHOLD, ESTIMATE_TTL, ESTIMATE_HALF_LIFE, ESTIMATE_CHECK_INTERVAL
+
+logger = logging.getLogger(__name__)
+
+_LIVE = metrics.gauge("estimates_live", "Estimativas de probabilidade do LLM ainda válidas")
+_CHECK = metrics.histogram("estimates_check_seconds", "Reavaliação em bloco das estimativas contra os preços atuais",
+                           buckets=(0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05))
+_ALERTS = metrics.counter("estimates_alerts_total", "Oportunidades abertas por movimento de preço (sem chamar o LLM)")
+
+
+@dataclass
+class Estimate:
+    """Probabilidade do YES estimada pelo LLM para um mercado, a partir de uma notícia."""
+    condition_id: str
+    prob: float             # P(YES) estimada
+    prior: float            # preço do YES quando a estimativa foi feita
+    news_ts: float
+    news_text: str
+    news_channel: str
+    reasoning: str
+    armed_yes: bool = True  # dispara quando o edge do lado cruzar o threshold
+    armed_no: bool = True
+
+    def weight(self, now: float, half_life: float) -> float:
+        return 0.5 ** (max(0.0, now - self.news_ts) / half_life) if half_life > 0 else 1.0
+
+    def effective(self, now: float, half_life: float) -> float:
+        """
+        P(YES) com decaimento: a diferença para o preço da época cai pela
+        metade a cada `half_life` s desde a notícia — informação velha vale menos.
+        """
+        return self.prior + self.weight(now, half_life) * (self.prob - self.prior)
+
+
+class EstimateStore:
+    """
+    Estimativas recentes do LLM por mercado, reavaliadas a cada movimento de preço.
+
+    Cada veredito guarda a probabilidade estimada de todos os mercados que
+    o LLM considerou afetados — inclusive os que ficaram abaixo do
+    MIN_EDGE_THRESHOLD. Quando o preço anda (tick do CLOB ou refresh do
+    catálogo), todas as estimativas vivas são conferidas numa passada
+    vetorizada sobre as colunas do catálogo (ColumnarMarketStore.edges); o
+    lado cujo edge cruza o threshold vira oportunidade sem nova chamada ao LLM.
+
+    Uma estimativa expira `ttl` s depois da notícia e decai até lá (ver
+    Estimate.effective). Depois de disparar, o lado só rearma quando o edge
+    volta para menos da metade do threshold, então um preço oscilando em
+    cima da linha não gera alertas em sequência. Uma notícia nova sobre o
+    mesmo mercado substitui a estimativa anterior.
+
+    Ligações: AIAnalyzer.on_verdict → record_verdict, LivePriceTable.on_update
+    → on_price, PolymarketClient.on_refresh → on_refresh. As reavaliações
+    rodam numa task (start) no máximo a cada `interval` s, juntando rajadas
+    de ticks numa passada só.
+    """
+
+    def __init__(self, columns: ColumnarMarketStore, ttl: float = ESTIMATE_TTL,
+                 half_life: float = ESTIMATE_HALF_LIFE, threshold: float = MIN_EDGE_THRESHOLD,
+                 interval: float = ESTIMATE_CHECK_INTERVAL):
+        self.columns = columns
+        self.ttl = ttl
+        self.half_life = half_life
+        self.threshold = threshold
+        self.interval = interval
+        self._estimates: dict[str, Estimate] = {}
+        self._lock = threading.Lock()   # record_verdict chega da thread da análise
+        self._wakeup: asyncio.Event | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._task: asyncio.Task | None = None
+        _LIVE.set_function(self.__len__)
+
+    def __len__(self) -> int:
+        return len(self._estimates)
+
+    def __contains__(self, condition_id: str) -> bool:
+        return condition_id in self._estimates
+
+    def get(self, condition_id: str) -> Estimate | None:
+        return self._estimates.get(condition_id)
+
+    # ── Entrada ─────────────────────────────────────────────────────────────────
+    def record_verdict(self, news: dict, items: list[dict], opportunities: list[Opportunity]):
+        """Guarda as estimativas de um veredito (ligado em AIAnalyzer.on_verdict)."""
+        if self.ttl <= 0:
+            return
+        ts = news_timestamp(news)
+        if time.time() - ts >= self.ttl:
+            return
+        for item in items:
+            try:
+                cid = str(item["market_id"])
+                prob = float(item["true_prob"])
+                direction = item["direction"]
+            except (KeyError, TypeError, ValueError):
+                continue
+            r = self.columns.row(cid)
+            if r is None or direction not in ("YES", "NO") or not 0.0 <= prob <= 1.0:
+                continue
+            yes, no = float(self.columns.yes[r]), float(self.columns.no[r])
+            p_yes = prob if direction == "YES" else 1.0 - prob
+            estimate = Estimate(
+                condition_id=cid, prob=p_yes, prior=yes, news_ts=ts,
+                news_text=news["text"], news_channel=news["channel"],
+                reasoning=str(item.get("reasoning", "")),
+                # lado que já está acima do threshold já foi (ou seria) alertado pela análise
+                armed_yes=p_yes - yes < self.threshold,
+                armed_no=(1.0 - p_yes) - no < self.threshold,
+            )
+            with self._lock:
+                current = self._estimates.get(cid)
+                if current is None or current.news_ts <= ts:
+                    self._estimates[cid] = estimate
+
+    def on_price(self, condition_id: str, *_):
+        """Tick de preço (ligado em LivePriceTable.on_update): agenda uma reavaliação se o mercado tem estimativa."""
+        if condition_id in self._estimates:
+            self._wake()
+
+    def on_refresh(self, markets: list[Market]):
+        """Refresh do catálogo (ligado em PolymarketClient.on_refresh): todos os preços podem ter mudado."""
+        if self._estimates:
+            self._wake()
+
+    def _wake(self):
+        if self._loop is not None and self._wakeup is not None:
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+
+    # ── Reavaliação ─────────────────────────────────────────────────────────────
+    def check(self, now: float | None = None) -> list[Opportunity]:
+        """
+        Confere todas as estimativas vivas contra os preços atuais das colunas
+        e devolve as oportunidades cujo edge acabou de cruzar o threshold.
+        """
+        now = now or time.time()
+        with _CHECK.time(), self._lock:
+            if not self._estimates:
+                return []
+            ids = list(self._estimates)
+            live = [self._estimates[cid] for cid in ids]
+            ts = np.fromiter((e.news_ts for e in live), np.float64, len(live))
+            expired = np.flatnonzero(now - ts >= self.ttl)
+            for i in expired:
+                del self._estimates[ids[i]]
+            if len(expired):
+                keep = np.ones(len(ids), dtype=bool)
+                keep[expired] = False
+                ids = [cid for cid, k in zip(ids, keep) if k]
+                live = [e for e, k in zip(live, keep) if k]
+                ts = ts[keep]
+            if not ids:
+                return []
+
+            # P(YES) com decaimento (Estimate.effective) para todas de uma vez
+            prob = np.fromiter((e.prob for e in live), np.float64, len(live))
+            prior = np.fromiter((e.prior for e in live), np.float64, len(live))
+            weight = 0.5 ** (np.maximum(0.0, now - ts) / self.half_life) if self.half_life > 0 else 1.0
+            effective = prior + weight * (prob - prior)
+            ids, edge_yes, edge_no = self.columns.edges(dict(zip(ids, effective.tolist())))
+            probs = dict(zip(ids, effective.tolist()))
+
+            # só mexe em Python nas linhas que disparam ou estão esperando para rearmar
+            rearm = self.threshold / 2
+            disarmed = np.fromiter((not (e.armed_yes and e.armed_no) for e in map(self._estimates.get, ids)),
+                                   bool, len(ids))
+            crossing = (edge_yes >= self.threshold) | (edge_no >= self.threshold)
+
+            found = []
+            for i in np.flatnonzero(crossing | disarmed):
+                cid = ids[i]
+                e = self._estimates[cid]
+                ey, en = float(edge_yes[i]), float(edge_no[i])
+                if not e.armed_yes and ey < rearm:
+                    e.armed_yes = True
+                if not e.armed_no and en < rearm:
+                    e.armed_no = True
+                if e.armed_yes and ey >= self.threshold and ey >= en:
+                    e.armed_yes = False
+                    found.append((e, "YES", probs[cid], ey))
+                elif e.armed_no and en >= self.threshold:
+                    e.armed_no = False
+                    found.append((e, "NO", 1.0 - probs[cid], en))
+
+        opportunities = []
+        for e, direction, true_prob, edge in found:
+            market = self.columns.view(e.condition_id)
+            if market is None:
+                continue
+            price = market.yes_price if direction == "YES" else market.no_price
+            opportunities.append(Opportunity(
+                market=market, direction=direction, current_price=price,
+                true_prob=true_prob, edge=edge, reasoning=e.reasoning,
+                news_text=e.news_text, news_channel=e.news_channel,
+            ))
+            logger.info(f"🔁 Preço abriu edge sem nova análise: {direction} em '{market.question[:50]}' | "
+                        f"edge={edge * 100:+.1f}% | notícia de {(now - e.news_ts) / 60:.0f} min atrás")
+        _ALERTS.inc(len(opportunities))
+        return opportunities
+
+    def start(self, on_opportunity):
+        """Sobe a task de reavaliação; `on_opportunity(opp)` recebe cada oportunidade no event loop."""
+        if self.ttl <= 0 or (self._task is not None and not self._task.done()):
+            return
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._run(on_opportunity))
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _run(self, on_opportunity):
+        while True:
+            await self._wakeup.wait()
+            self._wakeup.clear()
+            try:
+                for opp in self.check():
+                    on_opportunity(opp)
+            except Exception as e:
+                logger.error(f"Erro na reavaliação das estimativas: {e}")
+            # junta os ticks dos próximos `interval` s na próxima passada
+            await asyncio.sleep(self.interval)
@@ -0,0 +1,104 @@
+import json
+
+
+class OpportunityStreamParser:
+    """
+    Parser JSON incremental para a resposta do LLM ({"opportunities": [...]}).
+
+    Recebe o texto em pedaços (feed) à medida que os tokens chegam e devolve
+    cada objeto da lista do objeto raiz assim que a chave de fechamento dele
+    aparece, sem esperar o fim da resposta. Texto antes do primeiro "{" e
+    depois do fechamento do objeto raiz (cercas ```json, comentários) é
+    ignorado.
+
+    Só acompanha aspas, escapes e profundidade de chaves/colchetes: o objeto
+    completo é decodificado com json.loads, então a validação é a mesma do
+    modo sem streaming. `result()` devolve o documento inteiro no fim.
+    """
+
+    def __init__(self):
+        self._buf: list[str] = []       # texto do objeto raiz visto até agora
+        self._len = 0
+        self._stack: list[str] = []
+        self._in_string = False
+        self._escape = False
+        self._item_start: int | None = None
+        self._started = False
+        self._closed = False
+
+    def feed(self, chunk: str) -> list[dict]:
+        """Consome um pedaço do texto; retorna os objetos que ficaram completos nele."""
+        if self._closed or not chunk:
+            return []
+
+        if not self._started:
+            start = chunk.find("{")
+            if start < 0:
+                return []
+            chunk = chunk[start:]
+            self._started = True
+
+        items = []
+        base = self._len
+        self._buf.append(chunk)
+        self._len += len(chunk)
+
+        for i, ch in enumerate(chunk):
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                continue
+
+            if ch == '"':
+                self._in_string = True
+            elif ch in "{[":
+                if ch == "{" and self._stack == ["{", "["]:
+                    self._item_start = base + i
+                self._stack.append(ch)
+            elif ch in "}]":
+                if not self._stack:
+                    continue
+                self._stack.pop()
+                if ch == "}" and self._stack == ["{", "["] and self._item_start is not None:
+                    item = self._decode(self._item_start, base + i + 1)
+                    self._item_start = None
+                    if isinstance(item, dict):
+                        items.append(item)
+                elif not self._stack:
+                    # fim do objeto raiz: descarta o que vier depois (ex: ```)
+                    self._closed = True
+                    self._buf = ["".join(self._buf)[: base + i + 1]]
+                    break
+        return items
+
+    def result(self) -> dict:
+        """Documento completo. Levanta json.JSONDecodeError se a resposta ficou truncada ou inválida."""
+        data = json.loads("".join(self._buf) or "null")
+        if not isinstance(data, dict):
+            raise json.JSONDecodeError("resposta não é um objeto JSON", "".join(self._buf), 0)
+        return data
+
+    def _decode(self, start: int, end: int):
+        text = "".join(self._buf)
+        if len(self._buf) > 1:
+            self._buf = [text]
+        try:
+            return json.loads(text[start:end])
+        except json.JSONDecodeError:
+            return None
+
+
+def parse_json_response(raw: str) -> dict:
+    """
+    Extrai o objeto JSON da resposta completa do LLM, tolerando cercas de
+    markdown (```json ... ```) e texto antes/depois do objeto.
+    """
+    start = raw.find("{")
+    if start < 0:
+        raise json.JSONDecodeError("nenhum objeto JSON na resposta", raw, 0)
+    data, _ = json.JSONDecoder().raw_decode(raw, start)
+    return data
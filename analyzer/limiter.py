@@ -0,0 +1,242 @@
+import asyncio
+import heapq
+import itertools
+import logging
+import math
+import time
+from datetime import datetime
+
+from core import metrics
+from config import (
+    LLM_CONCURRENCY_INITIAL, LLM_CONCURRENCY_MIN, LLM_CONCURRENCY_MAX,
+    LLM_LATENCY_TOLERANCE, NEWS_FRESHNESS_BUDGET, CHANNEL_WEIGHTS,
+)
+
+logger = logging.getLogger(__name__)
+
+_LIMIT = metrics.gauge("llm_concurrency_limit", "Limite atual de chamadas simultâneas ao LLM (AIMD)")
+_INFLIGHT = metrics.gauge("llm_inflight", "Chamadas ao LLM em andamento")
+_QUEUE = metrics.gauge("llm_queue_depth", "Notícias esperando um slot de LLM")
+_QUEUE_WAIT = metrics.histogram("llm_queue_wait_seconds", "Espera na fila por um slot de chamada ao LLM")
+_SHED = metrics.counter("llm_shed_total", "Notícias descartadas por passarem do orçamento de frescor")
+_RATE_LIMITED = metrics.counter("llm_rate_limited_total", "Respostas 429 (rate limit) do LLM")
+
+
+class RateLimitedError(Exception):
+    """O provedor de LLM respondeu 429. `retry_after` em segundos, se informado."""
+
+    def __init__(self, message: str = "rate limited", retry_after: float | None = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class StaleNewsError(Exception):
+    """A notícia esperou mais que o orçamento de frescor por um slot de LLM."""
+
+
+def news_timestamp(news: dict) -> float:
+    """Horário da notícia (Unix) a partir do ISO do payload; agora, se ausente ou inválido."""
+    try:
+        return datetime.fromisoformat(news["timestamp"].replace("Z", "+00:00")).timestamp()
+    except (KeyError, TypeError, ValueError, AttributeError):
+        return time.time()
+
+
+class AdaptiveLimiter:
+    """
+    Limite de concorrência adaptativo (AIMD) na frente de uma fila de prioridade.
+
+    - Aumento aditivo: cada chamada rápida soma 1/limite (≈ +1 slot a cada
+      rodada completa de chamadas bem-sucedidas).
+    - Redução multiplicativa: um 429 ou uma latência acima de
+      `latency_tolerance` × a latência de referência (a menor observada
+      recentemente) multiplica o limite por `backoff`, no máximo uma vez por
+      rodada para não desabar com as respostas da mesma rajada.
+
+    A fila é ordenada por peso do canal e recência (horário da notícia): com
+    decaimento exponencial de constante `freshness`, a prioridade
+    peso × exp(-idade/freshness) ordena igual à chave estática
+    log(peso) + horário/freshness, então o heap não precisa ser refeito.
+
+    Notícias que esperam mais que `freshness` segundos por um slot são
+    descartadas (StaleNewsError) em vez de consumir LLM. O prazo conta de
+    quando a notícia entra na fila, não do horário em que foi postada:
+    mensagens recuperadas pelo backfill ou reenfileiradas pelo spool depois
+    de uma queda são antigas por definição e não podem ser perdidas por isso.
+    Com freshness=0 nada é descartado e a fila fica só por peso e recência.
+    """
+
+    def __init__(
+        self,
+        initial: int = LLM_CONCURRENCY_INITIAL,
+        min_limit: int = LLM_CONCURRENCY_MIN,
+        max_limit: int = LLM_CONCURRENCY_MAX,
+        latency_tolerance: float = LLM_LATENCY_TOLERANCE,
+        freshness: float = NEWS_FRESHNESS_BUDGET,
+        channel_weights: dict[str, float] | None = None,
+        backoff: float = 0.5,
+        max_retries: int = 2,
+        clock=time.time,
+    ):
+        self.min_limit = max(1, min_limit)
+        self.max_limit = max(self.min_limit, max_limit)
+        self.limit = float(min(max(initial, self.min_limit), self.max_limit))
+        self.latency_tolerance = latency_tolerance
+        self.freshness = freshness
+        self.channel_weights = {
+            k.lstrip("@").lower(): v
+            for k, v in (CHANNEL_WEIGHTS if channel_weights is None else channel_weights).items()
+        }
+        self.backoff = backoff
+        self.max_retries = max_retries
+        self.clock = clock
+
+        self.inflight = 0
+        self._queue: list[tuple[float, int, asyncio.Future, float]] = []   # (chave, seq, future, notícia_ts)
+        self._seq = itertools.count()
+        self._paused_until = 0.0
+        self._resume: asyncio.TimerHandle | None = None
+        self._last_decrease = 0.0
+        self._baseline: float | None = None     # latência de referência (mínimo com esquecimento lento)
+
+        _LIMIT.set_function(lambda: self.limit)
+        _INFLIGHT.set_function(lambda: self.inflight)
+        _QUEUE.set_function(lambda: len(self._queue))
+
+    def __len__(self) -> int:
+        return len(self._queue)
+
+    # ── API ─────────────────────────────────────────────────────────────────────
+    async def run(self, fn, news: dict | list[dict]):
+        """
+        Executa `fn()` (corrotina sem argumentos) quando houver slot para a
+        notícia (ou lote: vale a notícia mais prioritária). Em 429, reduz o
+        limite, respeita o retry-after e tenta de novo até `max_retries`.
+        Levanta StaleNewsError se a notícia esperar na fila mais que `freshness`.
+        """
+        items = news if isinstance(news, list) else [news]
+        ts = max(news_timestamp(n) for n in items)
+        weight = max(self._weight(n) for n in items)
+        key = -(math.log(weight) + ts / self.freshness) if self.freshness > 0 else -ts
+        entered = self.clock()   # o orçamento de frescor conta daqui, retries inclusive
+
+        for attempt in range(self.max_retries + 1):
+            await self._acquire(key, entered)
+            started = time.perf_counter()
+            try:
+                result = await fn()
+            except RateLimitedError as e:
+                self._release()
+                self._on_rate_limited(e.retry_after)
+                if attempt == self.max_retries:
+                    raise
+                continue
+            except BaseException:
+                self._release()
+                raise
+            self._release()
+            self._on_success(time.perf_counter() - started)
+            return result
+
+    # ── Fila ────────────────────────────────────────────────────────────────────
+    async def _acquire(self, key: float, entered: float):
+        if self._is_stale(entered):
+            _SHED.inc()
+            raise StaleNewsError(f"notícia há {self.clock() - entered:.0f}s na fila (orçamento {self.freshness:.0f}s)")
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        heapq.heappush(self._queue, (key, next(self._seq), future, entered))
+        if self.freshness > 0:
+            # garante uma varredura quando a notícia vencer, mesmo sem outros eventos
+            loop.call_later(max(0.0, entered + self.freshness - self.clock()) + 0.01, self._pump)
+        waited = time.perf_counter()
+        self._pump()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled() and future.exception() is None:
+                self._release()  # o slot chegou junto com o cancelamento
+            raise
+        finally:
+            _QUEUE_WAIT.observe(time.perf_counter() - waited)
+
+    def _release(self):
+        self.inflight -= 1
+        self._pump()
+
+    def _pump(self):
+        """Libera a fila até o limite atual, descartando as notícias vencidas."""
+        if self.freshness > 0 and self._queue:
+            self._shed_stale()
+
+        now = time.monotonic()
+        if now < self._paused_until:
+            if self._resume is None:
+                self._resume = asyncio.get_running_loop().call_later(self._paused_until - now, self._unpause)
+            return
+
+        while self._queue and self.inflight < int(self.limit):
+            _, _, future, _ = heapq.heappop(self._queue)
+            if future.done():
+                continue  # quem esperava foi cancelado
+            self.inflight += 1
+            future.set_result(None)
+
+    def _unpause(self):
+        self._resume = None
+        self._pump()
+
+    def _shed_stale(self):
+        keep = []
+        for item in self._queue:
+            future, entered = item[2], item[3]
+            if future.done():
+                continue
+            if self._is_stale(entered):
+                _SHED.inc()
+                future.set_exception(StaleNewsError(f"notícia venceu na fila ({self.freshness:.0f}s)"))
+            else:
+                keep.append(item)
+        if len(keep) != len(self._queue):
+            heapq.heapify(keep)
+            self._queue = keep
+
+    def _is_stale(self, entered: float) -> bool:
+        return self.freshness > 0 and self.clock() - entered > self.freshness
+
+    def _weight(self, news: dict) -> float:
+        return max(1e-6, self.channel_weights.get(str(news.get("channel", "")).lstrip("@").lower(), 1.0))
+
+    # ── AIMD ────────────────────────────────────────────────────────────────────
+    def _on_success(self, latency: float):
+        if self._baseline is None or latency < self._baseline:
+            self._baseline = latency
+        else:
+            # esquece devagar: a latência "sem carga" do provedor também muda
+            self._baseline += (latency - self._baseline) * 0.01
+
+        if latency > self._baseline * self.latency_tolerance:
+            self._decrease(latency)
+        else:
+            self.limit = min(self.max_limit, self.limit + 1.0 / self.limit)
+            self._pump()
+
+    def _on_rate_limited(self, retry_after: float | None):
+        _RATE_LIMITED.inc()
+        pause = retry_after if retry_after is not None else 1.0
+        self._paused_until = max(self._paused_until, time.monotonic() + pause)
+        if self._decrease(self._baseline or 1.0):
+            logger.warning(
+                f"🐢 LLM com rate limit — concorrência reduzida para {int(self.limit)}, "
+                f"pausa de {pause:.1f}s"
+            )
+
+    def _decrease(self, latency: float) -> bool:
+        now = time.monotonic()
+        # uma redução por rodada: as respostas lentas (ou 429) da mesma rajada contam uma vez só
+        if now - self._last_decrease < latency:
+            return False
+        self._last_decrease = now
+        self.limit = max(float(self.min_limit), self.limit * self.backoff)
+        return True
@@ -0,0 +1,122 @@
+import heapq
+import math
+import re
+import threading
+import unicodedata
+from collections import Counter, defaultdict
+from polymarket.client import Market
+
+# Palavras muito comuns (PT + EN) que não ajudam a distinguir mercados
+_STOPWORDS = frozenset("""
+a o e de da do das dos em no na nos nas um uma uns umas para por com sem que se
+ao aos as os ou mais menos foi ser sua seu suas seus como mas pelo pela pelos
+the of and to in on at for by with from is are was be will or an as it this that
+than then before after into over under about its their has have had not no yes
+""".split())
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text: str) -> list[str]:
+    """
+    Normaliza e quebra o texto em termos: minúsculas, sem acentos,
+    sem stopwords e sem termos de 1 caractere.
+    """
+    text = unicodedata.normalize("NFKD", text.lower())
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    return [
+        t for t in _TOKEN_RE.findall(text)
+        if len(t) > 1 and t not in _STOPWORDS
+    ]
+
+
+class MarketIndex:
+    """
+    Índice invertido BM25 sobre question + description dos mercados.
+
+    Serve para pré-selecionar localmente os mercados candidatos de cada
+    notícia antes de chamar o LLM. A atualização é incremental: só os
+    mercados novos, alterados ou removidos mexem nas posting lists.
+
+    Thread-safe: a busca roda dentro de asyncio.to_thread enquanto o
+    catálogo pode ser renovado no event loop.
+    """
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self._postings: dict[str, dict[str, int]] = defaultdict(dict)  # termo → {id: tf}
+        self._doc_len: dict[str, int] = {}
+        self._doc_text: dict[str, str] = {}
+        self._total_len = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._doc_len)
+
+    def update(self, markets: list[Market]) -> None:
+        """Sincroniza o índice com o catálogo atual (add/update/remove por diferença)."""
+        current = {m.condition_id: f"{m.question}\n{m.description}" for m in markets}
+
+        with self._lock:
+            self._sync(current)
+
+    def _sync(self, current: dict[str, str]) -> None:
+        for cid in [cid for cid in self._doc_len if cid not in current]:
+            self._remove(cid)
+
+        for cid, text in current.items():
+            if self._doc_text.get(cid) == text:
+                continue
+            if cid in self._doc_len:
+                self._remove(cid)
+            self._add(cid, text)
+
+    def search(self, text: str, top_k: int, min_score: float = 0.0) -> list[tuple[str, float]]:
+        """Retorna até top_k pares (condition_id, score) com score >= min_score."""
+        with self._lock:
+            return self._search(tokenize(text), top_k, min_score)
+
+    def _search(self, terms: list[str], top_k: int, min_score: float) -> list[tuple[str, float]]:
+        n_docs = len(self._doc_len)
+        if not n_docs or top_k <= 0:
+            return []
+
+        avg_len = self._total_len / n_docs
+        scores: dict[str, float] = defaultdict(float)
+
+        for term in set(terms):
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+            df = len(postings)
+            idf = math.log(1 + (n_docs - df + 0.5) / (df + 0.5))
+            for cid, tf in postings.items():
+                norm = self.k1 * (1 - self.b + self.b * self._doc_len[cid] / avg_len)
+                scores[cid] += idf * tf * (self.k1 + 1) / (tf + norm)
+
+        return heapq.nlargest(
+            top_k,
+            ((cid, s) for cid, s in scores.items() if s >= min_score),
+            key=lambda x: x[1],
+        )
+
+    def _add(self, cid: str, text: str) -> None:
+        terms = Counter(tokenize(text))
+        for term, tf in terms.items():
+            self._postings[term][cid] = tf
+        length = sum(terms.values())
+        self._doc_len[cid] = length
+        self._doc_text[cid] = text
+        self._total_len += length
+
+    def _remove(self, cid: str) -> None:
+        for term in set(tokenize(self._doc_text[cid])):
+            postings = self._postings.get(term)
+            if postings is None:
+                continue
+            postings.pop(cid, None)
+            if not postings:
+                del self._postings[term]
+        self._total_len -= self._doc_len.pop(cid)
+        del self._doc_text[cid]
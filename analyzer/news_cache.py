@@ -0,0 +1,269 @@
+import asyncio
+import dataclasses
+import hashlib
+import itertools
+import logging
+import random
+import re
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+
+from analyzer.ai_analyzer import Opportunity
+from analyzer.market_index import tokenize
+from polymarket.client import Market
+from config import (
+    MIN_EDGE_THRESHOLD,
+    NEWS_DEDUP_WINDOW, NEWS_DEDUP_MIN_SIMILARITY,
+    ANALYSIS_CACHE_SIZE, ANALYSIS_CACHE_TTL, ANALYSIS_CACHE_PRICE_TOLERANCE,
+)
+
+logger = logging.getLogger(__name__)
+
+_URL_RE = re.compile(r"https?://\S+|t\.me/\S+|@\w+")
+
+
+_NUM_PERM = 32          # hashes da assinatura MinHash
+_BAND_ROWS = 4          # 8 faixas de 4 → candidato a partir de ~0.6 de similaridade
+_PRIME = (1 << 61) - 1
+_rng = random.Random(1337)
+_PERMS = [(_rng.randrange(1, _PRIME), _rng.randrange(0, _PRIME)) for _ in range(_NUM_PERM)]
+
+
+def shingles(text: str) -> frozenset[str]:
+    """Termos normalizados do texto (sem URLs, menções, acentos e stopwords)."""
+    return frozenset(tokenize(_URL_RE.sub(" ", text)))
+
+
+def minhash(terms: frozenset[str]) -> tuple[int, ...]:
+    """Assinatura MinHash: a fração de posições iguais estima a similaridade de Jaccard."""
+    hashes = [int.from_bytes(hashlib.blake2b(t.encode(), digest_size=8).digest(), "big") for t in terms]
+    return tuple(min((a * h + b) % _PRIME for h in hashes) for a, b in _PERMS)
+
+
+class NearDuplicateDetector:
+    """
+    Detecta textos quase duplicados numa janela deslizante de tempo.
+
+    Usa MinHash + LSH por faixas: só textos que coincidem em pelo menos uma
+    faixa da assinatura viram candidatos, e a similaridade de Jaccard dos
+    termos é conferida de forma exata. Em manchetes curtas isso é bem mais
+    estável que SimHash, onde um "(via @canal)" já mexe em muitos bits.
+    """
+
+    def __init__(self, min_similarity: float = NEWS_DEDUP_MIN_SIMILARITY, window: float = NEWS_DEDUP_WINDOW):
+        self.min_similarity = min_similarity
+        self.window = window
+        self._entries: deque[tuple[float, int]] = deque()                 # (ts, key)
+        self._index: dict[tuple[int, tuple[int, ...]], set[int]] = {}      # (faixa, valores) → keys
+        self._items: dict[int, tuple[frozenset[str], list]] = {}           # key → (termos, faixas)
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def find(self, terms: frozenset[str], now: float | None = None) -> int | None:
+        """Key do item mais parecido dentro da janela e acima da similaridade mínima, ou None."""
+        self._expire(now or time.time())
+        if not terms:
+            return None
+
+        candidates: set[int] = set()
+        for band in self._bands(terms):
+            candidates |= self._index.get(band, set())
+
+        best, best_sim = None, self.min_similarity
+        for key in candidates:
+            other = self._items[key][0]
+            sim = len(terms & other) / len(terms | other)
+            if sim >= best_sim:
+                best, best_sim = key, sim
+        return best
+
+    def add(self, terms: frozenset[str], key: int, now: float | None = None):
+        if not terms:
+            return
+        bands = self._bands(terms)
+        self._entries.append((now or time.time(), key))
+        self._items[key] = (terms, bands)
+        for band in bands:
+            self._index.setdefault(band, set()).add(key)
+
+    @staticmethod
+    def _bands(terms: frozenset[str]) -> list:
+        sig = minhash(terms)
+        return [(i, sig[i:i + _BAND_ROWS]) for i in range(0, _NUM_PERM, _BAND_ROWS)]
+
+    def _expire(self, now: float):
+        while self._entries and now - self._entries[0][0] > self.window:
+            _, key = self._entries.popleft()
+            _, bands = self._items.pop(key)
+            for band in bands:
+                keys = self._index.get(band)
+                if keys is not None:
+                    keys.discard(key)
+                    if not keys:
+                        del self._index[band]
+
+
+@dataclass
+class _CacheEntry:
+    future: asyncio.Future
+    stored_at: float = field(default_factory=time.time)
+    candidates: list[str] = field(default_factory=list)                  # pré-seleção, por score
+    prices: dict[str, tuple[float, float]] = field(default_factory=dict)  # cid → (yes, no) na análise
+
+
+class NewsAnalysisCache:
+    """
+    Reaproveita a análise do LLM para notícias quase duplicadas.
+
+    A mesma manchete costuma ser repostada por vários canais em segundos.
+    Um hit no detector (MinHash + janela deslizante) devolve o resultado já
+    calculado — ou espera a análise que ainda está em voo —, desde que os
+    preços dos mercados envolvidos não tenham mudado mais que
+    `price_tolerance`. Os resultados ficam num LRU com TTL.
+
+    Manchetes curtas e parecidas ("BC da Colômbia corta juros" vs "BC do
+    Chile corta juros") têm alta similaridade de termos; por isso, quando a pré-seleção
+    local é informada, o hit também exige o mesmo mercado mais provável e
+    boa sobreposição entre os candidatos das duas notícias.
+
+    Contadores: hits (chamadas ao LLM evitadas), misses e stale (hit
+    descartado porque o mercado andou).
+    """
+
+    def __init__(
+        self,
+        detector: NearDuplicateDetector | None = None,
+        max_entries: int = ANALYSIS_CACHE_SIZE,
+        ttl: float = ANALYSIS_CACHE_TTL,
+        price_tolerance: float = ANALYSIS_CACHE_PRICE_TOLERANCE,
+        clock=time.time,
+    ):
+        self.clock = clock  # injetável: o replay usa o horário gravado das notícias
+        self.detector = detector or NearDuplicateDetector()
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.price_tolerance = price_tolerance
+        self._entries: OrderedDict[int, _CacheEntry] = OrderedDict()
+        self._keys = itertools.count()
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+
+    def stats(self) -> dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "stale": self.stale, "size": len(self._entries)}
+
+    async def get_or_analyze(self, news: dict, markets: list[Market], analyze,
+                             candidates: list[Market] | None = None) -> list[Opportunity]:
+        """
+        Retorna a análise da notícia, chamando `analyze()` (corrotina sem
+        argumentos) só quando não há uma análise reaproveitável.
+        `candidates` é a pré-seleção local da notícia, em ordem de score.
+        """
+        candidate_ids = [m.condition_id for m in candidates or []]
+        now = self.clock()
+        terms = shingles(news["text"])
+        market_by_id = {m.condition_id: m for m in markets}
+
+        key = self.detector.find(terms, now)
+        entry = self._get(key, now) if key is not None else None
+        if entry is not None:
+            try:
+                cached = await asyncio.shield(entry.future)
+            except asyncio.CancelledError:
+                if not entry.future.cancelled():
+                    raise  # quem foi cancelado é esta chamada, não a análise original
+                cached = None
+            except Exception:
+                cached = None  # a análise original falhou: segue com a própria
+
+            if cached is not None and self._still_valid(entry, candidate_ids, market_by_id):
+                self.hits += 1
+                logger.info(
+                    f"♻️  Notícia quase duplicada — reaproveitando análise "
+                    f"(hits={self.hits}, misses={self.misses})"
+                )
+                return self._rebind(cached, news, market_by_id)
+            if cached is not None:
+                self.stale += 1
+
+        self.misses += 1
+        key = next(self._keys)
+        entry = _CacheEntry(
+            future=asyncio.get_running_loop().create_future(),
+            stored_at=now,
+            candidates=candidate_ids,
+            prices={m.condition_id: (m.yes_price, m.no_price) for m in candidates or []},
+        )
+        self._put(key, entry)
+        self.detector.add(terms, key, now)
+
+        try:
+            result = await analyze()
+        except asyncio.CancelledError:
+            self._entries.pop(key, None)
+            entry.future.cancel()
+            raise
+        except Exception as e:
+            self._entries.pop(key, None)
+            entry.future.set_exception(e)
+            entry.future.exception()  # marca como lida se ninguém estiver esperando
+            raise
+
+        for opp in result:
+            entry.prices.setdefault(opp.market.condition_id, (opp.market.yes_price, opp.market.no_price))
+        entry.future.set_result(result)
+        return result
+
+    def _get(self, key: int, now: float) -> _CacheEntry | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if now - entry.stored_at > self.ttl:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def _put(self, key: int, entry: _CacheEntry):
+        self._entries[key] = entry
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _still_valid(self, entry: _CacheEntry, candidate_ids: list[str],
+                     market_by_id: dict[str, Market]) -> bool:
+        """Mesmos candidatos e o snapshot não mudou materialmente para os mercados da análise?"""
+        if entry.candidates or candidate_ids:
+            if not entry.candidates or not candidate_ids or entry.candidates[0] != candidate_ids[0]:
+                return False
+            a, b = set(entry.candidates), set(candidate_ids)
+            if len(a & b) / len(a | b) < 0.5:
+                return False
+
+        for cid, (yes, no) in entry.prices.items():
+            m = market_by_id.get(cid)
+            if m is None:
+                return False
+            if abs(m.yes_price - yes) > self.price_tolerance or abs(m.no_price - no) > self.price_tolerance:
+                return False
+        return True
+
+    @staticmethod
+    def _rebind(opportunities: list[Opportunity], news: dict, market_by_id: dict[str, Market]) -> list[Opportunity]:
+        """
+        Reatribui as oportunidades à notícia nova, com o preço do snapshot atual.
+        Só ficam as que ainda têm edge >= threshold na direção do alerta.
+        """
+        out = []
+        for opp in opportunities:
+            market = market_by_id.get(opp.market.condition_id, opp.market)
+            price = market.yes_price if opp.direction == "YES" else market.no_price
+            edge = opp.true_prob - price
+            if edge < MIN_EDGE_THRESHOLD:
+                continue
+            out.append(dataclasses.replace(
+                opp, market=market, current_price=price, edge=edge,
+                news_text=news["text"], news_channel=news["channel"],
+            ))
+        return out
@@ -0,0 +1,126 @@
+"""
+Prompt do LLM: bloco fixo de instruções, tabela compacta de mercados e notícias.
+
+A ordem é pensada para o cache de prompt dos provedores (prefixo idêntico),
+mas só as instruções são um prefixo estável: a tabela de mercados muda com
+os candidatos de cada notícia e com cada tick de preço, então na prática
+ela já não bate entre chamadas. Por isso não há breakpoint de cache depois
+dela; o que se ganha com a tabela compacta é tamanho, não cache.
+
+Os mercados vão numa tabela com cabeçalho único em vez de JSON indentado,
+com IDs curtos (m1, m2, ...) no lugar do condition_id de 66 caracteres; o
+LLM responde com o ID curto e a MarketTable traduz de volta.
+"""
+
+from dataclasses import dataclass, field
+
+from polymarket.client import Market
+from config import MIN_EDGE_THRESHOLD, PROMPT_MARKET_TOKENS
+
+INSTRUCTIONS = f"""Você é um trader quantitativo especializado em mercados de previsão (Polymarket).
+
+Abaixo estão os mercados ativos e uma ou mais notícias, cada uma com seu índice entre colchetes.
+
+SUA TAREFA, para CADA notícia separadamente:
+1. Identifique APENAS os mercados que são diretamente afetados por essa notícia.
+2. Para cada mercado afetado, estime a probabilidade REAL do evento (considerando a notícia).
+3. Calcule o edge: (true_prob - yes) para YES, ou (true_prob - no) para NO.
+4. Retorne TODOS os mercados diretamente afetados, mesmo com edge abaixo de {MIN_EDGE_THRESHOLD}: o alerta só sai
+   com edge absoluto >= {MIN_EDGE_THRESHOLD} (ou seja, {MIN_EDGE_THRESHOLD * 100:.0f}%), mas a estimativa é guardada e reavaliada quando o preço andar.
+
+Responda EXCLUSIVAMENTE em JSON válido, sem texto extra:
+{{
+  "opportunities": [
+    {{
+      "news_index": índice da notícia que gerou a oportunidade,
+      "market_id": "id do mercado na tabela (ex.: m3)",
+      "direction": "YES" ou "NO",
+      "true_prob": 0.XX,
+      "edge": 0.XX,
+      "reasoning": "explicação curta em português de por que a notícia afeta esse mercado"
+    }}
+  ]
+}}
+
+Se nenhum mercado for afetado, retorne: {{"opportunities": []}}"""
+
+MARKETS_HEADER = ("MERCADOS ATIVOS NA POLYMARKET (yes/no = preço = probabilidade implícita; "
+                  "vol = volume 24h em US$):\nid|yes|no|vol|pergunta")
+NEWS_HEADER = "NOTÍCIAS RECEBIDAS:"
+
+
+def estimate_tokens(text: str) -> int:
+    """Aproximação grosseira (~4 caracteres por token), suficiente para orçamento e comparação."""
+    return max(1, len(text) // 4)
+
+
+def _price(p: float) -> str:
+    return f"{p:.3f}".rstrip("0").rstrip(".") or "0"
+
+
+def _volume(v: float) -> str:
+    if v >= 1e6:
+        return f"{v / 1e6:.1f}M"
+    if v >= 1e3:
+        return f"{v / 1e3:.0f}k"
+    return f"{v:.0f}"
+
+
+def _row(short_id: str, m: Market) -> str:
+    question = " ".join(m.question.replace("|", "/").split())
+    return f"{short_id}|{_price(m.yes_price)}|{_price(m.no_price)}|{_volume(m.volume_24h)}|{question}"
+
+
+@dataclass
+class MarketTable:
+    """Bloco de mercados do prompt e a tradução dos IDs curtos de volta para os mercados."""
+    text: str
+    markets: list[Market]
+    dropped: int = 0                                       # cortados pelo orçamento de tokens
+    by_id: dict[str, Market] = field(default_factory=dict)  # ID curto e condition_id → Market
+
+    def resolve(self, items: list[dict]) -> list[dict]:
+        """Itens da resposta com market_id trocado pelo condition_id (vereditos, replay)."""
+        resolved = []
+        for item in items:
+            market = self.by_id.get(str(item.get("market_id")))
+            resolved.append({**item, "market_id": market.condition_id} if market else item)
+        return resolved
+
+
+def pack_markets(markets: list[Market], budget: int = PROMPT_MARKET_TOKENS) -> MarketTable:
+    """
+    Monta a tabela com o máximo de mercados que cabe em `budget` tokens, na
+    ordem recebida: a relevância do BM25 quando vem do preselect, o volume
+    24h quando a pré-seleção está desligada (o catálogo já vem por volume).
+    Estourado o orçamento, saem os últimos. budget <= 0 = sem limite.
+    """
+    ordered = list(markets)
+    lines = [MARKETS_HEADER]
+    used = estimate_tokens(MARKETS_HEADER)
+    included: list[Market] = []
+    by_id: dict[str, Market] = {}
+    for m in ordered:
+        short_id = f"m{len(included) + 1}"
+        row = _row(short_id, m)
+        cost = estimate_tokens(row) + 1
+        if budget > 0 and included and used + cost > budget:
+            break
+        lines.append(row)
+        used += cost
+        included.append(m)
+        by_id[short_id] = m
+        by_id[m.condition_id] = m
+    return MarketTable("\n".join(lines), included, len(ordered) - len(included), by_id)
+
+
+def news_block(news_list: list[dict]) -> str:
+    return "\n\n".join(
+        f"[{i}] Canal: {n['channel']} | Horário: {n['timestamp']}\nTexto: {n['text']}"
+        for i, n in enumerate(news_list)
+    )
+
+
+def build_prompt(news_list: list[dict], table: MarketTable) -> str:
+    """Instruções, mercados e notícias, nessa ordem (prefixo estável para o cache de prompt)."""
+    return f"{INSTRUCTIONS}\n\n{table.text}\n\n{NEWS_HEADER}\n{news_block(news_list)}\n"
@@ -0,0 +1,202 @@
+"""
+Provedores de LLM atrás do AIAnalyzer.
+
+Todos expõem a mesma interface: `stream(prompt, max_tokens, cancel)` gera os
+pedaços de texto da resposta. Mesmo a análise sem streaming consome a
+resposta assim, para que o roteador consiga cancelar de verdade a chamada
+que perdeu a corrida (fechar o stream fecha a conexão e para a geração).
+
+Os SDKs são importados no primeiro uso, como no boot rápido.
+"""
+
+import logging
+import threading
+
+from analyzer.limiter import RateLimitedError
+from core import metrics
+from config import ANTHROPIC_API_KEY, OPENAI_API_KEY, LLM_PROVIDERS
+
+logger = logging.getLogger(__name__)
+
+ANTHROPIC_MODEL = "claude-haiku-4-5-20251001"
+OPENAI_MODEL = "gpt-4o-mini"
+
+_LLM_TOKENS = metrics.counter("llm_tokens_total", "Tokens informados no usage das respostas do LLM",
+                              ("kind", "provider"))
+
+
+def rate_limited_error(e: Exception) -> RateLimitedError | None:
+    """
+    429 (rate limit) e 529 (sobrecarga) dos SDKs (APIStatusError) viram
+    RateLimitedError: sinal de capacidade para o limiter. Verificado pelo
+    status_code para não importar o SDK só por causa do except.
+    """
+    if getattr(e, "status_code", None) not in (429, 529):
+        return None
+    headers = getattr(getattr(e, "response", None), "headers", None) or {}
+    retry_after = headers.get("retry-after")
+    try:
+        retry_after = float(retry_after) if retry_after else None
+    except ValueError:
+        retry_after = None
+    return RateLimitedError(str(e), retry_after)
+
+
+class CancelToken(threading.Event):
+    """
+    Event de cancelamento que também fecha na hora o que o provedor
+    registrou em on_cancel (o stream HTTP em voo): a chamada que perdeu a
+    corrida para de gerar sem esperar o próximo pedaço chegar para o loop
+    ver o set().
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._callbacks = []
+        self._callbacks_lock = threading.Lock()
+
+    def on_cancel(self, fn):
+        with self._callbacks_lock:
+            if not self.is_set():
+                self._callbacks.append(fn)
+                return
+        fn()   # já cancelado: fecha direto
+
+    def set(self):
+        with self._callbacks_lock:
+            super().set()
+            callbacks, self._callbacks = self._callbacks, []
+        for fn in callbacks:
+            try:
+                fn()
+            except Exception as e:
+                logger.debug(f"Erro ao fechar chamada cancelada: {e!r}")
+
+
+def _close_on_cancel(cancel: threading.Event | None, close):
+    if isinstance(cancel, CancelToken):
+        cancel.on_cancel(close)
+
+
+class LLMProvider:
+    """Interface comum: `name` (rótulo em métricas e logs) e `stream`."""
+
+    name = "llm"
+
+    def stream(self, prompt: str, max_tokens: int, cancel: threading.Event | None = None):
+        """Gera os pedaços de texto da resposta; para cedo se `cancel` for setado."""
+        raise NotImplementedError
+
+    def _count_usage(self, input_tokens: int, output_tokens: int):
+        _LLM_TOKENS.labels(kind="input", provider=self.name).inc(input_tokens or 0)
+        _LLM_TOKENS.labels(kind="output", provider=self.name).inc(output_tokens or 0)
+
+
+class AnthropicProvider(LLMProvider):
+    """
+    Claude via messages.stream. Sem retries no SDK: 429/529 sobem como
+    RateLimitedError para o roteador tentar outro provedor e o
+    AdaptiveLimiter reduzir a concorrência.
+    """
+
+    def __init__(self, model: str = ANTHROPIC_MODEL, client=None, name: str = ""):
+        self.model = model
+        self.name = name or f"anthropic:{model}"
+        self._client = client  # injetável: stub local em benchmarks e replay
+
+    @property
+    def client(self):
+        if self._client is None:
+            from anthropic import Anthropic
+            self._client = Anthropic(api_key=ANTHROPIC_API_KEY, max_retries=0)
+        return self._client
+
+    def stream(self, prompt: str, max_tokens: int, cancel: threading.Event | None = None):
+        try:
+            with self.client.messages.stream(
+                model=self.model,
+                max_tokens=max_tokens,
+                messages=[{"role": "user", "content": prompt}],
+            ) as stream:
+                _close_on_cancel(cancel, stream.close)
+                for text in stream.text_stream:
+                    yield text
+                    if cancel is not None and cancel.is_set():
+                        return
+                usage = getattr(stream.get_final_message(), "usage", None)
+                if usage is not None:
+                    self._count_usage(getattr(usage, "input_tokens", 0), getattr(usage, "output_tokens", 0))
+        except Exception as e:
+            limited = rate_limited_error(e)
+            if limited is not None:
+                raise limited from e
+            raise
+
+
+class OpenAIProvider(LLMProvider):
+    """Chat Completions da OpenAI com stream=True (OPENAI_API_KEY)."""
+
+    def __init__(self, model: str = OPENAI_MODEL, client=None, name: str = ""):
+        self.model = model
+        self.name = name or f"openai:{model}"
+        self._client = client
+
+    @property
+    def client(self):
+        if self._client is None:
+            from openai import OpenAI
+            self._client = OpenAI(api_key=OPENAI_API_KEY, max_retries=0)
+        return self._client
+
+    def stream(self, prompt: str, max_tokens: int, cancel: threading.Event | None = None):
+        try:
+            stream = self.client.chat.completions.create(
+                model=self.model,
+                max_tokens=max_tokens,
+                messages=[{"role": "user", "content": prompt}],
+                stream=True,
+                stream_options={"include_usage": True},
+            )
+            _close_on_cancel(cancel, stream.close)
+            try:
+                for chunk in stream:
+                    if chunk.choices and chunk.choices[0].delta.content:
+                        yield chunk.choices[0].delta.content
+                        if cancel is not None and cancel.is_set():
+                            return
+                    if getattr(chunk, "usage", None) is not None:
+                        self._count_usage(chunk.usage.prompt_tokens, chunk.usage.completion_tokens)
+            finally:
+                stream.close()
+        except Exception as e:
+            limited = rate_limited_error(e)
+            if limited is not None:
+                raise limited from e
+            raise
+
+
+_KINDS = {"anthropic": AnthropicProvider, "openai": OpenAIProvider}
+
+
+def build_providers(specs: list[str] | None = None, anthropic_client=None) -> list[LLMProvider]:
+    """
+    Provedores na ordem de preferência a partir de specs "tipo[:modelo]"
+    (LLM_PROVIDERS). Sem specs: Claude e, com OPENAI_API_KEY, a OpenAI como
+    segunda opção. Com `anthropic_client` (stub local), só ele.
+    """
+    if anthropic_client is not None:
+        return [AnthropicProvider(client=anthropic_client)]
+
+    specs = specs if specs is not None else LLM_PROVIDERS
+    if not specs:
+        specs = ["anthropic", "openai"] if OPENAI_API_KEY else ["anthropic"]
+
+    providers = []
+    for spec in specs:
+        kind, _, model = spec.partition(":")
+        cls = _KINDS.get(kind.strip().lower())
+        if cls is None:
+            logger.error(f"Provedor de LLM desconhecido em LLM_PROVIDERS: {spec!r}")
+            continue
+        providers.append(cls(model.strip()) if model.strip() else cls())
+    return providers or [AnthropicProvider()]
@@ -0,0 +1,264 @@
+"""
+Filtro local de relevância antes do LLM.
+
+A maioria das mensagens dos canais (propaganda, conversa, notícia sem
+mercado) volta do Claude com {"opportunities": []}. Este módulo treina, a
+partir do histórico de vereditos que o próprio bot grava, uma regressão
+logística sobre n-gramas com hashing e descarta localmente, em
+microssegundos, as mensagens com baixa chance de mover algum mercado.
+
+Treino:
+  python -m analyzer.relevance --log data/verdicts.jsonl --out data/relevance.npz
+"""
+
+import argparse
+import json
+import logging
+import math
+import os
+import random
+import time
+import zlib
+
+import numpy as np
+
+from analyzer.market_index import tokenize
+from core import metrics
+from config import (
+    RELEVANCE_MODEL_PATH, RELEVANCE_RECALL, RELEVANCE_EXPLORE, VERDICT_LOG_PATH,
+)
+
+logger = logging.getLogger(__name__)
+
+_GATE = metrics.counter("relevance_gate_total", "Decisões do filtro de relevância (pass, skip, explore)", ("result",))
+_PASS, _SKIP, _EXPLORE = (_GATE.labels(result=r) for r in ("pass", "skip", "explore"))
+_SCORE = metrics.histogram("relevance_score_seconds", "Tempo de features + predição do filtro de relevância",
+                           buckets=(0.00001, 0.00005, 0.0001, 0.0005, 0.001, 0.005))
+
+DIM = 1 << 18   # buckets do hashing de features
+
+
+def features(text: str, channel: str = "") -> np.ndarray:
+    """
+    Índices das features da mensagem: unigramas e bigramas normalizados
+    (mesmo tokenize da pré-seleção) e o canal, com hashing em DIM buckets.
+    crc32 em vez de hash(): estável entre processos, o modelo salvo continua valendo.
+    """
+    terms = tokenize(text)
+    grams = terms + [f"{a} {b}" for a, b in zip(terms, terms[1:])]
+    if channel:
+        grams.append(f"#canal:{channel.lstrip('@').lower()}")
+    return np.fromiter(
+        {zlib.crc32(g.encode()) & (DIM - 1) for g in grams}, dtype=np.int64
+    )
+
+
+class RelevanceModel:
+    """
+    Regressão logística esparsa (SGD) sobre as features com hashing.
+
+    Além dos pesos, guarda os scores dos positivos do conjunto de validação:
+    o limiar para um alvo de recall é o quantil correspondente desses scores,
+    então dá para ajustar RELEVANCE_RECALL sem treinar de novo.
+    """
+
+    def __init__(self, weights: np.ndarray | None = None, bias: float = 0.0,
+                 positive_scores: np.ndarray | None = None):
+        self.weights = weights if weights is not None else np.zeros(DIM, dtype=np.float32)
+        self.bias = bias
+        self.positive_scores = np.sort(positive_scores) if positive_scores is not None else np.zeros(0)
+
+    def score(self, idx: np.ndarray) -> float:
+        """Logit (antes da sigmoide) das features dadas."""
+        return float(self.weights[idx].sum()) + self.bias
+
+    def threshold(self, recall: float) -> float:
+        """Maior logit que ainda deixa passar `recall` dos positivos da validação."""
+        if not len(self.positive_scores):
+            return -math.inf
+        k = int(math.floor((1.0 - recall) * len(self.positive_scores)))
+        return float(self.positive_scores[min(k, len(self.positive_scores) - 1)])
+
+    def fit(self, samples: list[tuple[np.ndarray, int]], epochs: int = 5,
+            lr: float = 0.1, l2: float = 1e-6, seed: int = 0):
+        """SGD com as classes balanceadas (positivos costumam ser minoria)."""
+        positives = sum(label for _, label in samples)
+        if not samples or positives in (0, len(samples)):
+            raise ValueError("o treino precisa de exemplos relevantes e irrelevantes")
+        class_weight = {1: len(samples) / (2 * positives), 0: len(samples) / (2 * (len(samples) - positives))}
+
+        rng = random.Random(seed)
+        order = list(range(len(samples)))
+        w = self.weights
+        for epoch in range(epochs):
+            rng.shuffle(order)
+            step = lr / (1 + epoch)
+            for i in order:
+                idx, label = samples[i]
+                z = float(w[idx].sum()) + self.bias
+                p = 1.0 / (1.0 + math.exp(-max(-30.0, min(30.0, z))))
+                g = (p - label) * class_weight[label] * step
+                w[idx] -= g + l2 * w[idx]
+                self.bias -= g
+
+    def calibrate(self, samples: list[tuple[np.ndarray, int]]):
+        """Guarda os scores dos positivos (validação) usados por threshold()."""
+        self.positive_scores = np.sort(np.array(
+            [self.score(idx) for idx, label in samples if label], dtype=np.float64
+        ))
+
+    def save(self, path: str):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.tmp.npz"
+        np.savez_compressed(tmp, weights=self.weights, bias=np.array([self.bias]),
+                            positive_scores=self.positive_scores)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str) -> "RelevanceModel":
+        with np.load(path) as data:
+            return cls(data["weights"].astype(np.float32), float(data["bias"][0]), data["positive_scores"])
+
+
+class RelevanceGate:
+    """
+    Decide se a notícia vale uma chamada ao LLM.
+
+    Sem modelo (arquivo ausente ou path vazio) deixa tudo passar. Uma fração
+    `explore` das mensagens reprovadas segue para o LLM mesmo assim: sem
+    isso, o histórico de vereditos só teria o que o filtro já aprova e os
+    próximos treinos perderiam os falsos negativos.
+    """
+
+    def __init__(self, model: RelevanceModel | None = None, recall: float = RELEVANCE_RECALL,
+                 explore: float = RELEVANCE_EXPLORE, seed: int | None = None):
+        self.model = model
+        self.recall = recall
+        self.explore = explore
+        self._threshold = model.threshold(recall) if model is not None else -math.inf
+        self._rng = random.Random(seed)
+        self.passed = self.skipped = 0
+
+    @classmethod
+    def from_path(cls, path: str = RELEVANCE_MODEL_PATH, **kwargs) -> "RelevanceGate":
+        model = None
+        if path and os.path.exists(path):
+            try:
+                model = RelevanceModel.load(path)
+                logger.info(f"🧮 Filtro de relevância carregado de {path} (recall alvo {kwargs.get('recall', RELEVANCE_RECALL):.0%})")
+            except (OSError, KeyError, ValueError) as e:
+                logger.error(f"Erro ao carregar o filtro de relevância ({path}): {e}")
+        return cls(model, **kwargs)
+
+    def should_analyze(self, news: dict) -> bool:
+        if self.model is None:
+            return True
+        started = time.perf_counter()
+        score = self.model.score(features(news["text"], news.get("channel", "")))
+        _SCORE.observe(time.perf_counter() - started)
+
+        if score >= self._threshold:
+            self.passed += 1
+            _PASS.inc()
+            return True
+        if self.explore > 0 and self._rng.random() < self.explore:
+            self.passed += 1
+            _EXPLORE.inc()
+            return True
+        self.skipped += 1
+        _SKIP.inc()
+        return False
+
+    def stats(self) -> dict:
+        return {"passed": self.passed, "skipped": self.skipped}
+
+
+class VerdictLog:
+    """
+    Histórico de vereditos do LLM em JSONL ({"ts", "text", "channel",
+    "relevant"}), ligado em AIAnalyzer.on_verdict. `relevant` = o LLM apontou
+    algum mercado afetado. É o conjunto de treino do filtro.
+    """
+
+    def __init__(self, path: str = VERDICT_LOG_PATH):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.path = path
+        self._file = open(path, "a", encoding="utf-8", buffering=1)
+
+    def record(self, news: dict, items: list[dict], opportunities):
+        try:
+            self._file.write(json.dumps({
+                "ts": time.time(),
+                "text": news.get("text", ""),
+                "channel": news.get("channel", ""),
+                "relevant": bool(items),
+            }, ensure_ascii=False) + "\n")
+        except (OSError, TypeError, ValueError) as e:
+            logger.error(f"Erro ao gravar veredito: {e}")
+
+    def close(self):
+        self._file.close()
+
+
+def load_verdicts(path: str) -> list[tuple[str, str, int]]:
+    """
+    (texto, canal, rótulo) de um VerdictLog ou de um verdicts.jsonl do
+    ReplayRecorder ({"news": {...}, "items": [...]}).
+    """
+    rows = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                r = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if "news" in r:
+                rows.append((r["news"].get("text") or "", r["news"].get("channel") or "", int(bool(r.get("items")))))
+            elif "text" in r:
+                rows.append((r["text"], r.get("channel", ""), int(bool(r.get("relevant")))))
+    return rows
+
+
+def train(rows: list[tuple[str, str, int]], holdout: float = 0.2, epochs: int = 5,
+          seed: int = 0) -> tuple[RelevanceModel, list[tuple[np.ndarray, int]]]:
+    """Treina com (1 - holdout) das linhas e calibra o limiar no restante."""
+    samples = [(features(text, channel), label) for text, channel, label in rows]
+    random.Random(seed).shuffle(samples)
+    cut = int(len(samples) * (1 - holdout))
+    model = RelevanceModel()
+    model.fit(samples[:cut], epochs=epochs, seed=seed)
+    model.calibrate(samples[cut:])
+    return model, samples[cut:]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--log", nargs="+", default=[VERDICT_LOG_PATH],
+                        help="VerdictLog e/ou verdicts.jsonl do replay")
+    parser.add_argument("--out", default=RELEVANCE_MODEL_PATH)
+    parser.add_argument("--holdout", type=float, default=0.2)
+    parser.add_argument("--epochs", type=int, default=5)
+    args = parser.parse_args()
+
+    rows = [row for path in args.log for row in load_verdicts(path)]
+    positives = sum(label for _, _, label in rows)
+    print(f"\n{len(rows)} vereditos ({positives} relevantes, {positives / max(1, len(rows)):.1%})")
+
+    model, validation = train(rows, args.holdout, args.epochs)
+    scores = np.array([model.score(idx) for idx, _ in validation])
+    labels = np.array([label for _, label in validation])
+
+    print(f"\n{'recall alvo':>12}{'recall':>9}{'descartadas':>13}{'limiar':>9}")
+    for recall in (0.90, 0.95, 0.98, 0.99):
+        keep = scores >= model.threshold(recall)
+        got = keep[labels == 1].mean() if labels.any() else 0.0
+        print(f"{recall:>12.0%}{got:>9.1%}{1 - keep.mean():>13.1%}{model.threshold(recall):>9.2f}")
+
+    model.save(args.out)
+    print(f"\nmodelo salvo em {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,345 @@
+import logging
+import queue
+import threading
+import time
+from collections import deque
+
+from analyzer.limiter import RateLimitedError
+from analyzer.providers import CancelToken, LLMProvider
+from core import metrics
+from config import (
+    LLM_HEDGE, LLM_HEDGE_MIN_DELAY, LLM_HEDGE_MAX_DELAY, LLM_HEDGE_DEFAULT_DELAY,
+    LLM_BREAKER_FAILURES, LLM_BREAKER_COOLDOWN,
+)
+
+logger = logging.getLogger(__name__)
+
+_REQUESTS = metrics.counter("llm_provider_requests_total",
+                            "Chamadas por provedor (ok, error, invalid, cancelled)", ("provider", "result"))
+_LATENCY = metrics.histogram("llm_provider_seconds", "Duração das chamadas que chegaram ao fim, por provedor",
+                             ("provider",))
+_HEDGES = metrics.counter("llm_hedges_total", "Chamadas repetidas em outro provedor (hedge, failover)", ("reason",))
+_HEDGE_SLOW, _HEDGE_FAILOVER = _HEDGES.labels(reason="slow"), _HEDGES.labels(reason="failover")
+_OPEN = metrics.gauge("llm_provider_circuit_open", "1 enquanto o circuit breaker do provedor está aberto",
+                      ("provider",))
+
+_MIN_SAMPLES = 10   # abaixo disso o p90 não vale: usa LLM_HEDGE_DEFAULT_DELAY
+
+
+class ProviderHealth:
+    """
+    Latências recentes e circuit breaker de um provedor.
+
+    Guarda separadamente o tempo até o primeiro pedaço (hedge do modo
+    streaming) e o tempo total (hedge da resposta completa). O breaker abre
+    após `failures` falhas seguidas; passado o `cooldown`, deixa uma chamada
+    de teste passar (meio aberto) e fecha se ela der certo.
+    Não é thread-safe sozinho: o LLMRouter acessa sob o lock dele.
+    """
+
+    def __init__(self, name: str, window: int = 200,
+                 failures: int = LLM_BREAKER_FAILURES, cooldown: float = LLM_BREAKER_COOLDOWN):
+        self.name = name
+        self.failures = failures
+        self.cooldown = cooldown
+        self.first_chunk: deque[float] = deque(maxlen=window)
+        self.total: deque[float] = deque(maxlen=window)
+        self.consecutive_failures = 0
+        self.open_until = 0.0
+        self.probing = False
+        _OPEN.set_function(lambda: 1.0 if self.is_open() else 0.0, provider=name)
+
+    def is_open(self, now: float | None = None) -> bool:
+        return self.consecutive_failures >= self.failures > 0 and (now or time.monotonic()) < self.open_until
+
+    def acquire(self, now: float) -> bool:
+        """Se o provedor pode receber uma chamada agora (reserva a chamada de teste no meio aberto)."""
+        if self.failures <= 0 or self.consecutive_failures < self.failures:
+            return True
+        if now < self.open_until or self.probing:
+            return False
+        self.probing = True
+        return True
+
+    def p90(self, streaming: bool) -> float | None:
+        samples = self.first_chunk if streaming else self.total
+        if len(samples) < _MIN_SAMPLES:
+            return None
+        ordered = sorted(samples)
+        return ordered[int(0.9 * (len(ordered) - 1))]
+
+    def record_first_chunk(self, seconds: float):
+        self.first_chunk.append(seconds)
+
+    def record_success(self, seconds: float):
+        self.total.append(seconds)
+        if self.consecutive_failures >= self.failures > 0:
+            logger.info(f"🟢 Provedor {self.name} respondeu: circuit breaker fechado")
+        self.consecutive_failures = 0
+        self.probing = False
+
+    def record_failure(self, now: float):
+        self.consecutive_failures += 1
+        self.probing = False
+        if self.consecutive_failures >= self.failures > 0:
+            if now >= self.open_until:
+                logger.warning(f"🔴 Provedor {self.name} com {self.consecutive_failures} falhas seguidas: "
+                               f"fora por {self.cooldown:.0f}s")
+            self.open_until = now + self.cooldown
+
+    def record_cancelled(self):
+        # perdeu a corrida: não diz nada sobre a saúde, mas libera o teste do meio aberto
+        self.probing = False
+
+
+class _Attempt:
+    """Uma chamada a um provedor numa thread própria, publicando eventos numa fila comum."""
+
+    def __init__(self, provider: LLMProvider, prompt: str, max_tokens: int, events: queue.Queue):
+        self.provider = provider
+        self.cancel = CancelToken()   # set() fecha o stream HTTP da chamada na hora
+        self.started = time.monotonic()
+        self._args = (prompt, max_tokens)
+        self._events = events
+        self.thread = threading.Thread(target=self._run, name=f"llm-{provider.name}", daemon=True)
+        self.thread.start()
+
+    def _run(self):
+        stream = self.provider.stream(*self._args, cancel=self.cancel)
+        try:
+            for text in stream:
+                if self.cancel.is_set():
+                    break
+                self._events.put((self, "chunk", text))
+            else:
+                self._events.put((self, "done", None))
+        except Exception as e:
+            self._events.put((self, "error", e))
+        finally:
+            stream.close()
+
+
+class LLMRouter:
+    """
+    Escolhe o provedor de cada chamada ao LLM, com hedge e circuit breaker.
+
+    Os provedores vêm em ordem de preferência. A chamada vai ao primeiro com
+    o breaker fechado; se ele não responde dentro do p90 observado dele
+    (tempo até o primeiro pedaço no streaming, tempo total na resposta
+    completa), a mesma chamada é disparada no próximo. Vale a primeira
+    resposta válida e as outras são canceladas no mesmo instante (o stream
+    HTTP é fechado da thread do roteador, o que encerra a geração do lado
+    do provedor sem esperar o próximo pedaço). Erro antes de haver vencedor
+    dispara o próximo na hora (failover).
+
+    No streaming o vencedor é quem manda o primeiro pedaço: a partir daí o
+    texto já foi entregue ao parser e não dá mais para trocar de provedor.
+
+    Com um provedor só (ou hedge desligado) tudo roda na thread de quem
+    chamou, sem threads extras; as falhas passam para o próximo em sequência.
+    """
+
+    def __init__(self, providers: list[LLMProvider], hedge: bool = bool(LLM_HEDGE),
+                 min_delay: float = LLM_HEDGE_MIN_DELAY, max_delay: float = LLM_HEDGE_MAX_DELAY,
+                 default_delay: float = LLM_HEDGE_DEFAULT_DELAY,
+                 breaker_failures: int = LLM_BREAKER_FAILURES, breaker_cooldown: float = LLM_BREAKER_COOLDOWN):
+        if not providers:
+            raise ValueError("LLMRouter precisa de pelo menos um provedor")
+        self.providers = list(providers)
+        self.hedge = hedge
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.default_delay = default_delay
+        self.health = {p.name: ProviderHealth(p.name, failures=breaker_failures, cooldown=breaker_cooldown)
+                       for p in self.providers}
+        self._lock = threading.Lock()
+
+    # ── API ─────────────────────────────────────────────────────────────────────
+    def stream(self, prompt: str, max_tokens: int):
+        """Gera os pedaços de texto do provedor que responder primeiro."""
+        return self._run(prompt, max_tokens, streaming=True)
+
+    def complete(self, prompt: str, max_tokens: int, validate=None) -> str:
+        """
+        Texto completo da primeira resposta válida. `validate(text)` levanta
+        exceção para resposta inválida (ex.: JSON quebrado): o provedor conta
+        como falha e a corrida segue com os outros.
+        """
+        return "".join(self._run(prompt, max_tokens, streaming=False, validate=validate))
+
+    def hedge_delay(self, provider: LLMProvider, streaming: bool) -> float:
+        with self._lock:
+            p90 = self.health[provider.name].p90(streaming)
+        delay = self.default_delay if p90 is None else p90
+        return min(self.max_delay, max(self.min_delay, delay))
+
+    # ── Execução ────────────────────────────────────────────────────────────────
+    def _candidates(self) -> list[LLMProvider]:
+        """Provedores com o breaker fechado (ou em teste), na ordem de preferência."""
+        now = time.monotonic()
+        with self._lock:
+            ready = [p for p in self.providers if self.health[p.name].acquire(now)]
+            if not ready:
+                # todos abertos: tenta o que reabre primeiro em vez de falhar sem chamar ninguém
+                ready = [min(self.providers, key=lambda p: self.health[p.name].open_until)]
+        return ready
+
+    def _run(self, prompt: str, max_tokens: int, streaming: bool, validate=None):
+        pending = self._candidates()
+        try:
+            if len(pending) == 1 or not self.hedge:
+                yield from self._run_inline(pending, prompt, max_tokens, streaming, validate)
+            else:
+                yield from self._run_hedged(pending, prompt, max_tokens, streaming, validate)
+        finally:
+            # provedores reservados que não chegaram a ser chamados devolvem o teste do meio aberto
+            with self._lock:
+                for provider in pending:
+                    self.health[provider.name].record_cancelled()
+
+    def _run_inline(self, pending, prompt, max_tokens, streaming, validate):
+        errors = []
+        while pending:
+            provider = pending.pop(0)
+            if errors:
+                _HEDGE_FAILOVER.inc()
+            started = time.monotonic()
+            chunks = []
+            try:
+                for text in provider.stream(prompt, max_tokens):
+                    if not chunks:
+                        self._first_chunk(provider, time.monotonic() - started)
+                    chunks.append(text)
+                    if streaming:
+                        yield text
+            except Exception as e:
+                self._failure(provider, e)
+                if streaming and chunks:
+                    raise  # parte da resposta já foi entregue
+                errors.append(e)
+                continue
+            text = "".join(chunks)
+            if validate is not None:
+                try:
+                    validate(text)
+                except Exception as e:
+                    self._failure(provider, e, invalid=True)
+                    errors.append(e)
+                    continue
+            self._success(provider, time.monotonic() - started)
+            if not streaming:
+                yield text
+            return
+        raise self._final_error(errors)
+
+    def _run_hedged(self, pending, prompt, max_tokens, streaming, validate):
+        events: queue.Queue = queue.Queue()
+        running: list[_Attempt] = []
+        buffers: dict[_Attempt, list[str]] = {}
+        winner: _Attempt | None = None
+        errors: list[Exception] = []
+
+        def launch():
+            attempt = _Attempt(pending.pop(0), prompt, max_tokens, events)
+            running.append(attempt)
+            buffers[attempt] = []
+            return time.monotonic() + self.hedge_delay(attempt.provider, streaming)
+
+        def cancel_others(keep: _Attempt | None):
+            for other in running:
+                if other is not keep and not other.cancel.is_set():
+                    other.cancel.set()
+                    self._cancelled(other.provider)
+
+        next_hedge = launch()
+        try:
+            while True:
+                timeout = None if winner is not None or not pending else max(0.0, next_hedge - time.monotonic())
+                try:
+                    attempt, kind, payload = events.get(timeout=timeout)
+                except queue.Empty:
+                    _HEDGE_SLOW.inc()
+                    logger.info(f"⏱️ {running[-1].provider.name} sem resposta em "
+                                f"{time.monotonic() - running[-1].started:.1f}s: "
+                                f"repetindo em {pending[0].name}")
+                    next_hedge = launch()
+                    continue
+                if attempt.cancel.is_set():
+                    continue  # evento atrasado de quem já perdeu
+
+                if kind == "chunk":
+                    buf = buffers[attempt]
+                    if not buf:
+                        self._first_chunk(attempt.provider, time.monotonic() - attempt.started)
+                    buf.append(payload)
+                    if streaming:
+                        if winner is None:
+                            winner = attempt
+                            cancel_others(winner)
+                        yield payload
+                    continue
+
+                running.remove(attempt)
+                if kind == "done":
+                    text = "".join(buffers[attempt])
+                    if validate is not None:
+                        try:
+                            validate(text)
+                        except Exception as e:
+                            self._failure(attempt.provider, e, invalid=True)
+                            errors.append(e)
+                            kind = "error"
+                    if kind == "done":
+                        self._success(attempt.provider, time.monotonic() - attempt.started)
+                        cancel_others(attempt)
+                        if not streaming:
+                            yield text
+                        return
+                else:
+                    self._failure(attempt.provider, payload)
+                    errors.append(payload)
+                    if attempt is winner:
+                        raise payload  # parte da resposta já foi entregue
+
+                # falhou antes de haver vencedor: próximo provedor na hora
+                if pending:
+                    _HEDGE_FAILOVER.inc()
+                    next_hedge = launch()
+                elif not running:
+                    raise self._final_error(errors)
+        finally:
+            # consumidor parou no meio (ou erro): ninguém fica gerando à toa
+            cancel_others(None)
+
+    # ── Saúde ───────────────────────────────────────────────────────────────────
+    def _first_chunk(self, provider: LLMProvider, seconds: float):
+        with self._lock:
+            self.health[provider.name].record_first_chunk(seconds)
+
+    def _success(self, provider: LLMProvider, seconds: float):
+        _REQUESTS.labels(provider=provider.name, result="ok").inc()
+        _LATENCY.labels(provider=provider.name).observe(seconds)
+        with self._lock:
+            self.health[provider.name].record_success(seconds)
+
+    def _failure(self, provider: LLMProvider, error: Exception, invalid: bool = False):
+        _REQUESTS.labels(provider=provider.name, result="invalid" if invalid else "error").inc()
+        logger.warning(f"⚠️ Provedor {provider.name} falhou: {error}")
+        with self._lock:
+            self.health[provider.name].record_failure(time.monotonic())
+
+    def _cancelled(self, provider: LLMProvider):
+        _REQUESTS.labels(provider=provider.name, result="cancelled").inc()
+        with self._lock:
+            self.health[provider.name].record_cancelled()
+
+    @staticmethod
+    def _final_error(errors: list[Exception]) -> Exception:
+        """
+        Todos falharam. Se algum foi rate limit, sobe RateLimitedError para o
+        AdaptiveLimiter reduzir a concorrência; senão, o último erro.
+        """
+        for e in errors:
+            if isinstance(e, RateLimitedError):
+                return e
+        return errors[-1]
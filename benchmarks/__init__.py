@@ -0,0 +1,21 @@
+"""
+Benchmarks locais do bot — rodam sem Telegram, Polymarket ou Anthropic.
+
+Uso:
+  python -m benchmarks.preselect     → tokens e latência com/sem pré-seleção BM25
+  python -m benchmarks.prompt_size   → tokens do prompt: JSON indentado contra a tabela compacta
+  python -m benchmarks.market_sync   → sync completo do catálogo (10k–50k mercados)
+  python -m benchmarks.price_feed    → ticks/s e latência preço → alerta do feed do CLOB
+  python -m benchmarks.price_history → histórico de preços e filtro de notícia já precificada
+  python -m benchmarks.estimates     → reavaliação das estimativas do LLM a cada tick
+  python -m benchmarks.archive       → arquivo histórico do catálogo: disco e consultas
+  python -m benchmarks.batching      → notícias/token e p95 com/sem micro-batching
+  python -m benchmarks.streaming     → notícia → primeiro alerta com/sem streaming do LLM
+  python -m benchmarks.hedging       → hedge e circuit breaker entre provedores de LLM
+  python -m benchmarks.fanout        → fan-out de alertas para muitos assinantes
+  python -m benchmarks.ingest        → handler inline contra o spool durável com workers
+  python -m benchmarks.cold_start    → boot do processo → catálogo pronto e primeiro alerta
+  python -m benchmarks.e2e           → pipeline completo: notícia → alerta, msgs/s e memória
+
+Os serviços externos simulados (Gamma, CLOB, Bot API, LLM) ficam em benchmarks.fakes.
+"""
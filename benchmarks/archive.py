@@ -0,0 +1,118 @@
+"""
+Benchmark do arquivo histórico do catálogo (MarketArchive).
+
+Grava `--days` dias de snapshots (um a cada `--interval` s, como os
+refreshes do catálogo) de `--markets` mercados com preços em passeio
+aleatório, com a compactação rodando como no bot. Depois reabre o
+arquivo (memmaps frios) e mede:
+  - gravação por snapshot e tamanho em disco, contra o JSONL do
+    ReplayRecorder para os mesmos snapshots
+  - "preço do mercado X em T", "todos os preços em T" e a série de um
+    mercado num dia e no período inteiro
+  - memória residente depois das consultas, contra o tamanho do arquivo
+
+Uso:
+  python -m benchmarks.archive --markets 1000 --days 7 --interval 60
+"""
+
+import argparse
+import dataclasses
+import json
+import logging
+import os
+import random
+import statistics
+import tempfile
+import time
+
+import numpy as np
+
+from benchmarks.fakes import synthetic_markets
+from polymarket.archive import MarketArchive
+
+
+def _rss_mb() -> float:
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1e6
+
+
+def _pct(values: list[float], q: float) -> float:
+    values = sorted(values)
+    return values[int(q * (len(values) - 1))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--markets", type=int, default=1000)
+    parser.add_argument("--days", type=float, default=7)
+    parser.add_argument("--interval", type=float, default=60, help="segundos entre refreshes")
+    parser.add_argument("--resolution", type=float, default=300, help="ARCHIVE_RESOLUTION")
+    parser.add_argument("--queries", type=int, default=2000)
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    rng = np.random.default_rng(5)
+    markets = synthetic_markets(args.markets)
+    ids = [m.condition_id for m in markets]
+    yes = np.array([m.yes_price for m in markets], dtype=np.float32)
+    volume = np.array([m.volume_24h for m in markets], dtype=np.float32)
+    json_bytes = len(json.dumps({"ts": 0.0, "markets": [dataclasses.asdict(m) for m in markets]}).encode()) + 1
+
+    n = int(args.days * 86400 / args.interval)
+    t0 = 1.7e9
+    with tempfile.TemporaryDirectory() as tmp:
+        archive = MarketArchive(tmp, segment_seconds=3600, resolution=args.resolution)
+        writes = []
+        started = time.perf_counter()
+        for k in range(n):
+            moving = rng.random(args.markets) < 0.2
+            yes = np.clip(yes + moving * rng.normal(0, 0.004, args.markets).astype(np.float32), 0.01, 0.99)
+            t = time.perf_counter()
+            archive.record_columns(ids, yes, 1 - yes, volume, ts=t0 + k * args.interval)
+            writes.append((time.perf_counter() - t) * 1e6)
+        archive.close()
+        elapsed = time.perf_counter() - started
+        disk = archive.disk_bytes()
+
+        rss = _rss_mb()
+        archive = MarketArchive(tmp, readonly=True)
+        rss_open = _rss_mb() - rss
+        pick = random.Random(9)
+        end = t0 + n * args.interval
+        point, full, series_day = [], [], []
+        for _ in range(args.queries):
+            cid, at = pick.choice(ids), pick.uniform(t0, end)
+            t = time.perf_counter()
+            archive.price_at(cid, at)
+            point.append((time.perf_counter() - t) * 1e6)
+        rss_point = _rss_mb() - rss
+        for _ in range(200):
+            t = time.perf_counter()
+            archive.snapshot_at(pick.uniform(t0, end))
+            full.append((time.perf_counter() - t) * 1e3)
+        for _ in range(50):
+            start = pick.uniform(t0, end - 86400)
+            t = time.perf_counter()
+            archive.series(pick.choice(ids), start, start + 86400)
+            series_day.append((time.perf_counter() - t) * 1e3)
+        t = time.perf_counter()
+        points = len(archive.series(ids[0])[0])
+        series_all = (time.perf_counter() - t) * 1e3
+        rss_all = _rss_mb() - rss
+
+    print(f"\n{args.markets} mercados | {n} snapshots ({args.days:g} dias a cada {args.interval:g}s) | "
+          f"compactação a {args.resolution:g}s\n")
+    print(f"gravação: p50 {statistics.median(writes):.0f} µs | p95 {_pct(writes, 0.95):.0f} µs por snapshot | "
+          f"total {elapsed:.1f}s")
+    print(f"disco: {disk / 1e6:.1f} MB | JSONL do recorder: {json_bytes * n / 1e6:.0f} MB "
+          f"({json_bytes * n / disk:.0f}x maior)")
+    print(f"preço de X em T: p50 {statistics.median(point):.0f} µs | p95 {_pct(point, 0.95):.0f} µs")
+    print(f"todos os preços em T: p50 {statistics.median(full):.2f} ms | p95 {_pct(full, 0.95):.2f} ms")
+    print(f"série de um mercado: 1 dia p50 {statistics.median(series_day):.1f} ms | "
+          f"período inteiro {series_all:.0f} ms ({points} pontos)")
+    print(f"memória residente (só as páginas lidas): abrir +{rss_open:.1f} MB | {args.queries} preços pontuais "
+          f"+{rss_point:.1f} MB | depois das séries +{rss_all:.1f} MB (arquivo com {disk / 1e6:.1f} MB)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Benchmark do micro-batching de notícias (BATCH_WINDOW_MS).
+
+Reproduz rajadas de breaking news (a mesma história repostada por vários
+canais em poucos segundos) contra o LLM stub, com o mesmo semáforo de 3
+chamadas do main.py, e compara os dois modos:
+  - single:  uma chamada ao LLM por notícia
+  - batched: notícias da janela dividem uma chamada (analyze_batch)
+
+Reporta notícias por 1k tokens de LLM e latência notícia → resultado (p50/p95).
+
+Uso:
+  python -m benchmarks.batching --stories 10 --window-ms 500
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+
+from analyzer.ai_analyzer import AIAnalyzer
+from analyzer.batcher import MicroBatcher
+from benchmarks.fakes import FakeAnthropic, news_bursts, synthetic_market_rows, synthetic_markets
+
+
+def _pct(values: list[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[int(q * (len(ordered) - 1))]
+
+
+async def _replay(events, handle) -> list[float]:
+    """Dispara cada notícia no seu offset e mede chegada → resultado (ms)."""
+    latencies: list[float] = []
+    start = time.perf_counter()
+
+    async def one(offset: float, news: dict):
+        await asyncio.sleep(max(0.0, offset - (time.perf_counter() - start)))
+        arrived = time.perf_counter()
+        await handle(news)
+        latencies.append((time.perf_counter() - arrived) * 1000)
+
+    await asyncio.gather(*(one(offset, news) for offset, news in events))
+    return latencies
+
+
+async def _run(mode: str, events, markets, args) -> dict:
+    client = FakeAnthropic(args.base_ms, args.ms_per_1k)
+    analyzer = AIAnalyzer(client=client)
+    analyzer.update_index(markets)
+    semaphore = asyncio.Semaphore(3)
+
+    async def single(news):
+        async with semaphore:
+            return await asyncio.to_thread(analyzer.analyze, news, markets)
+
+    async def process_batch(news_list):
+        async with semaphore:
+            return await asyncio.to_thread(analyzer.analyze_batch, news_list, markets)
+
+    batcher = MicroBatcher(process_batch, window=args.window_ms / 1000, max_items=args.max_items)
+    handle = single if mode == "single" else batcher.submit
+
+    latencies = await _replay(events, handle)
+    tokens = client.input_tokens + client.output_tokens
+    return {
+        "mode": mode,
+        "calls": client.calls,
+        "tokens": tokens,
+        "news_per_1k": len(events) / (tokens / 1000),
+        "p50": statistics.median(latencies),
+        "p95": _pct(latencies, 0.95),
+    }
+
+
+async def _main(args):
+    rows = synthetic_market_rows(args.markets)
+    markets = synthetic_markets(args.markets)
+    events = news_bursts(rows, args.stories, copies=args.copies, gap_s=args.gap_s)
+
+    print(f"\n{len(events)} notícias ({args.stories} histórias × {args.copies} canais) | "
+          f"janela {args.window_ms} ms, até {args.max_items} por lote\n")
+    print(f"{'modo':<10}{'chamadas':>10}{'tokens':>10}{'notícias/1k tok':>17}{'p50 ms':>10}{'p95 ms':>10}")
+    for mode in ("single", "batched"):
+        r = await _run(mode, events, markets, args)
+        print(f"{r['mode']:<10}{r['calls']:>10}{r['tokens']:>10}{r['news_per_1k']:>17.2f}"
+              f"{r['p50']:>10.0f}{r['p95']:>10.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--markets", type=int, default=2000)
+    parser.add_argument("--stories", type=int, default=10)
+    parser.add_argument("--copies", type=int, default=5)
+    parser.add_argument("--gap-s", type=float, default=3.0)
+    parser.add_argument("--window-ms", type=int, default=500)
+    parser.add_argument("--max-items", type=int, default=8)
+    parser.add_argument("--base-ms", type=float, default=800.0)
+    parser.add_argument("--ms-per-1k", type=float, default=150.0)
+    asyncio.run(_main(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
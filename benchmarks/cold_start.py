@@ -0,0 +1,119 @@
+"""
+Benchmark do cold start: boot do processo → primeiro alerta.
+
+Cada medida roda num processo novo (python -m benchmarks.cold_start --child),
+com Gamma API e Bot API locais e LLM stub, e reporta desde o início do
+processo filho:
+  - import: tempo para importar o main.py
+  - catálogo: primeiro snapshot utilizável (e índice de pré-seleção pronto)
+  - 1º alerta: uma notícia sobre um mercado do catálogo até o sendMessage
+
+Modos:
+  - cold: sem arquivo de catálogo, o primeiro get() espera a Gamma API
+  - warm: catálogo salvo em disco pela execução anterior (CATALOG_SNAPSHOT_PATH)
+
+Uso:
+  python -m benchmarks.cold_start --markets 5000 --gamma-ms 400 --runs 3
+"""
+
+import time
+
+_T0 = time.perf_counter()
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+
+async def _child(args):
+    import main
+    import_s = time.perf_counter() - _T0
+
+    from analyzer.ai_analyzer import AIAnalyzer
+    from analyzer.news_cache import NewsAnalysisCache
+    from analyzer.relevance import RelevanceGate
+    from alerts.dedup_store import DedupStore
+    from alerts.notifier import TelegramNotifier
+    from alerts.subscriptions import Subscription, SubscriptionRegistry
+    from benchmarks.fakes import FakeAnthropic, FakeGammaServer, FakeTelegramBotServer, synthetic_market_rows
+    from polymarket.catalog import MarketCatalog
+    from polymarket.client import PolymarketClient
+    from polymarket.price_feed import LivePriceTable
+
+    rows = synthetic_market_rows(args.markets)
+    async with FakeGammaServer(rows, args.gamma_ms) as gamma, FakeTelegramBotServer() as bot:
+        poly = PolymarketClient(http=main.http, base_url=gamma.url)
+        analyzer = AIAnalyzer(client=FakeAnthropic(args.llm_ms, 0))
+        poly.on_refresh(analyzer.update_index)
+        catalog = MarketCatalog(poly, limit=args.markets, full_sync=args.full_sync,
+                                snapshot_path=args.snapshot if args.mode == "warm" else "")
+        main.configure(
+            catalog=catalog, analyzer=analyzer,
+            notifier=TelegramNotifier(http=main.http, base_url=bot.base_url),
+            subscriptions=SubscriptionRegistry([Subscription("bench")]),
+            dedup=DedupStore(":memory:"), prices=LivePriceTable(), news_cache=NewsAnalysisCache(),
+            relevance=RelevanceGate(), _batcher=None,
+        )
+
+        await catalog.get()
+        catalog_s = time.perf_counter() - _T0
+        await main.process_news({
+            "text": rows[0]["headline"], "channel": "bench", "message_id": 1,
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S+00:00", time.gmtime()),
+        })
+        alert_s = (bot.messages[0][0] - _T0) if bot.messages else None
+
+        # a execução cold deixa o arquivo para as warm
+        catalog.snapshot_path = args.snapshot
+        if args.mode == "cold":
+            await catalog._persist(catalog.snapshot)
+        await main.http.close()
+
+    print(json.dumps({"import": import_s, "catalog": catalog_s, "alert": alert_s}))
+
+
+def _run_child(mode: str, args) -> dict:
+    cmd = [sys.executable, "-m", "benchmarks.cold_start", "--child", "--mode", mode,
+           "--snapshot", args.snapshot, "--markets", str(args.markets),
+           "--gamma-ms", str(args.gamma_ms), "--llm-ms", str(args.llm_ms)]
+    if args.full_sync:
+        cmd.append("--full-sync")
+    env = dict(os.environ, LLM_STREAMING="0")
+    out = subprocess.run(cmd, capture_output=True, text=True, env=env, check=True).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--markets", type=int, default=2000)
+    parser.add_argument("--gamma-ms", type=float, default=300.0, help="latência por request da Gamma local")
+    parser.add_argument("--llm-ms", type=float, default=300.0)
+    parser.add_argument("--full-sync", action="store_true", help="catálogo paginado (MARKET_SYNC_MODE=full)")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--mode", default="cold", help=argparse.SUPPRESS)
+    parser.add_argument("--snapshot", default="", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        asyncio.run(_child(args))
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        args.snapshot = os.path.join(tmp, "catalog.json.gz")
+        print(f"\n{args.markets} mercados | Gamma {args.gamma_ms:.0f} ms/request | LLM {args.llm_ms:.0f} ms | "
+              f"{args.runs} execuções por modo (medianas, desde o início do processo)\n")
+        print(f"{'modo':<8}{'import':>10}{'catálogo':>11}{'1º alerta':>12}")
+        for mode in ("cold", "warm"):
+            runs = [_run_child(mode, args) for _ in range(args.runs)]
+            med = {k: statistics.median(r[k] for r in runs if r[k] is not None) for k in ("import", "catalog", "alert")}
+            print(f"{mode:<8}{med['import'] * 1000:>8.0f}ms{med['catalog'] * 1000:>9.0f}ms{med['alert'] * 1000:>10.0f}ms")
+
+
+if __name__ == "__main__":
+    main()
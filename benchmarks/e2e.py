@@ -0,0 +1,217 @@
+"""
+Benchmark ponta a ponta do pipeline do main.py (process_news).
+
+Tudo local: Gamma /markets e Bot API sendMessage em servidores aiohttp na
+máquina, LLM stub com latência configurável. Rajadas de notícia sintéticas
+(a mesma história repostada por vários canais em segundos) entram pelo
+handler do TelegramSourceReader, como eventos do Telethon — um por task,
+que é como o Telethon despacha updates.
+
+Reporta:
+  - latência notícia → alerta (chegada do evento → sendMessage no servidor
+    local), p50/p95/p99
+  - mensagens/s processadas contra a taxa oferecida, e o backlog no fim
+  - memória (RSS e, com --tracemalloc, heap Python) ao longo da execução
+
+Cada notícia leva uma marca "refN" no texto para casar o alerta com ela.
+Por padrão o dedup de alertas usa TTL 0 para que toda notícia gere alerta;
+use --dedup-ttl para medir com a deduplicação de produção.
+
+Uso:
+  python -m benchmarks.e2e --rate 20 --duration 60
+  python -m benchmarks.e2e --rate 50 --duration 900 --sample-s 30 --tracemalloc
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import re
+import resource
+import statistics
+import time
+import tracemalloc
+
+from analyzer.ai_analyzer import AIAnalyzer
+from analyzer.limiter import AdaptiveLimiter
+from analyzer.news_cache import NewsAnalysisCache
+from alerts.dedup_store import DedupStore
+from alerts.notifier import TelegramNotifier
+from alerts.subscriptions import Subscription, SubscriptionRegistry
+from benchmarks.fakes import (
+    FakeAnthropic, FakeGammaServer, FakeTelegramBotServer,
+    news_bursts, synthetic_market_rows, telethon_event,
+)
+from core.http import AsyncHTTPPool
+from polymarket.catalog import MarketCatalog
+from polymarket.client import PolymarketClient
+from polymarket.price_feed import LivePriceTable
+from sources.cursors import ChannelCursors
+from sources.telegram_reader import TelegramSourceReader
+
+_REF_RE = re.compile(r"ref(\d+)")
+
+
+def _pct(values: list[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[int(q * (len(ordered) - 1))]
+
+
+def _rss_mb() -> float:
+    """RSS atual do processo (Linux); fora do Linux, o pico (ru_maxrss)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1e6
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1e3
+
+
+async def _main(args):
+    import main  # instâncias globais do bot; os componentes externos são trocados abaixo
+    logging.getLogger().setLevel(logging.WARNING)
+
+    rows = synthetic_market_rows(args.markets)
+    copies = args.copies
+    events = news_bursts(rows, stories=max(1, int(args.rate * args.duration / copies)),
+                         copies=copies, spread_s=args.spread_s, gap_s=copies / args.rate)
+    for _, news in events:
+        news["text"] = f"{news['text']} ref{news['message_id']}"
+
+    if args.tracemalloc:
+        tracemalloc.start()
+
+    async with FakeGammaServer(rows, args.gamma_ms) as gamma, \
+               FakeTelegramBotServer(args.telegram_ms) as bot:
+        http = AsyncHTTPPool()
+        poly = PolymarketClient(http=http, base_url=gamma.url)
+        llm = FakeAnthropic(args.llm_ms, args.ms_per_1k)
+        analyzer = AIAnalyzer(client=llm)
+        poly.on_refresh(analyzer.update_index)
+        catalog = MarketCatalog(poly, limit=args.markets, full_sync=False, snapshot_path="")
+
+        main.configure(
+            catalog=catalog,
+            analyzer=analyzer,
+            notifier=TelegramNotifier(http=http, base_url=bot.base_url),
+            subscriptions=SubscriptionRegistry([Subscription("bench")]),
+            dedup=DedupStore(":memory:", ttl=args.dedup_ttl),
+            prices=LivePriceTable(),
+            news_cache=NewsAnalysisCache(),
+            llm_limiter=(
+                AdaptiveLimiter(initial=args.llm_concurrency)
+                if args.adaptive else
+                AdaptiveLimiter(initial=args.llm_concurrency, min_limit=args.llm_concurrency,
+                                max_limit=args.llm_concurrency)
+            ),
+        )
+
+        reader = TelegramSourceReader(cursors=ChannelCursors(""))  # cursores só em memória
+        reader.on_message(main.process_news)
+        completed = 0
+
+        async def done(_news: dict):
+            nonlocal completed
+            completed += 1
+
+        reader.on_message(done)
+
+        await catalog.refresh()
+        catalog.start()
+
+        print(f"\n{len(events)} notícias em {args.duration}s ({args.rate}/s oferecidas, "
+              f"rajadas de {copies} canais) | {len(rows)} mercados | LLM {args.llm_ms:.0f} ms, "
+              f"{args.llm_concurrency} simultâneas{' (AIMD)' if args.adaptive else ''}\n")
+        print(f"{'t (s)':>7}{'enviadas':>10}{'concluídas':>12}{'backlog':>9}{'RSS MB':>9}"
+              + (f"{'heap MB':>9}" if args.tracemalloc else ""))
+
+        arrived: dict[int, float] = {}
+        pending: set[asyncio.Task] = set()
+        samples: list[tuple[float, int, float]] = []   # (t, concluídas, RSS)
+        baseline = tracemalloc.take_snapshot() if args.tracemalloc else None
+        start = time.perf_counter()
+
+        def sample():
+            t = time.perf_counter() - start
+            rss = _rss_mb()
+            samples.append((t, completed, rss))
+            line = f"{t:>7.0f}{len(arrived):>10}{completed:>12}{len(pending):>9}{rss:>9.1f}"
+            if args.tracemalloc:
+                line += f"{tracemalloc.get_traced_memory()[0] / 1e6:>9.1f}"
+            print(line)
+
+        async def sampler():
+            while True:
+                await asyncio.sleep(args.sample_s)
+                sample()
+
+        sampler_task = asyncio.create_task(sampler())
+        for offset, news in events:
+            delay = offset - (time.perf_counter() - start)
+            if delay > 0:
+                await asyncio.sleep(delay)
+            arrived[news["message_id"]] = time.perf_counter()
+            task = asyncio.create_task(reader._handle_event(telethon_event(news)))
+            pending.add(task)
+            task.add_done_callback(pending.discard)
+
+        offered_s = time.perf_counter() - start
+        backlog = len(pending)
+        if pending:
+            await asyncio.wait(pending, timeout=args.drain_s)
+        elapsed = time.perf_counter() - start
+        sampler_task.cancel()
+        sample()
+
+        await catalog.stop()
+        await http.close()
+
+    latencies = {}
+    for received, text in bot.messages:
+        m = _REF_RE.search(text)
+        if m and int(m.group(1)) in arrived:
+            latencies.setdefault(int(m.group(1)), (received - arrived[int(m.group(1))]) * 1000)
+    values = list(latencies.values())
+
+    print(f"\nalertas: {len(bot.messages)} ({len(values)} notícias) | chamadas ao LLM: {llm.calls} | "
+          f"cache de repostagens: {main.news_cache.stats()}")
+    if values:
+        print(f"notícia → alerta: p50 {statistics.median(values):.0f} ms | "
+              f"p95 {_pct(values, 0.95):.0f} ms | p99 {_pct(values, 0.99):.0f} ms")
+    print(f"vazão: {completed / elapsed:.1f} msgs/s processadas "
+          f"({len(arrived) / offered_s:.1f}/s oferecidas) | backlog ao fim da carga: {backlog}")
+
+    if len(samples) >= 2:
+        # Descarta a primeira amostra (aquecimento: índice, pool, caches vazios)
+        (t0, c0, m0), (t1, c1, m1) = samples[0], samples[-1]
+        per_1k = (m1 - m0) / (c1 - c0) * 1000 if c1 > c0 else 0.0
+        print(f"memória: RSS {m0:.1f} → {m1:.1f} MB em {t1 - t0:.0f}s "
+              f"({per_1k:+.2f} MB por 1k mensagens)")
+
+    if baseline is not None:
+        print("\nmaiores crescimentos de heap (tracemalloc):")
+        for stat in tracemalloc.take_snapshot().compare_to(baseline, "lineno")[:8]:
+            print(f"  {stat}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--markets", type=int, default=100, help="tamanho do catálogo (Gamma local)")
+    parser.add_argument("--rate", type=float, default=20.0, help="notícias por segundo oferecidas")
+    parser.add_argument("--duration", type=float, default=60.0, help="segundos de carga")
+    parser.add_argument("--copies", type=int, default=5, help="canais que repostam cada história")
+    parser.add_argument("--spread-s", type=float, default=2.0, help="espalhamento das repostagens")
+    parser.add_argument("--llm-ms", type=float, default=800.0)
+    parser.add_argument("--ms-per-1k", type=float, default=150.0)
+    parser.add_argument("--llm-concurrency", type=int, default=3, help="fixa, ou inicial com --adaptive")
+    parser.add_argument("--adaptive", action="store_true", help="concorrência AIMD em vez de fixa")
+    parser.add_argument("--gamma-ms", type=float, default=50.0)
+    parser.add_argument("--telegram-ms", type=float, default=80.0)
+    parser.add_argument("--dedup-ttl", type=float, default=0.0)
+    parser.add_argument("--sample-s", type=float, default=10.0)
+    parser.add_argument("--drain-s", type=float, default=120.0, help="espera máxima pelo backlog no fim")
+    parser.add_argument("--tracemalloc", action="store_true")
+    asyncio.run(_main(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Benchmark da reavaliação de estimativas do LLM (EstimateStore).
+
+Grava estimativas sintéticas abaixo do threshold (como vereditos do LLM
+para mercados afetados pela notícia, mas já bem precificados) e aplica
+ticks de preço: a maioria é ruído, uma fração dos mercados anda contra a
+estimativa o bastante para abrir edge. Mede:
+  - latência de check() (todas as estimativas contra os preços atuais)
+  - oportunidades abertas pelo preço contra as esperadas, e falsos disparos
+  - alertas repetidos com o preço oscilando em volta do threshold
+
+Uso:
+  python -m benchmarks.estimates --markets 20000 --estimates 2000
+"""
+
+import argparse
+import logging
+import random
+import statistics
+import time
+
+from analyzer.estimates import EstimateStore
+from benchmarks.fakes import synthetic_markets
+from polymarket.columnar import ColumnarMarketStore
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--markets", type=int, default=20000)
+    parser.add_argument("--estimates", type=int, default=2000)
+    parser.add_argument("--move-fraction", type=float, default=0.05, help="mercados cujo preço abre edge")
+    parser.add_argument("--threshold", type=float, default=0.07)
+    parser.add_argument("--checks", type=int, default=200)
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    rng = random.Random(3)
+    markets = synthetic_markets(args.markets)
+    columns = ColumnarMarketStore()
+    columns.sync(markets)
+    store = EstimateStore(columns, ttl=3600, half_life=1800, threshold=args.threshold)
+
+    # estimativas 2-4 pontos acima do preço: abaixo do threshold, nenhuma alerta na hora
+    now = time.time()
+    chosen = rng.sample(markets, args.estimates)
+    news = {"text": "notícia sintética", "channel": "bench",
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S+00:00", time.gmtime(now - 300))}
+    items = []
+    for m in chosen:
+        p = min(0.98, m.yes_price + rng.uniform(0.02, 0.04))
+        items.append({"market_id": m.condition_id, "direction": "YES", "true_prob": round(p, 3), "reasoning": "bench"})
+    store.record_verdict(news, items, [])
+    assert not store.check(now), "nenhuma estimativa deveria disparar antes do preço andar"
+
+    # ruído pequeno em todos; queda de 10 pontos no YES de uma fração (abre edge no YES)
+    movers = {m.condition_id for m in rng.sample(chosen, int(args.estimates * args.move_fraction))}
+    for m in chosen:
+        yes = m.yes_price + rng.gauss(0, 0.003)
+        if m.condition_id in movers:
+            yes = max(0.01, m.yes_price - 0.10)
+        columns.set_prices(m.condition_id, yes, 1 - yes)
+
+    started = time.perf_counter()
+    opened = store.check(now)
+    first_ms = (time.perf_counter() - started) * 1000
+    hits = {o.market.condition_id for o in opened}
+
+    lat = []
+    for _ in range(args.checks):
+        t0 = time.perf_counter()
+        store.check(now)
+        lat.append((time.perf_counter() - t0) * 1e6)
+
+    # oscilação em volta do threshold: sem rearmar, não repete o alerta
+    repeats = 0
+    for i in range(20):
+        for cid in movers:
+            r = columns.row(cid)
+            columns.yes[r] += 0.01 if i % 2 else -0.01
+            columns.no[r] = 1 - columns.yes[r]
+        repeats += len(store.check(now))
+
+    print(f"\n{args.markets} mercados | {len(store)} estimativas vivas | threshold {args.threshold:.0%}")
+    print(f"primeira reavaliação: {first_ms:.1f} ms | check() p50 {statistics.median(lat):.0f} µs | "
+          f"p95 {sorted(lat)[int(0.95 * (len(lat) - 1))]:.0f} µs")
+    print(f"edges abertos pelo preço: {len(hits & movers)}/{len(movers)} | "
+          f"falsos disparos: {len(hits - movers)} | repetidos na oscilação: {repeats} | chamadas ao LLM: 0")
+
+
+if __name__ == "__main__":
+    main()
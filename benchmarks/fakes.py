@@ -0,0 +1,568 @@
+"""
+Stand-ins locais para os serviços externos usados pelo bot.
+Nada aqui toca a rede: servem para medir o pipeline de forma reprodutível.
+"""
+
+import asyncio
+import json
+import math
+import random
+import re
+import threading
+import time
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+from aiohttp import web
+
+from analyzer.prompt import estimate_tokens
+from analyzer.providers import LLMProvider
+from polymarket.client import Market
+
+# ── Catálogo sintético ─────────────────────────────────────────────────────────
+_PEOPLE    = ["Trump", "Harris", "Lula", "Milei", "Macron", "Starmer", "Modi", "Erdogan",
+              "Sheinbaum", "Carney", "Merz", "Meloni", "Albanese", "Ishiba", "Zelensky", "Putin"]
+_COUNTRIES = ["Brazil", "Argentina", "France", "Germany", "India", "Mexico", "Canada", "Japan",
+              "Italy", "Turkey", "Poland", "Chile", "Colombia", "Peru", "Spain", "Australia"]
+_COMPANIES = ["Apple", "Nvidia", "Tesla", "Microsoft", "Amazon", "Meta", "Google", "Netflix",
+              "Petrobras", "Vale", "Itau", "Embraer", "OpenAI", "Anthropic", "Intel", "AMD"]
+_TEAMS     = ["Flamengo", "Palmeiras", "Corinthians", "Real Madrid", "Barcelona", "Arsenal",
+              "Liverpool", "Lakers", "Celtics", "Chiefs", "Eagles", "Yankees", "Dodgers"]
+_CRYPTO    = ["Bitcoin", "Ethereum", "Solana", "XRP", "Dogecoin", "Cardano"]
+_MONTHS    = ["January", "February", "March", "April", "May", "June", "July", "August",
+              "September", "October", "November", "December"]
+
+_TEMPLATES = [
+    ("Will {p} win the {y} {c} presidential election?",
+     "This market resolves YES if {p} is declared winner of the {y} presidential election in {c}.",
+     "{p} surges in new {c} poll ahead of {y} presidential election"),
+    ("Will {co} stock close above ${n} on {m} 30?",
+     "Resolves YES if {co} closes above ${n} on the last trading day of {m}.",
+     "{co} shares jump after earnings beat, analysts raise target to ${n}"),
+    ("Will the central bank of {c} cut rates in {m} {y}?",
+     "Resolves YES if the {c} central bank announces a rate cut at its {m} {y} meeting.",
+     "{c} central bank signals possible rate cut in {m} as inflation cools"),
+    ("Will {t} win the {y} championship?",
+     "Resolves YES if {t} wins the {y} league championship.",
+     "{t} star player injured, out for rest of {y} season"),
+    ("Will {cr} reach ${n} by {m} {y}?",
+     "Resolves YES if {cr} trades at or above ${n} on any major exchange before the end of {m} {y}.",
+     "{cr} rallies as ETF inflows hit record, traders eye ${n}"),
+    ("Will {p} meet {p2} before {m} {y}?",
+     "Resolves YES if {p} and {p2} hold an in-person meeting before the end of {m} {y}.",
+     "{p} says talks with {p2} could happen in {m}"),
+]
+_CATEGORIES = ["Politics", "Business", "Economy", "Sports", "Crypto", "Politics"]  # um por template
+
+
+def synthetic_market_rows(n: int, seed: int = 42) -> list[dict]:
+    """
+    Gera n mercados sintéticos (question, description, preços, volume)
+    junto com uma manchete plausível sobre cada um.
+    """
+    rng = random.Random(seed)
+    rows = []
+    for i in range(n):
+        q, d, headline = _TEMPLATES[i % len(_TEMPLATES)]
+        fields = {
+            "p": rng.choice(_PEOPLE), "p2": rng.choice(_PEOPLE), "c": rng.choice(_COUNTRIES),
+            "co": rng.choice(_COMPANIES), "t": rng.choice(_TEAMS), "cr": rng.choice(_CRYPTO),
+            "m": rng.choice(_MONTHS), "y": rng.choice(["2026", "2027", "2028"]),
+            "n": rng.choice([10, 50, 100, 250, 500, 1000, 5000, 100000, 150000]),
+        }
+        yes = round(rng.uniform(0.02, 0.98), 3)
+        rows.append({
+            "conditionId": f"0x{i:064x}",
+            "question": q.format(**fields),
+            "description": d.format(**fields),
+            "headline": headline.format(**fields),
+            "yes_price": yes,
+            "no_price": round(1 - yes, 3),
+            "volume24hr": round(rng.paretovariate(1.2) * 1000, 2),
+            "endDate": f"{fields['y']}-12-31T00:00:00Z",
+            "slug": f"synthetic-market-{i}",
+            "category": _CATEGORIES[i % len(_TEMPLATES)],
+        })
+    rows.sort(key=lambda r: r["volume24hr"], reverse=True)
+    return rows
+
+
+def synthetic_markets(n: int, seed: int = 42) -> list[Market]:
+    """Catálogo sintético já convertido em Market, ordenado por volume 24h."""
+    return [
+        Market(
+            condition_id = r["conditionId"],
+            question     = r["question"],
+            description  = r["description"],
+            yes_price    = r["yes_price"],
+            no_price     = r["no_price"],
+            volume_24h   = r["volume24hr"],
+            end_date     = r["endDate"],
+            active       = True,
+            slug         = r["slug"],
+            category     = r["category"],
+        )
+        for r in synthetic_market_rows(n, seed)
+    ]
+
+
+def synthetic_news(rows: list[dict], n: int, seed: int = 7) -> list[dict]:
+    """Notícias sintéticas, cada uma apontando para um mercado alvo (`target_id`)."""
+    rng = random.Random(seed)
+    news = []
+    for i in range(n):
+        row = rng.choice(rows)
+        news.append({
+            "text": row["headline"],
+            "channel": f"canal{i % 5}",
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S+00:00", time.gmtime()),
+            "message_id": i,
+            "target_id": row["conditionId"],
+        })
+    return news
+
+
+def news_bursts(rows: list[dict], stories: int, copies: int = 5, spread_s: float = 2.0,
+                gap_s: float = 5.0, seed: int = 11) -> list[tuple[float, dict]]:
+    """
+    Rajadas de notícia: cada história é repostada por `copies` canais em até
+    `spread_s` segundos; histórias separadas por ~`gap_s` segundos.
+    Retorna (offset_em_segundos, news) ordenado pelo tempo de chegada.
+    """
+    rng = random.Random(seed)
+    events = []
+    t = 0.0
+    for s in range(stories):
+        row = rng.choice(rows)
+        for c in range(copies):
+            events.append((t + rng.uniform(0, spread_s), {
+                "text": row["headline"] if c == 0 else f"{row['headline']} (via canal{c})",
+                "channel": f"canal{c}",
+                "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S+00:00", time.gmtime()),
+                "message_id": s * copies + c,
+                "target_id": row["conditionId"],
+            }))
+        t += rng.expovariate(1 / gap_s)
+    events.sort(key=lambda e: e[0])
+    return events
+
+
+def telethon_event(news: dict) -> SimpleNamespace:
+    """
+    Evento NewMessage mínimo com os atributos que TelegramSourceReader lê,
+    para injetar notícias sintéticas pelo mesmo handler das reais.
+    """
+    return SimpleNamespace(
+        message=SimpleNamespace(
+            text=news["text"],
+            date=datetime.now(timezone.utc),
+            id=news["message_id"],
+        ),
+        chat=SimpleNamespace(username=news["channel"]),
+        chat_id=-100,
+    )
+
+
+# ── LLM stub ───────────────────────────────────────────────────────────────────
+class FakeAnthropic:
+    """
+    Imita `Anthropic().messages.create` com latência proporcional ao tamanho
+    do prompt: base_ms + ms_per_1k_tokens * tokens_de_entrada / 1000 até o
+    primeiro token, mais ms_per_output_token por token gerado.
+
+    `messages.stream` entrega o mesmo texto token a token (~4 caracteres),
+    no ritmo de ms_per_output_token; `create` só devolve depois do último.
+
+    Por padrão responde com uma oportunidade por notícia do prompt (usando
+    os market_ids presentes nele), o que exercita o parse e o caminho de alerta.
+    """
+
+    def __init__(self, base_ms: float = 300.0, ms_per_1k_tokens: float = 100.0,
+                 responder=None, ms_per_output_token: float = 0.0):
+        self.base_ms = base_ms
+        self.ms_per_1k_tokens = ms_per_1k_tokens
+        self.ms_per_output_token = ms_per_output_token
+        self.responder = responder or _first_market_responder
+        self.calls = 0
+        self.input_tokens = 0
+        self.output_tokens = 0
+        self.messages = SimpleNamespace(create=self._create, stream=self._stream)
+
+    def _respond(self, messages: list[dict]) -> tuple[str, SimpleNamespace]:
+        """Espera o 'prefill' e gera a resposta; devolve (texto, usage)."""
+        prompt = messages[-1]["content"]
+        tokens = estimate_tokens(prompt)
+        self.calls += 1
+        self.input_tokens += tokens
+        time.sleep((self.base_ms + self.ms_per_1k_tokens * tokens / 1000) / 1000)
+        text = self.responder(prompt)
+        self.output_tokens += estimate_tokens(text)
+        return text, SimpleNamespace(input_tokens=tokens, output_tokens=estimate_tokens(text))
+
+    def _create(self, model: str, max_tokens: int, messages: list[dict], **kwargs):
+        text, usage = self._respond(messages)
+        time.sleep(self.ms_per_output_token * usage.output_tokens / 1000)
+        return SimpleNamespace(content=[SimpleNamespace(text=text)], usage=usage)
+
+    def _stream(self, model: str, max_tokens: int, messages: list[dict], **kwargs):
+        return _FakeStream(self, messages)
+
+
+class _FakeStream:
+    """Context manager no formato de `messages.stream` (text_stream, get_final_message)."""
+
+    def __init__(self, client: FakeAnthropic, messages: list[dict]):
+        self.client = client
+        self.messages = messages
+        self._message = None
+
+    def __enter__(self):
+        text, usage = self.client._respond(self.messages)
+        self._message = SimpleNamespace(content=[SimpleNamespace(text=text)], usage=usage)
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def close(self):
+        pass
+
+    @property
+    def text_stream(self):
+        text = self._message.content[0].text
+        delay = self.client.ms_per_output_token / 1000
+        for i in range(0, len(text), 4):
+            if delay:
+                time.sleep(delay)
+            yield text[i:i + 4]
+
+    def get_final_message(self):
+        return self._message
+
+
+_ID_RE = re.compile(r"^(m\d+)\|", re.MULTILINE)   # linhas da tabela de mercados
+_NEWS_INDEX_RE = re.compile(r"^\[(\d+)\] Canal:", re.MULTILINE)
+
+
+def _first_market_responder(prompt: str) -> str:
+    ids = _ID_RE.findall(prompt)
+    if not ids:
+        return json.dumps({"opportunities": []})
+
+    indexes = [int(i) for i in _NEWS_INDEX_RE.findall(prompt)]
+    opportunities = []
+    for n, idx in enumerate(indexes or [None]):
+        opp = {
+            "market_id": ids[n % len(ids)],
+            "direction": "YES",
+            "true_prob": 0.9,
+            "edge": 0.2,
+            "reasoning": "stub",
+        }
+        if idx is not None:
+            opp["news_index"] = idx
+        opportunities.append(opp)
+    return json.dumps({"opportunities": opportunities})
+
+
+def multi_opportunity_responder(per_news: int = 3, reasoning_words: int = 40):
+    """
+    Responder que devolve `per_news` oportunidades por notícia, com
+    reasoning longo — respostas grandes, onde o streaming faz diferença.
+    """
+    reasoning = " ".join(["impacto"] * reasoning_words)
+
+    def respond(prompt: str) -> str:
+        ids = _ID_RE.findall(prompt)
+        if not ids:
+            return json.dumps({"opportunities": []})
+        indexes = [int(i) for i in _NEWS_INDEX_RE.findall(prompt)] or [None]
+        opportunities = []
+        for idx in indexes:
+            for k in range(per_news):
+                opp = {
+                    "market_id": ids[k % len(ids)],
+                    "direction": "YES",
+                    "true_prob": 0.9,
+                    "edge": 0.2,
+                    "reasoning": reasoning,
+                }
+                if idx is not None:
+                    opp["news_index"] = idx
+                opportunities.append(opp)
+        return json.dumps({"opportunities": opportunities}, ensure_ascii=False, indent=2)
+
+    return respond
+
+
+class StubProvider(LLMProvider):
+    """
+    Provedor de LLM local para o LLMRouter, com latência e falhas injetáveis.
+
+    `latency(rng)` sorteia os segundos até o primeiro pedaço (ex.: lognormal
+    com cauda longa); depois a resposta sai em pedaços de ~4 caracteres a
+    cada `ms_per_chunk`. Com probabilidade `failure_rate` a chamada levanta
+    `error` (RuntimeError por padrão; RateLimitedError simula 429) no lugar
+    do primeiro pedaço. `broken=True` faz todas falharem. O cancelamento é
+    atendido na hora, inclusive durante a espera: simula fechar a conexão.
+    """
+
+    def __init__(self, name: str, latency=None, failure_rate: float = 0.0, responder=None,
+                 ms_per_chunk: float = 0.0, error=None, seed: int = 0):
+        self.name = name
+        self.latency = latency or (lambda rng: 0.05)
+        self.failure_rate = failure_rate
+        self.responder = responder or _first_market_responder
+        self.ms_per_chunk = ms_per_chunk
+        self.error = error or (lambda: RuntimeError(f"{name}: falha simulada"))
+        self.broken = False
+        self.calls = 0
+        self.cancelled = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def stream(self, prompt: str, max_tokens: int, cancel: threading.Event | None = None):
+        cancel = cancel or threading.Event()
+        with self._lock:
+            self.calls += 1
+            delay = self.latency(self._rng)
+            fails = self.broken or self._rng.random() < self.failure_rate
+        if cancel.wait(delay):
+            self.cancelled += 1
+            return
+        if fails:
+            raise self.error()
+        text = self.responder(prompt)
+        for i in range(0, len(text), 4):
+            if i and self.ms_per_chunk and cancel.wait(self.ms_per_chunk / 1000):
+                self.cancelled += 1
+                return
+            yield text[i:i + 4]
+
+
+def lognormal_latency(median_s: float, sigma: float = 0.5, spike_rate: float = 0.0, spike_s: float = 0.0):
+    """Latência lognormal em torno de `median_s`; com `spike_rate`, alguns pedidos ganham +`spike_s` (cauda)."""
+    mu = math.log(median_s)
+
+    def sample(rng: random.Random) -> float:
+        latency = rng.lognormvariate(mu, sigma)
+        if spike_rate and rng.random() < spike_rate:
+            latency += spike_s
+        return latency
+
+    return sample
+
+
+# ── Servidores HTTP locais ─────────────────────────────────────────────────────
+class _LocalServer:
+    """Base: sobe um aiohttp.web.Application em 127.0.0.1 numa porta livre."""
+
+    def __init__(self, latency_ms: float = 0.0):
+        self.latency_ms = latency_ms
+        self.requests = 0
+        self.url = ""
+        self._runner: web.AppRunner | None = None
+
+    def _routes(self, app: web.Application):
+        raise NotImplementedError
+
+    async def _delay(self):
+        self.requests += 1
+        if self.latency_ms:
+            await asyncio.sleep(self.latency_ms / 1000)
+
+    async def __aenter__(self):
+        app = web.Application()
+        self._routes(app)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        self.url = f"http://127.0.0.1:{port}"
+        return self
+
+    async def __aexit__(self, *exc):
+        await self._runner.cleanup()
+
+
+def gamma_row(row: dict) -> dict:
+    """Converte uma linha sintética para o formato JSON da Gamma API."""
+    return {
+        "conditionId": row["conditionId"],
+        "question": row["question"],
+        "description": row["description"],
+        "volume24hr": row["volume24hr"],
+        "endDate": row["endDate"],
+        "slug": row["slug"],
+        "category": row.get("category", ""),
+        "active": True,
+        "closed": row.get("closed", False),
+        "tokens": [
+            {"outcome": "Yes", "price": row["yes_price"], "token_id": f"{row['conditionId']}-yes"},
+            {"outcome": "No", "price": row["no_price"], "token_id": f"{row['conditionId']}-no"},
+        ],
+    }
+
+
+class FakeGammaServer(_LocalServer):
+    """
+    Stand-in do endpoint GET /markets da Gamma API.
+    Suporta limit/offset e ordenação por id ou volume24hr; `mutate()` mexe
+    nos preços e fecha mercados para simular o catálogo andando entre syncs.
+    """
+
+    def __init__(self, rows: list[dict], latency_ms: float = 0.0):
+        super().__init__(latency_ms)
+        self.rows = [gamma_row(r) for r in rows]
+
+    def _routes(self, app: web.Application):
+        app.router.add_get("/markets", self._markets)
+
+    async def _markets(self, request: web.Request) -> web.Response:
+        await self._delay()
+        q = request.query
+        limit = int(q.get("limit", 100))
+        offset = int(q.get("offset", 0))
+        rows = [r for r in self.rows if not r["closed"]]
+        if q.get("order") == "volume24hr":
+            rows = sorted(rows, key=lambda r: r["volume24hr"], reverse=q.get("ascending") != "true")
+        return web.json_response(rows[offset:offset + limit])
+
+    def mutate(self, price_fraction: float = 0.1, close_fraction: float = 0.01, seed: int = 1):
+        rng = random.Random(seed)
+        for r in self.rows:
+            x = rng.random()
+            if x < close_fraction:
+                r["closed"] = True
+            elif x < close_fraction + price_fraction:
+                yes = round(rng.uniform(0.02, 0.98), 3)
+                r["tokens"][0]["price"] = yes
+                r["tokens"][1]["price"] = round(1 - yes, 3)
+
+
+class FakeClobServer(_LocalServer):
+    """
+    Stand-in do CLOB: websocket do canal market (/ws/market) e POST /midpoints.
+
+    `push(n, per_frame)` envia n eventos price_change para os tokens
+    assinados; `sent_at[token_id]` guarda quando o último preço daquele
+    token saiu do servidor, para medir latência preço → alerta.
+    """
+
+    def __init__(self, latency_ms: float = 0.0, seed: int = 3):
+        super().__init__(latency_ms)
+        self.rng = random.Random(seed)
+        self.prices: dict[str, float] = {}
+        self.sent_at: dict[str, float] = {}
+        self.subscribed: list[str] = []
+        self._sockets: list[web.WebSocketResponse] = []
+        self.subscribed_event = asyncio.Event()
+
+    @property
+    def ws_url(self) -> str:
+        return self.url.replace("http://", "ws://") + "/ws/market"
+
+    def _routes(self, app: web.Application):
+        app.router.add_get("/ws/market", self._ws)
+        app.router.add_post("/midpoints", self._midpoints)
+
+    async def _ws(self, request: web.Request):
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        self._sockets.append(ws)
+        async for msg in ws:
+            if msg.data == "PING":
+                await ws.send_str("PONG")
+                continue
+            self.subscribed = json.loads(msg.data).get("assets_ids", [])
+            self.subscribed_event.set()
+        self._sockets.remove(ws)
+        return ws
+
+    async def _midpoints(self, request: web.Request) -> web.Response:
+        await self._delay()
+        body = await request.json()
+        now = time.time()
+        out = {}
+        for item in body:
+            token = item["token_id"]
+            out[token] = str(self.prices.setdefault(token, round(self.rng.uniform(0.05, 0.95), 3)))
+            self.sent_at[token] = now
+        return web.json_response(out)
+
+    async def push(self, n: int, per_frame: int = 50, price_fn=None):
+        """Envia n ticks price_change, `per_frame` por frame do websocket."""
+        tokens = self.subscribed
+        sent = 0
+        while sent < n:
+            frame = []
+            for _ in range(min(per_frame, n - sent)):
+                token = self.rng.choice(tokens)
+                price = price_fn(token) if price_fn else round(self.rng.uniform(0.05, 0.95), 3)
+                self.prices[token] = price
+                frame.append({"asset_id": token, "price": str(price)})
+                sent += 1
+            now = time.time()
+            for token in {c["asset_id"] for c in frame}:
+                self.sent_at[token] = now
+            data = json.dumps([{"event_type": "price_change", "price_changes": frame}])
+            for ws in list(self._sockets):
+                await ws.send_str(data)
+            await asyncio.sleep(0)
+
+
+class FakeTelegramBotServer(_LocalServer):
+    """
+    Stand-in do POST /bot<token>/sendMessage da Bot API do Telegram.
+    Guarda (horário de chegada, texto) de cada mensagem em `messages`;
+    use `base_url` no TelegramNotifier.
+
+    Com `chat_rate`/`global_rate` (mensagens/s) aplica limites como os da
+    Bot API: o que passar responde 429 com parameters.retry_after e não
+    entra em `messages` (contado em `rate_limited`).
+    """
+
+    def __init__(self, latency_ms: float = 0.0, chat_rate: float = 0.0, global_rate: float = 0.0):
+        super().__init__(latency_ms)
+        self.messages: list[tuple[float, str]] = []
+        self.chat_rate = chat_rate
+        self.global_rate = global_rate
+        self.rate_limited = 0
+        self._last_by_chat: dict[str, float] = {}
+        self._recent: list[float] = []
+
+    @property
+    def base_url(self) -> str:
+        return f"{self.url}/botTEST"
+
+    def _routes(self, app: web.Application):
+        app.router.add_post("/{bot}/sendMessage", self._send_message)
+
+    def _retry_after(self, chat_id: str, now: float) -> float:
+        if self.chat_rate:
+            last = self._last_by_chat.get(chat_id)
+            if last is not None and now - last < 1 / self.chat_rate:
+                return 1 / self.chat_rate - (now - last)
+        if self.global_rate:
+            self._recent = [t for t in self._recent if now - t < 1.0]
+            if len(self._recent) >= self.global_rate:
+                return 1.0 - (now - self._recent[0])
+        return 0.0
+
+    async def _send_message(self, request: web.Request) -> web.Response:
+        body = await request.json()
+        now = time.perf_counter()
+        chat_id = str(body.get("chat_id", ""))
+        wait = self._retry_after(chat_id, now)
+        if wait > 0:
+            self.rate_limited += 1
+            return web.json_response({
+                "ok": False, "error_code": 429, "description": "Too Many Requests",
+                "parameters": {"retry_after": max(1, round(wait))},
+            }, status=429)
+        self._last_by_chat[chat_id] = now
+        self._recent.append(now)
+        self.messages.append((now, body.get("text", "")))
+        await self._delay()
+        return web.json_response({"ok": True, "result": {"message_id": len(self.messages)}})
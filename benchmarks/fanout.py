@@ -0,0 +1,147 @@
+"""
+Benchmark do fan-out de alertas para muitos assinantes.
+
+1. Matching: N assinaturas sintéticas (palavras-chave, categorias, edge
+   mínimo, direção) contra oportunidades sobre o catálogo sintético —
+   SubscriptionRegistry indexado contra uma varredura linear com as mesmas
+   regras (os resultados são conferidos).
+2. Envio: uma rajada de alertas para C chats numa Bot API local que aplica
+   os limites do Telegram (429 com retry_after) — POST direto, um por
+   alerta, contra o SendScheduler (limites, reenvio e batching por chat).
+
+Uso:
+  python -m benchmarks.fanout --subscribers 5000 --chats 50 --alerts 10
+"""
+
+import argparse
+import asyncio
+import logging
+import random
+import statistics
+import time
+
+from analyzer.ai_analyzer import Opportunity
+from analyzer.market_index import tokenize
+from alerts.notifier import TelegramNotifier
+from alerts.scheduler import SendScheduler
+from alerts.subscriptions import Subscription, SubscriptionRegistry
+from benchmarks.fakes import FakeTelegramBotServer, synthetic_markets
+from core.http import AsyncHTTPPool
+
+
+def _subscriptions(n: int, markets, seed: int = 5) -> list[Subscription]:
+    rng = random.Random(seed)
+    vocab = sorted({t for m in markets for t in tokenize(m.question)})
+    categories = sorted({m.category for m in markets})
+    subs = []
+    for i in range(n):
+        kind = rng.random()
+        subs.append(Subscription(
+            chat_id=str(100000 + i),
+            min_edge=rng.choice([0.0, 0.05, 0.1, 0.15, 0.2]),
+            directions=rng.choice([("YES", "NO"), ("YES",), ("NO",)]),
+            keywords=tuple(rng.sample(vocab, rng.randint(1, 3))) if kind < 0.6 else (),
+            categories=(rng.choice(categories),) if 0.4 < kind < 0.9 else (),
+        ))
+    return subs
+
+
+def _linear_match(subs: list[Subscription], opp: Opportunity) -> list[str]:
+    """Mesmas regras do SubscriptionRegistry, testando uma assinatura por vez."""
+    terms = set(tokenize(opp.market.question))
+    chats = []
+    for s in subs:
+        if abs(opp.edge) < s.min_edge or opp.direction not in s.directions:
+            continue
+        if s.keywords or s.categories:
+            topical = (opp.market.category.lower() in {c.lower() for c in s.categories}
+                       or any(set(tokenize(kw)) <= terms for kw in s.keywords))
+            if not topical:
+                continue
+        chats.append(s.chat_id)
+    return list(dict.fromkeys(chats))
+
+
+def _opportunities(markets, n: int, seed: int = 9) -> list[Opportunity]:
+    rng = random.Random(seed)
+    opps = []
+    for _ in range(n):
+        m = rng.choice(markets)
+        edge = round(rng.uniform(0.07, 0.3), 3)
+        opps.append(Opportunity(m, rng.choice(["YES", "NO"]), m.yes_price, min(1.0, m.yes_price + edge),
+                                edge, "benchmark", "notícia sintética", "@bench"))
+    return opps
+
+
+def bench_match(args):
+    markets = synthetic_markets(args.markets)
+    subs = _subscriptions(args.subscribers, markets)
+    registry = SubscriptionRegistry(subs, reload_interval=0)
+    opps = _opportunities(markets, args.opportunities)
+
+    rows = []
+    for name, fn in (("linear", lambda o: _linear_match(subs, o)), ("indexado", registry.match)):
+        times, recipients = [], []
+        for opp in opps:
+            started = time.perf_counter()
+            chats = fn(opp)
+            times.append((time.perf_counter() - started) * 1e6)
+            recipients.append(chats)
+        rows.append((name, times, recipients))
+
+    assert all(sorted(a) == sorted(b) for a, b in zip(rows[0][2], rows[1][2])), "resultados diferentes"
+    print(f"\n{args.subscribers} assinaturas | {len(markets)} mercados | {len(opps)} oportunidades | "
+          f"{statistics.mean(len(r) for r in rows[1][2]):.0f} chats por oportunidade em média\n")
+    print(f"{'matching':<10}{'p50 µs':>10}{'p95 µs':>10}")
+    for name, times, _ in rows:
+        ordered = sorted(times)
+        print(f"{name:<10}{statistics.median(times):>10.0f}{ordered[int(0.95 * (len(ordered) - 1))]:>10.0f}")
+
+
+async def bench_send(args):
+    markets = synthetic_markets(50)
+    opps = _opportunities(markets, args.alerts)
+    chats = [str(200000 + i) for i in range(args.chats)]
+    expected = len(opps) * len(chats)
+
+    print(f"\n{len(opps)} alertas × {len(chats)} chats = {expected} mensagens | Bot API local: "
+          f"{args.chat_rate:g}/s por chat, {args.global_rate:g}/s no total\n")
+    print(f"{'envio':<12}{'entregues':>11}{'429':>7}{'mensagens':>11}{'tempo':>9}")
+    for mode in ("direto", "scheduler"):
+        async with FakeTelegramBotServer(args.telegram_ms, chat_rate=args.chat_rate,
+                                         global_rate=args.global_rate) as bot:
+            http = AsyncHTTPPool(limit_per_host=100)
+            notifier = TelegramNotifier(http=http, base_url=bot.base_url)
+            if mode == "scheduler":
+                notifier.scheduler = SendScheduler(notifier.deliver, global_rate=args.global_rate,
+                                                   chat_rate=args.chat_rate, group_rate=args.chat_rate)
+            started = time.perf_counter()
+            await asyncio.gather(*(notifier.send_opportunity_async(opp, chats) for opp in opps))
+            if notifier.scheduler is not None:
+                await notifier.scheduler.flush()
+            elapsed = time.perf_counter() - started
+            delivered = sum(text.count("OPORTUNIDADE DETECTADA") for _, text in bot.messages)
+            await notifier.close()
+            await http.close()
+        print(f"{mode:<12}{delivered:>7}/{expected:<4}{bot.rate_limited:>6}{len(bot.messages):>11}{elapsed:>8.1f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--subscribers", type=int, default=5000)
+    parser.add_argument("--markets", type=int, default=2000)
+    parser.add_argument("--opportunities", type=int, default=500)
+    parser.add_argument("--chats", type=int, default=50)
+    parser.add_argument("--alerts", type=int, default=10, help="rajada de oportunidades para os mesmos chats")
+    parser.add_argument("--chat-rate", type=float, default=1.0)
+    parser.add_argument("--global-rate", type=float, default=30.0)
+    parser.add_argument("--telegram-ms", type=float, default=30.0)
+    args = parser.parse_args()
+    logging.disable(logging.ERROR)  # os 429 do envio direto são esperados
+
+    bench_match(args)
+    asyncio.run(bench_send(args))
+
+
+if __name__ == "__main__":
+    main()
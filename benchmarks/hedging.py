@@ -0,0 +1,119 @@
+"""
+Benchmark do roteador de LLM (hedge e circuit breaker) com provedores stub.
+
+1. Cauda: o provedor principal tem latência lognormal com picos ocasionais
+   (a cauda que atrasa o alerta); o secundário é um pouco mais lento na
+   mediana, mas sem picos. Compara só o principal, failover sem hedge e
+   hedge no p90 — p50/p95/p99 e quantas chamadas extras o hedge custou.
+2. Breaker: o principal passa a falhar todas as chamadas no meio da
+   rodada e volta depois. Mede quantas chamadas ainda chegam a ele enquanto
+   está quebrado e a latência nesse trecho.
+
+Uso:
+  python -m benchmarks.hedging --requests 400 --spike-rate 0.08
+"""
+
+import argparse
+import logging
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from analyzer.json_stream import parse_json_response
+from analyzer.router import LLMRouter
+from benchmarks.fakes import StubProvider, lognormal_latency
+
+_PROMPT = 'MERCADOS:\n[{"id": "0xbench", "question": "?"}]'
+
+
+def _percentiles(values: list[float]) -> tuple[float, float, float]:
+    ordered = sorted(values)
+    pick = lambda q: ordered[int(q * (len(ordered) - 1))]
+    return statistics.median(ordered), pick(0.95), pick(0.99)
+
+
+def _providers(args, seed: int):
+    primary = StubProvider("primario", lognormal_latency(args.primary_ms / 1000, 0.3, args.spike_rate,
+                                                         args.spike_ms / 1000),
+                           ms_per_chunk=args.chunk_ms, seed=seed)
+    secondary = StubProvider("secundario", lognormal_latency(args.secondary_ms / 1000, 0.3),
+                             ms_per_chunk=args.chunk_ms, seed=seed + 1)
+    return primary, secondary
+
+
+def _run(router: LLMRouter, n: int, concurrency: int, on_request=None) -> list[float]:
+    def one(i: int) -> float:
+        if on_request is not None:
+            on_request(i)
+        started = time.perf_counter()
+        router.complete(_PROMPT, 500, validate=parse_json_response)
+        return (time.perf_counter() - started) * 1000
+
+    with ThreadPoolExecutor(concurrency) as pool:
+        return list(pool.map(one, range(n)))
+
+
+def bench_tail(args):
+    print(f"\nprincipal: mediana {args.primary_ms:.0f} ms, {args.spike_rate:.0%} com +{args.spike_ms:.0f} ms | "
+          f"secundário: mediana {args.secondary_ms:.0f} ms | {args.requests} chamadas\n")
+    print(f"{'modo':<16}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'chamadas':>10}{'canceladas':>12}")
+    for mode in ("só principal", "failover", "hedge p90"):
+        primary, secondary = _providers(args, seed=3)
+        providers = [primary] if mode == "só principal" else [primary, secondary]
+        router = LLMRouter(providers, hedge=mode == "hedge p90", min_delay=0.05)
+        _run(router, args.warmup, args.concurrency)  # amostras para o p90
+        for p in providers:
+            p.calls = p.cancelled = 0
+        lat = _run(router, args.requests, args.concurrency)
+        calls = sum(p.calls for p in providers)
+        cancelled = sum(p.cancelled for p in providers)
+        p50, p95, p99 = _percentiles(lat)
+        print(f"{mode:<16}{p50:>9.0f}{p95:>9.0f}{p99:>9.0f}{calls:>10}{cancelled:>12}")
+
+
+def bench_breaker(args):
+    primary, secondary = _providers(args, seed=7)
+    router = LLMRouter([primary, secondary], hedge=True, min_delay=0.05,
+                       breaker_failures=3, breaker_cooldown=args.cooldown_s)
+    _run(router, args.warmup, args.concurrency)
+
+    n = args.requests
+    broken_range = range(n // 3, 2 * n // 3)
+    calls_while_broken = []
+
+    def on_request(i: int):
+        primary.broken = i in broken_range
+        if primary.broken:
+            calls_while_broken.append(primary.calls)
+
+    lat = _run(router, n, 1, on_request)
+    broken_lat = [lat[i] for i in broken_range]
+    healthy_lat = [lat[i] for i in range(n) if i not in broken_range]
+    hits = calls_while_broken[-1] - calls_while_broken[0] + 1 if calls_while_broken else 0
+    print(f"\nbreaker: principal quebrado em {len(broken_range)} de {n} chamadas (sequenciais), "
+          f"cooldown {args.cooldown_s:g}s")
+    print(f"chamadas que ainda foram ao principal quebrado: {hits} | "
+          f"p50 quebrado {statistics.median(broken_lat):.0f} ms vs saudável {statistics.median(healthy_lat):.0f} ms | "
+          f"breaker {'aberto' if router.health[primary.name].is_open() else 'fechado'} no fim")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--warmup", type=int, default=40)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--primary-ms", type=float, default=150.0)
+    parser.add_argument("--secondary-ms", type=float, default=200.0)
+    parser.add_argument("--spike-rate", type=float, default=0.08)
+    parser.add_argument("--spike-ms", type=float, default=1500.0)
+    parser.add_argument("--chunk-ms", type=float, default=0.5)
+    parser.add_argument("--cooldown-s", type=float, default=2.0)
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)  # falhas simuladas são esperadas
+
+    bench_tail(args)
+    bench_breaker(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""
+Benchmark da entrada de mensagens: handler do Telegram processando a
+notícia inline contra o spool durável (IngestSpool) com workers.
+
+Uma rajada de mensagens chega na taxa `--rate`; o Telethon entrega uma
+por vez e só passa à próxima quando o handler retorna. O processamento
+(process_news) é simulado com latência lognormal. Mede:
+  - atraso de ingestão: chegada da mensagem → handler do Telegram liberado
+  - chegada → análise concluída (p50/p95) e tempo para drenar a rajada
+  - crash no meio da rajada: o que ficou no spool volta no restart e
+    nenhuma mensagem se perde
+
+Uso:
+  python -m benchmarks.ingest --messages 300 --rate 100 --workers 16
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import random
+import statistics
+import tempfile
+import time
+
+from benchmarks.fakes import lognormal_latency, synthetic_market_rows, synthetic_news
+from sources.spool import IngestSpool
+
+
+def _pct(values: list[float], q: float) -> float:
+    values = sorted(values)
+    return values[int(q * (len(values) - 1))] if values else 0.0
+
+
+async def _burst(news_items: list[dict], rate: float, deliver, stop_after: float | None = None,
+                 arrivals: dict[int, float] | None = None) -> list[float]:
+    """Entrega as mensagens como o Telethon (uma por vez, na ordem); retorna o atraso de ingestão de cada uma."""
+    started = time.perf_counter()
+    delays = []
+    for i, news in enumerate(news_items):
+        arrival = started + i / rate
+        if stop_after is not None and arrival - started >= stop_after:
+            break
+        if arrivals is not None:
+            arrivals[news["message_id"]] = arrival
+        await asyncio.sleep(max(0.0, arrival - time.perf_counter()))
+        await deliver(news)
+        delays.append(time.perf_counter() - arrival)
+    return delays
+
+
+async def _run(news_items: list[dict], args, path: str | None) -> dict:
+    rng = random.Random(11)
+    latency = lognormal_latency(args.process_ms / 1000)
+    arrivals: dict[int, float] = {}
+    finished: dict[int, float] = {}
+
+    async def process(news: dict):
+        await asyncio.sleep(latency(rng))
+        finished[news["message_id"]] = time.perf_counter()
+
+    started = time.perf_counter()
+    if path is None:
+        delays = await _burst(news_items, args.rate, process, arrivals=arrivals)
+    else:
+        spool = IngestSpool(path, workers=args.workers)
+        spool.start(process)
+        delays = await _burst(news_items, args.rate, spool.put, arrivals=arrivals)
+        await spool.join()
+        await spool.stop()
+        spool.close()
+    drained = time.perf_counter() - started
+
+    e2e = [finished[i] - arrivals[i] for i in finished]
+    return {"ingest_p95": _pct(delays, 0.95), "ingest_max": max(delays), "e2e_p50": statistics.median(e2e),
+            "e2e_p95": _pct(e2e, 0.95), "drained": drained, "done": len(finished)}
+
+
+async def _crash(news_items: list[dict], args, path: str) -> dict:
+    """Derruba os workers no meio da rajada, reabre o spool e confere que todas as mensagens foram processadas."""
+    rng = random.Random(13)
+    latency = lognormal_latency(args.process_ms / 1000)
+    done: set[int] = set()
+
+    async def process(news: dict):
+        await asyncio.sleep(latency(rng))
+        done.add(news["message_id"])
+
+    spool = IngestSpool(path, workers=args.workers)
+    spool.start(process)
+    await _burst(news_items, args.rate, spool.put, stop_after=len(news_items) / args.rate / 2)
+    await spool.stop()   # crash: o que estava na fila ou em andamento fica no disco
+    pending = len(spool)
+    delivered = len(done) + pending
+    spool.close()
+
+    spool = IngestSpool(path, workers=args.workers)
+    spool.start(process)
+    await _burst(news_items[delivered:], args.rate, spool.put)
+    await spool.join()
+    await spool.stop()
+    spool.close()
+    return {"pending": pending, "done": len(done), "total": len(news_items)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=300)
+    parser.add_argument("--rate", type=float, default=100.0, help="mensagens/s na rajada")
+    parser.add_argument("--workers", type=int, default=16)
+    parser.add_argument("--process-ms", type=float, default=150.0, help="mediana do process_news simulado")
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+
+    news_items = synthetic_news(synthetic_market_rows(200), args.messages)
+    print(f"\n{args.messages} mensagens a {args.rate:.0f}/s | process_news ~{args.process_ms:.0f} ms | "
+          f"{args.workers} workers\n")
+    print(f"{'modo':<20}{'ingest p95':>12}{'ingest máx':>12}{'e2e p50':>10}{'e2e p95':>10}{'drenagem':>10}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for label, path in (("handler inline", None), ("spool + workers", os.path.join(tmp, "spool.sqlite3"))):
+            r = asyncio.run(_run(news_items, args, path))
+            print(f"{label:<20}{r['ingest_p95'] * 1000:>10.1f}ms{r['ingest_max'] * 1000:>10.1f}ms"
+                  f"{r['e2e_p50']:>9.2f}s{r['e2e_p95']:>9.2f}s{r['drained']:>9.1f}s")
+
+        r = asyncio.run(_crash(news_items, args, os.path.join(tmp, "crash.sqlite3")))
+        print(f"\ncrash na metade da rajada: {r['pending']} mensagens pendentes no spool | "
+              f"processadas depois do restart: {r['done']}/{r['total']} | perdidas: {r['total'] - r['done']}")
+
+
+if __name__ == "__main__":
+    main()
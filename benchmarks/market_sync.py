@@ -0,0 +1,72 @@
+"""
+Benchmark do sync completo do catálogo (MARKET_SYNC_MODE=full).
+
+Sobe um stand-in local da Gamma API com N mercados e mede:
+  - sync frio (store vazio)
+  - sync incremental depois de mexer em preços e fechar alguns mercados
+  - memória alocada (tracemalloc) pelo store
+
+Uso:
+  python -m benchmarks.market_sync --markets 10000 50000 --concurrency 8
+"""
+
+import argparse
+import asyncio
+import time
+import tracemalloc
+
+from benchmarks.fakes import FakeGammaServer, synthetic_market_rows
+from core.http import AsyncHTTPPool
+from polymarket.client import PolymarketClient
+from polymarket.store import MarketStore
+
+
+async def _bench(n: int, page_size: int, concurrency: int, latency_ms: float):
+    async with FakeGammaServer(synthetic_market_rows(n), latency_ms=latency_ms) as server:
+        http = AsyncHTTPPool(limit_per_host=concurrency)
+        client = PolymarketClient(http=http, base_url=server.url)
+        store = MarketStore()
+
+        tracemalloc.start()
+        start = time.perf_counter()
+        markets = await client.fetch_all_async(page_size=page_size, concurrency=concurrency)
+        cold_stats = store.merge(markets)
+        cold_s = time.perf_counter() - start
+        del markets
+        mem_mb = tracemalloc.get_traced_memory()[0] / 1e6
+        tracemalloc.stop()
+
+        server.mutate(price_fraction=0.1, close_fraction=0.01)
+        start = time.perf_counter()
+        delta_stats = store.merge(await client.fetch_all_async(page_size=page_size, concurrency=concurrency))
+        delta_s = time.perf_counter() - start
+
+        await http.close()
+        return {
+            "n": n, "cold_s": cold_s, "delta_s": delta_s, "mem_mb": mem_mb,
+            "requests": server.requests, "cold": cold_stats, "delta": delta_stats,
+        }
+
+
+async def _main(args):
+    print(f"\npage_size={args.page_size} concurrency={args.concurrency} "
+          f"latência/request={args.latency_ms:.0f} ms\n")
+    for n in args.markets:
+        r = await _bench(n, args.page_size, args.concurrency, args.latency_ms)
+        print(f"{r['n']:>6} mercados | frio {r['cold_s']:.2f}s | incremental {r['delta_s']:.2f}s | "
+              f"store {r['mem_mb']:.1f} MB | {r['requests']} requests")
+        print(f"{'':>6}   frio: {r['cold']}")
+        print(f"{'':>6}   incremental: {r['delta']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--markets", type=int, nargs="+", default=[10_000, 50_000])
+    parser.add_argument("--page-size", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--latency-ms", type=float, default=50.0, help="latência simulada por página")
+    asyncio.run(_main(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
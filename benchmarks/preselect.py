@@ -0,0 +1,91 @@
+"""
+Benchmark da pré-seleção BM25 em AIAnalyzer.analyze.
+
+Compara, num catálogo sintético de milhares de mercados:
+  - baseline:  catálogo por volume até o orçamento de tokens (PRESELECT_TOP_K=0)
+  - preselect: só os top-K candidatos do índice local
+
+Reporta tokens de entrada, latência ponta a ponta do analyze (com o LLM
+stub de latência proporcional ao prompt) e recall do mercado alvo.
+
+Uso:
+  python -m benchmarks.preselect --markets 5000 --news 20
+"""
+
+import argparse
+import statistics
+import time
+
+from analyzer.ai_analyzer import AIAnalyzer
+from analyzer.prompt import pack_markets
+from benchmarks.fakes import FakeAnthropic, estimate_tokens, synthetic_market_rows, synthetic_markets, synthetic_news
+
+
+def _run(label: str, analyzer: AIAnalyzer, news_items: list[dict], markets) -> dict:
+    latencies, tokens, hits = [], [], 0
+    for news in news_items:
+        candidates = analyzer.preselect(news, markets)
+        tokens.append(estimate_tokens(analyzer.build_prompt(news, candidates)) if candidates else 0)
+        sent = pack_markets(candidates, analyzer.prompt_budget).markets if candidates else []
+        hits += any(m.condition_id == news["target_id"] for m in sent)
+
+        start = time.perf_counter()
+        analyzer.analyze(news, markets)
+        latencies.append((time.perf_counter() - start) * 1000)
+
+    return {
+        "label": label,
+        "tokens_mean": statistics.mean(tokens),
+        "latency_p50": statistics.median(latencies),
+        "latency_p95": sorted(latencies)[int(0.95 * (len(latencies) - 1))],
+        "recall": hits / len(news_items),
+        "llm_calls": analyzer.client.calls,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--markets", type=int, default=5000)
+    parser.add_argument("--news", type=int, default=20)
+    parser.add_argument("--top-k", type=int, default=25)
+    parser.add_argument("--min-score", type=float, default=1.0)
+    parser.add_argument("--base-ms", type=float, default=300.0, help="latência fixa do LLM stub")
+    parser.add_argument("--ms-per-1k", type=float, default=100.0, help="latência por 1k tokens de entrada")
+    args = parser.parse_args()
+
+    rows = synthetic_market_rows(args.markets)
+    markets = synthetic_markets(args.markets)
+    news_items = synthetic_news(rows, args.news)
+
+    baseline = AIAnalyzer(client=FakeAnthropic(args.base_ms, args.ms_per_1k), top_k=0)
+
+    preselect = AIAnalyzer(client=FakeAnthropic(args.base_ms, args.ms_per_1k),
+                           top_k=args.top_k, min_score=args.min_score)
+    start = time.perf_counter()
+    preselect.update_index(markets)
+    build_ms = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    for news in news_items:
+        preselect.preselect(news, markets)
+    search_ms = (time.perf_counter() - start) * 1000 / len(news_items)
+
+    results = [
+        _run("baseline (por volume)", baseline, news_items, markets),
+        _run(f"preselect (top {args.top_k})", preselect, news_items, markets),
+    ]
+
+    print(f"\nCatálogo: {args.markets} mercados | {args.news} notícias")
+    print(f"Índice: build {build_ms:.0f} ms | busca {search_ms:.2f} ms/notícia\n")
+    print(f"{'modo':<26}{'tokens/prompt':>14}{'p50 ms':>10}{'p95 ms':>10}{'recall':>9}{'chamadas':>10}")
+    for r in results:
+        print(f"{r['label']:<26}{r['tokens_mean']:>14.0f}{r['latency_p50']:>10.0f}"
+              f"{r['latency_p95']:>10.0f}{r['recall']:>9.0%}{r['llm_calls']:>10}")
+
+    base, pre = results
+    print(f"\nRedução de tokens: {1 - pre['tokens_mean'] / base['tokens_mean']:.0%} | "
+          f"redução de latência p50: {1 - pre['latency_p50'] / base['latency_p50']:.0%}")
+
+
+if __name__ == "__main__":
+    main()
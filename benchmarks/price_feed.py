@@ -0,0 +1,89 @@
+"""
+Benchmark do feed de preços ao vivo (LivePriceTable + PriceFeed).
+
+Sobe um CLOB falso local (websocket + /midpoints) e mede:
+  - throughput: ticks aplicados por segundo na tabela
+  - latência preço → alerta: do envio do tick no servidor até o
+    re-preço de uma oportunidade pendente cruzar o threshold
+
+Uso:
+  python -m benchmarks.price_feed --markets 500 --ticks 200000
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+
+from benchmarks.fakes import FakeClobServer, synthetic_markets
+from core.http import AsyncHTTPPool
+from polymarket.price_feed import LivePriceTable, PriceFeed
+from config import MIN_EDGE_THRESHOLD
+
+
+def _pct(values: list[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[int(q * (len(ordered) - 1))]
+
+
+async def _main(args):
+    markets = synthetic_markets(args.markets)
+    for m in markets:
+        m.yes_token_id, m.no_token_id = f"{m.condition_id}-yes", f"{m.condition_id}-no"
+
+    async with FakeClobServer() as server:
+        http = AsyncHTTPPool()
+        table = LivePriceTable()
+        feed = PriceFeed(table, http=http, mode=args.mode, max_markets=args.markets,
+                         poll_interval=0.05, ws_url=server.ws_url, clob_url=server.url)
+        feed.track(markets)
+
+        # Oportunidades pendentes: o LLM estimou 0.60 para o YES de cada mercado;
+        # um tick que derruba o preço abaixo de 0.60 - threshold abre o edge.
+        true_prob = 0.60
+        alert_latencies: list[float] = []
+        by_token = {m.condition_id: m.yes_token_id for m in markets}
+
+        def on_tick(cid, yes, no, ts):
+            if true_prob - yes >= MIN_EDGE_THRESHOLD:
+                sent = server.sent_at.get(by_token[cid])
+                if sent:
+                    alert_latencies.append((time.time() - sent) * 1000)
+
+        table.on_update(on_tick)
+        feed.start()
+
+        if args.mode == "ws":
+            await asyncio.wait_for(server.subscribed_event.wait(), timeout=10)
+            start = time.perf_counter()
+            await server.push(args.ticks, per_frame=args.per_frame)
+            while table.updates < args.ticks:
+                await asyncio.sleep(0.001)
+        else:
+            start = time.perf_counter()
+            while table.updates < args.ticks:
+                await asyncio.sleep(0.01)
+        elapsed = time.perf_counter() - start
+
+        await feed.stop()
+        await http.close()
+
+    print(f"\nmodo={args.mode} | {args.markets} mercados ({len(table)} na tabela) | {table.updates} ticks")
+    print(f"throughput: {table.updates / elapsed:,.0f} ticks/s ({elapsed:.2f}s)")
+    if alert_latencies:
+        print(f"preço → alerta: p50 {statistics.median(alert_latencies):.2f} ms | "
+              f"p95 {_pct(alert_latencies, 0.95):.2f} ms | p99 {_pct(alert_latencies, 0.99):.2f} ms "
+              f"({len(alert_latencies)} alertas)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--markets", type=int, default=500)
+    parser.add_argument("--ticks", type=int, default=200_000)
+    parser.add_argument("--per-frame", type=int, default=50)
+    parser.add_argument("--mode", choices=["ws", "poll"], default="ws")
+    asyncio.run(_main(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
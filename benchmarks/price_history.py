@@ -0,0 +1,84 @@
+"""
+Benchmark do histórico de preços (PriceHistory).
+
+Preenche os ring buffers de N mercados com refreshes do catálogo e ticks
+sintéticos (passeio aleatório; uma fração dos mercados dá um salto perto do
+fim, como quem reage a uma notícia) e mede:
+  - ticks/s gravados e memória fixa dos buffers
+  - latência de priced_in() para a pré-seleção de uma notícia (top-K candidatos)
+  - quantos saltos são detectados e quantos mercados parados são marcados por engano
+
+Uso:
+  python -m benchmarks.price_history --markets 5000 --ticks 500000
+"""
+
+import argparse
+import random
+import statistics
+import time
+
+from benchmarks.fakes import synthetic_markets
+from polymarket.price_history import PriceHistory
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--markets", type=int, default=5000)
+    parser.add_argument("--ticks", type=int, default=500_000)
+    parser.add_argument("--span-s", type=float, default=3600.0, help="tempo simulado coberto pelos ticks")
+    parser.add_argument("--jump-fraction", type=float, default=0.05)
+    parser.add_argument("--top-k", type=int, default=25)
+    args = parser.parse_args()
+
+    rng = random.Random(1)
+    markets = synthetic_markets(args.markets)
+    history = PriceHistory(capacity=args.markets)
+    start = time.time() - args.span_s
+    news_ts = time.time() - 60
+
+    history.sync(markets, ts=start)
+    price = {m.condition_id: m.yes_price for m in markets}
+    jumped = set(rng.sample(sorted(price), int(args.markets * args.jump_fraction)))
+
+    ticks = []
+    jump_at = news_ts + 5
+    for i in range(args.ticks):
+        ts = start + args.span_s * i / args.ticks
+        if jump_at is not None and ts >= jump_at:
+            # salto de 10 pontos logo depois da notícia
+            for cid in jumped:
+                price[cid] = min(0.99, max(0.01, price[cid] + rng.choice([-0.1, 0.1])))
+                ticks.append((cid, price[cid], 1 - price[cid], ts))
+            jump_at = None
+        cid = markets[rng.randrange(len(markets))].condition_id
+        price[cid] = min(0.99, max(0.01, price[cid] + rng.gauss(0, 0.002)))
+        ticks.append((cid, price[cid], 1 - price[cid], ts))
+
+    started = time.perf_counter()
+    for cid, yes, no, ts in ticks:
+        history.record(cid, yes, no, ts)
+    elapsed = time.perf_counter() - started
+
+    nbytes = sum(a.nbytes for a in (history.ts, history.yes, history.no))
+    print(f"\n{args.markets} mercados | {len(ticks)} ticks em {args.span_s:.0f}s simulados | "
+          f"{history.size} pontos por mercado, resolução {history.resolution:.0f}s")
+    print(f"gravação: {len(ticks) / elapsed / 1e3:.0f}k ticks/s | memória dos buffers: {nbytes / 1e6:.1f} MB "
+          f"({nbytes / args.markets / 1e3:.1f} kB por mercado)")
+
+    since = news_ts - 120
+    lat = []
+    for _ in range(200):
+        candidates = rng.sample(markets, args.top_k)
+        t0 = time.perf_counter()
+        history.priced_in(candidates, since)
+        lat.append((time.perf_counter() - t0) * 1e6)
+    print(f"priced_in({args.top_k} candidatos): p50 {statistics.median(lat):.0f} µs | "
+          f"p95 {sorted(lat)[int(0.95 * (len(lat) - 1))]:.0f} µs")
+
+    moved = history.priced_in(markets, since)
+    print(f"saltos detectados: {len(moved & jumped)}/{len(jumped)} | "
+          f"mercados parados marcados: {len(moved - jumped)}/{args.markets - len(jumped)}")
+
+
+if __name__ == "__main__":
+    main()
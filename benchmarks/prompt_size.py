@@ -0,0 +1,137 @@
+"""
+Benchmark do formato do prompt: JSON indentado (formato antigo) contra a
+tabela compacta com IDs curtos e orçamento de tokens.
+
+Para o catálogo inteiro (PRESELECT_TOP_K=0) e para os candidatos da
+pré-seleção BM25, reporta:
+  - tokens estimados por prompt e mercados que couberam
+  - latência do analyze com o LLM stub (latência proporcional ao prompt)
+  - prefixo comum entre prompts de notícias consecutivas (o que o cache de
+    prompt dos provedores consegue reaproveitar)
+
+Uso:
+  python -m benchmarks.prompt_size --markets 5000 --news 20
+"""
+
+import argparse
+import json
+import os
+import statistics
+import time
+
+from analyzer.ai_analyzer import AIAnalyzer
+from analyzer.prompt import MarketTable, estimate_tokens
+from benchmarks.fakes import FakeAnthropic, synthetic_market_rows, synthetic_markets, synthetic_news
+from config import MIN_EDGE_THRESHOLD
+
+
+class _JSONPromptAnalyzer(AIAnalyzer):
+    """AIAnalyzer com o prompt antigo: notícia antes dos mercados, JSON com indent=2 e os 80 primeiros."""
+
+    def _prompt(self, news_list: list[dict], markets) -> tuple[str, MarketTable]:
+        markets = markets[:80]
+        summary = [
+            {"id": m.condition_id, "question": m.question, "yes_price": round(m.yes_price, 3),
+             "no_price": round(m.no_price, 3), "volume_24h": round(m.volume_24h, 0)}
+            for m in markets
+        ]
+        news = news_list[0]
+        prompt = f"""Você é um trader quantitativo especializado em mercados de previsão (Polymarket).
+
+NOTÍCIA RECEBIDA:
+Canal: {news['channel']}
+Horário: {news['timestamp']}
+Texto: {news['text']}
+
+MERCADOS ATIVOS NA POLYMARKET (YES_PRICE = probabilidade implícita do mercado):
+{json.dumps(summary, ensure_ascii=False, indent=2)}
+
+SUA TAREFA:
+1. Identifique APENAS os mercados que são diretamente afetados por essa notícia.
+2. Para cada mercado afetado, estime a probabilidade REAL do evento (considerando a notícia).
+3. Calcule o edge: (true_prob - yes_price) para YES, ou (true_prob - no_price) para NO.
+4. Retorne SOMENTE mercados com edge absoluto >= {MIN_EDGE_THRESHOLD} (ou seja, {MIN_EDGE_THRESHOLD * 100:.0f}%).
+
+Responda EXCLUSIVAMENTE em JSON válido, sem texto extra:
+{{
+  "opportunities": [
+    {{
+      "market_id": "condition_id do mercado",
+      "direction": "YES" ou "NO",
+      "true_prob": 0.XX,
+      "edge": 0.XX,
+      "reasoning": "explicação curta em português de por que a notícia afeta esse mercado"
+    }}
+  ]
+}}
+
+Se nenhum mercado for afetado com edge suficiente, retorne: {{"opportunities": []}}
+"""
+        return prompt, MarketTable("", markets, by_id={m.condition_id: m for m in markets})
+
+
+def _run(label: str, analyzer: AIAnalyzer, news_items: list[dict], markets) -> dict:
+    prompts, sizes, latencies = [], [], []
+    for news in news_items:
+        candidates = analyzer.preselect(news, markets)
+        prompt, table = analyzer._prompt([news], candidates)
+        prompts.append(prompt)
+        sizes.append(len(table.markets))
+
+        started = time.perf_counter()
+        analyzer.analyze(news, markets, candidates)
+        latencies.append((time.perf_counter() - started) * 1000)
+
+    shared = [len(os.path.commonprefix([a, b])) / len(b) for a, b in zip(prompts, prompts[1:])]
+    return {
+        "label": label,
+        "tokens": statistics.mean(estimate_tokens(p) for p in prompts),
+        "markets": statistics.mean(sizes),
+        "p50": statistics.median(latencies),
+        "p95": sorted(latencies)[int(0.95 * (len(latencies) - 1))],
+        "prefix": statistics.mean(shared) if shared else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--markets", type=int, default=5000)
+    parser.add_argument("--news", type=int, default=20)
+    parser.add_argument("--top-k", type=int, default=25)
+    parser.add_argument("--budget", type=int, default=2000, help="orçamento de tokens da tabela de mercados")
+    parser.add_argument("--base-ms", type=float, default=300.0, help="latência fixa do LLM stub")
+    parser.add_argument("--ms-per-1k", type=float, default=100.0, help="latência por 1k tokens de entrada")
+    args = parser.parse_args()
+
+    rows = synthetic_market_rows(args.markets)
+    markets = synthetic_markets(args.markets)  # já ordenado por volume, como o catálogo
+    news_items = synthetic_news(rows, args.news)
+
+    def llm():
+        return FakeAnthropic(args.base_ms, args.ms_per_1k)
+
+    # mesmo conjunto de mercados do formato antigo (80 primeiros), só muda a codificação
+    same_80 = AIAnalyzer(client=llm(), top_k=0, prompt_budget=0)
+    same_80.preselect = lambda news, markets: markets[:80]
+
+    setups = [
+        ("catálogo", "JSON (80 primeiros)", _JSONPromptAnalyzer(client=llm(), top_k=0)),
+        ("catálogo", "tabela (80 primeiros)", same_80),
+        ("catálogo", f"tabela (orçamento {args.budget})", AIAnalyzer(client=llm(), top_k=0, prompt_budget=args.budget)),
+        ("pré-seleção", f"JSON (top {args.top_k})", _JSONPromptAnalyzer(client=llm(), top_k=args.top_k)),
+        ("pré-seleção", f"tabela (top {args.top_k})", AIAnalyzer(client=llm(), top_k=args.top_k,
+                                                                prompt_budget=args.budget)),
+    ]
+
+    print(f"\nCatálogo: {args.markets} mercados | {args.news} notícias | LLM stub "
+          f"{args.base_ms:.0f} ms + {args.ms_per_1k:.0f} ms/1k tokens\n")
+    print(f"{'entrada':<13}{'formato':<26}{'tokens':>8}{'mercados':>10}{'p50 ms':>9}{'p95 ms':>9}{'prefixo comum':>15}")
+    for scope, label, analyzer in setups:
+        analyzer.update_index(markets)
+        r = _run(label, analyzer, news_items, markets)
+        print(f"{scope:<13}{r['label']:<26}{r['tokens']:>8.0f}{r['markets']:>10.0f}"
+              f"{r['p50']:>9.0f}{r['p95']:>9.0f}{r['prefix']:>15.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Benchmark do streaming da resposta do LLM (LLM_STREAMING).
+
+Compara, contra o LLM stub com geração token a token, os dois modos do
+AIAnalyzer para a mesma notícia:
+  - blocking:  analyze — a primeira oportunidade só sai depois do último token
+  - streaming: analyze_stream — cada oportunidade sai quando o objeto dela
+               fecha no JSON
+
+Reporta o tempo até a primeira oportunidade pronta para alerta e até a
+última (p50/p95), por notícia. O envio ao Telegram é o mesmo nos dois modos
+e fica fora da medida.
+
+Uso:
+  python -m benchmarks.streaming --news 20 --per-news 3 --ms-per-token 15
+"""
+
+import argparse
+import statistics
+import time
+
+from analyzer.ai_analyzer import AIAnalyzer
+from benchmarks.fakes import (
+    FakeAnthropic, multi_opportunity_responder, synthetic_market_rows,
+    synthetic_markets, synthetic_news,
+)
+
+
+def _pct(values: list[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[int(q * (len(ordered) - 1))]
+
+
+def _run(mode: str, news_list: list[dict], markets, args) -> dict:
+    client = FakeAnthropic(args.base_ms, args.ms_per_1k,
+                           responder=multi_opportunity_responder(args.per_news, args.reasoning_words),
+                           ms_per_output_token=args.ms_per_token)
+    analyzer = AIAnalyzer(client=client)
+    analyzer.update_index(markets)
+
+    first, last = [], []
+    for news in news_list:
+        arrivals: list[float] = []
+        started = time.perf_counter()
+        if mode == "blocking":
+            opportunities = analyzer.analyze(news, markets)
+            arrivals = [time.perf_counter()] * len(opportunities)
+        else:
+            analyzer.analyze_stream(news, markets, on_opportunity=lambda _: arrivals.append(time.perf_counter()))
+        if arrivals:
+            first.append((arrivals[0] - started) * 1000)
+            last.append((arrivals[-1] - started) * 1000)
+
+    return {
+        "mode": mode,
+        "alerts": len(last),
+        "first_p50": statistics.median(first) if first else 0.0,
+        "first_p95": _pct(first, 0.95) if first else 0.0,
+        "last_p50": statistics.median(last) if last else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--markets", type=int, default=500)
+    parser.add_argument("--news", type=int, default=20)
+    parser.add_argument("--per-news", type=int, default=3, help="oportunidades por resposta")
+    parser.add_argument("--reasoning-words", type=int, default=40)
+    parser.add_argument("--base-ms", type=float, default=400.0, help="latência até o primeiro token")
+    parser.add_argument("--ms-per-1k", type=float, default=100.0)
+    parser.add_argument("--ms-per-token", type=float, default=15.0, help="ritmo de geração da resposta")
+    args = parser.parse_args()
+
+    rows = synthetic_market_rows(args.markets)
+    markets = synthetic_markets(args.markets)
+    news_list = synthetic_news(rows, args.news)
+
+    print(f"\n{args.news} notícias | {args.per_news} oportunidades por resposta | "
+          f"primeiro token {args.base_ms:.0f} ms + {args.ms_per_token:.0f} ms/token\n")
+    print(f"{'modo':<11}{'notícias c/ alerta':>20}{'1º alerta p50':>15}{'p95':>9}{'último p50':>12}")
+    for mode in ("blocking", "streaming"):
+        r = _run(mode, news_list, markets, args)
+        print(f"{r['mode']:<11}{r['alerts']:>20}{r['first_p50']:>13.0f}ms{r['first_p95']:>7.0f}ms"
+              f"{r['last_p50']:>10.0f}ms")
+
+
+if __name__ == "__main__":
+    main()
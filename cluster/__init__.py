@@ -0,0 +1,7 @@
+"""
+Implantação em vários processos na mesma máquina.
+
+  - supervisor: divide os canais entre N workers, reinicia os que caem e é o
+                único dono do catálogo de mercados
+  - snapshots:  publica o catálogo do supervisor para os workers por unix socket
+"""
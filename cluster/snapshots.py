@@ -0,0 +1,188 @@
+import asyncio
+import logging
+import os
+import struct
+import time
+
+from core import metrics
+from polymarket.catalog import MarketSnapshot, snapshot_from_bytes, snapshot_to_bytes
+from polymarket.client import Market, PolymarketClient
+
+logger = logging.getLogger(__name__)
+
+_HEADER = struct.Struct("!I")   # tamanho do frame (bytes), big-endian
+
+_PUBLISHED = metrics.counter("catalog_snapshots_published_total", "Snapshots do catálogo enviados aos workers")
+_SUBSCRIBERS = metrics.gauge("catalog_subscribers", "Workers conectados ao publisher do catálogo")
+_RECEIVED = metrics.counter("catalog_snapshots_received_total", "Snapshots do catálogo recebidos do supervisor")
+_AGE = metrics.gauge("catalog_snapshot_age_seconds", "Idade do snapshot do catálogo")
+_WAIT_TIMEOUTS = metrics.counter("catalog_remote_wait_timeouts_total",
+                                 "Esperas pelo primeiro snapshot do supervisor que estouraram o prazo")
+
+
+def encode_frame(snapshot: MarketSnapshot) -> bytes:
+    """Frame com o snapshot inteiro: tamanho + snapshot_to_bytes."""
+    body = snapshot_to_bytes(snapshot)
+    return _HEADER.pack(len(body)) + body
+
+
+class SnapshotPublisher:
+    """
+    Lado do supervisor: serve o catálogo aos workers por um unix socket.
+
+    Ligado em PolymarketClient.on_refresh: a cada refresh o snapshot é
+    serializado uma vez e o mesmo frame vai para todos os workers. Quem
+    conecta depois (worker reiniciado) recebe o snapshot atual na hora.
+    Um worker lento não segura os outros: a escrita de cada um tem timeout
+    e a conexão é derrubada se não drenar.
+    """
+
+    def __init__(self, path: str, write_timeout: float = 10.0):
+        self.path = path
+        self.write_timeout = write_timeout
+        self._frame: bytes | None = None
+        self._version = 0
+        self._writers: set[asyncio.StreamWriter] = set()
+        self._server: asyncio.AbstractServer | None = None
+        self._tasks: set[asyncio.Task] = set()
+        _SUBSCRIBERS.set_function(lambda: len(self._writers))
+
+    async def start(self):
+        if os.path.dirname(self.path):
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        if os.path.exists(self.path):
+            os.unlink(self.path)  # socket de uma execução anterior
+        self._server = await asyncio.start_unix_server(self._handle, self.path)
+        logger.info(f"📡 Publicando o catálogo para os workers em {self.path}")
+
+    async def stop(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+        for writer in list(self._writers):
+            writer.close()
+        self._writers.clear()
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+
+    def publish(self, markets: list[Market]):
+        """Callback de on_refresh: serializa o catálogo novo e envia a todos."""
+        self._version += 1
+        self._frame = encode_frame(MarketSnapshot(markets, self._version, time.time()))
+        _PUBLISHED.inc()
+        for writer in list(self._writers):
+            task = asyncio.create_task(self._send(writer, self._frame))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self._writers.add(writer)
+        logger.info(f"🔌 Worker conectado ao catálogo ({len(self._writers)} conectados)")
+        if self._frame is not None:
+            await self._send(writer, self._frame)
+        try:
+            await reader.read()  # workers não mandam nada; retorna quando desconectam
+        except ConnectionError:
+            pass
+        finally:
+            self._drop(writer)
+
+    async def _send(self, writer: asyncio.StreamWriter, frame: bytes):
+        if writer not in self._writers:
+            return
+        try:
+            writer.write(frame)
+            await asyncio.wait_for(writer.drain(), self.write_timeout)
+        except (ConnectionError, asyncio.TimeoutError) as e:
+            logger.warning(f"Worker não recebeu o snapshot, desconectando: {e!r}")
+            self._drop(writer)
+
+    def _drop(self, writer: asyncio.StreamWriter):
+        if writer in self._writers:
+            self._writers.discard(writer)
+            writer.close()
+
+
+class RemoteCatalog:
+    """
+    Lado do worker: mesmo contrato do MarketCatalog (get, snapshot, refresh,
+    start, stop), mas o snapshot vem do supervisor pelo unix socket em vez
+    da Gamma API — um único dono do catálogo para todos os processos.
+
+    Cada snapshot recebido passa por `client.publish`, então os callbacks
+    de on_refresh (índice do analyzer, colunas, feed de preços) continuam
+    funcionando como no processo único. Reconecta sozinho se o supervisor
+    reiniciar o publisher.
+
+    Como no boot a frio do MarketCatalog, get() não espera para sempre: sem
+    snapshot em `ready_timeout` segundos, loga o erro e devolve o catálogo
+    vazio (a notícia é pulada); a próxima chamada espera de novo.
+    """
+
+    def __init__(self, path: str, client: PolymarketClient, reconnect_delay: float = 1.0,
+                 ready_timeout: float = 30.0):
+        self.path = path
+        self.client = client
+        self.reconnect_delay = reconnect_delay
+        self.ready_timeout = ready_timeout
+        self._snapshot = MarketSnapshot()
+        self._ready = asyncio.Event()
+        self._task: asyncio.Task | None = None
+        _AGE.set_function(lambda: self._snapshot.age)
+
+    @property
+    def snapshot(self) -> MarketSnapshot:
+        return self._snapshot
+
+    async def get(self) -> MarketSnapshot:
+        """Snapshot atual; só espera no primeiro, até o supervisor mandar o catálogo."""
+        if not self._snapshot.version:
+            self.start()
+            try:
+                await asyncio.wait_for(self._ready.wait(), self.ready_timeout)
+            except asyncio.TimeoutError:
+                _WAIT_TIMEOUTS.inc()
+                logger.error(f"Supervisor não publicou o catálogo em {self.ready_timeout:g}s "
+                             f"({self.path}); seguindo com catálogo vazio")
+        return self._snapshot
+
+    async def refresh(self) -> MarketSnapshot:
+        # quem renova é o supervisor: aqui só dá para esperar o primeiro snapshot
+        return await self.get()
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._receive_loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _receive_loop(self):
+        while True:
+            writer = None
+            try:
+                reader, writer = await asyncio.open_unix_connection(self.path, limit=1 << 20)
+                while True:
+                    (size,) = _HEADER.unpack(await reader.readexactly(_HEADER.size))
+                    self._apply(snapshot_from_bytes(await reader.readexactly(size)))
+            except (OSError, asyncio.IncompleteReadError) as e:
+                logger.warning(f"Sem conexão com o catálogo do supervisor ({e!r}), tentando de novo")
+            except (ValueError, KeyError, TypeError) as e:
+                logger.error(f"Snapshot do catálogo inválido: {e}")
+            finally:
+                if writer is not None:
+                    writer.close()
+            await asyncio.sleep(self.reconnect_delay)
+
+    def _apply(self, snapshot: MarketSnapshot):
+        self._snapshot = snapshot
+        _RECEIVED.inc()
+        self.client.publish(snapshot.markets)
+        self._ready.set()
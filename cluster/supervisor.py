@@ -0,0 +1,204 @@
+"""
+Supervisor de vários processos (python main.py --workers N).
+
+Cada worker precisa da própria sessão do Telethon, autorizada separadamente:
+duas conexões simultâneas com a mesma chave de autorização fazem o Telegram
+responder AUTH_KEY_DUPLICATED e revogar a sessão (inclusive a principal).
+Para autorizar as sessões dos workers, uma vez (pede o código de cada login):
+  python -m cluster.supervisor --login 4
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import signal
+import sys
+import time
+
+from alerts.notifier import TelegramNotifier
+from cluster.snapshots import SnapshotPublisher
+from core.http import AsyncHTTPPool
+from core.metrics import MetricsServer
+from polymarket.archive import MarketArchive
+from polymarket.catalog import MarketCatalog
+from polymarket.client import PolymarketClient
+from sources.cursors import channel_key
+from config import (
+    TELEGRAM_SOURCE_CHANNELS, TELEGRAM_SESSION, CATALOG_SOCKET_PATH,
+    METRICS_PORT, METRICS_HOST, INGEST_SPOOL_PATH, ARCHIVE_DIR,
+    TELEGRAM_API_ID, TELEGRAM_API_HASH, TELEGRAM_PHONE,
+)
+
+logger = logging.getLogger(__name__)
+
+_MAIN = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "main.py")
+
+
+def partition(channels: list[str], n: int) -> list[list[str]]:
+    """
+    Divide os canais em até `n` grupos de tamanho parecido. A ordem é a do
+    nome normalizado, então a mesma lista sempre gera os mesmos grupos.
+    """
+    ordered = sorted(channels, key=channel_key)
+    n = max(1, min(n, len(ordered)))
+    return [ordered[i::n] for i in range(n)]
+
+
+def worker_session(worker_id: int) -> str:
+    """Sessão do Telethon do worker (sem .session), autorizada com --login."""
+    return f"{TELEGRAM_SESSION}_w{worker_id}"
+
+
+class Supervisor:
+    """
+    Roda o bot em `workers` processos na mesma máquina.
+
+    - Canais: TELEGRAM_SOURCE_CHANNELS dividido entre os workers (partition);
+      cada worker é um `python main.py` com o seu grupo de canais, sua
+      própria sessão do Telethon (autorizada à parte, ver o docstring do
+      módulo) e seu próprio event loop.
+    - Catálogo: só o supervisor fala com a Gamma API; os workers recebem os
+      snapshots pelo unix socket CATALOG_SOCKET_PATH (RemoteCatalog).
+    - Alertas: o DedupStore em SQLite (WAL, BEGIN IMMEDIATE) já é o mesmo
+      arquivo para todos, então dois workers nunca mandam o mesmo alerta.
+
+    Worker que cai é reiniciado com espera exponencial (até `max_backoff`).
+    """
+
+    def __init__(self, workers: int, channels: list[str] = TELEGRAM_SOURCE_CHANNELS,
+                 socket_path: str = CATALOG_SOCKET_PATH, max_backoff: float = 60.0):
+        self.shards = partition(channels, workers)
+        self.socket_path = socket_path
+        self.max_backoff = max_backoff
+        self._procs: dict[int, asyncio.subprocess.Process] = {}
+        self._stopping = False
+
+    def missing_sessions(self) -> list[str]:
+        return [f"{worker_session(i)}.session" for i in range(len(self.shards))
+                if not os.path.exists(f"{worker_session(i)}.session")]
+
+    async def run(self):
+        missing = self.missing_sessions()
+        if missing:
+            # nunca copiar a sessão principal: a mesma chave em N conexões derruba todas
+            logger.error(f"Sessões do Telethon dos workers não autorizadas: {', '.join(missing)}. "
+                         f"Rode uma vez: python -m cluster.supervisor --login {len(self.shards)}")
+            raise SystemExit(1)
+        logger.info(f"🧩 Supervisor: {len(self.shards)} workers para {sum(map(len, self.shards))} canais")
+        http = AsyncHTTPPool()
+        poly = PolymarketClient(http=http)
+        catalog = MarketCatalog(poly, limit=100)
+        publisher = SnapshotPublisher(self.socket_path)
+        poly.on_refresh(publisher.publish)
+        # o supervisor é o único dono do arquivo histórico: os workers não abrem o diretório
+        archive = MarketArchive(ARCHIVE_DIR) if ARCHIVE_DIR else None
+        if archive is not None:
+            poly.on_refresh(archive.record)
+        metrics_server = MetricsServer(METRICS_PORT, METRICS_HOST) if METRICS_PORT else None
+
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            loop.add_signal_handler(sig, self._request_stop)
+
+        await publisher.start()
+        if metrics_server is not None:
+            await metrics_server.start()
+        try:
+            await catalog.get()  # workers já conectam com um catálogo pronto (do disco ou da Gamma API)
+            catalog.start()
+            await TelegramNotifier(http=http).send_startup_async(TELEGRAM_SOURCE_CHANNELS)
+            await asyncio.gather(*(self._keep_alive(i, shard) for i, shard in enumerate(self.shards)))
+        finally:
+            self._stopping = True
+            await self._stop_workers()
+            await catalog.stop()
+            await publisher.stop()
+            if archive is not None:
+                await asyncio.to_thread(archive.close)
+            if metrics_server is not None:
+                await metrics_server.stop()
+            await http.close()
+
+    def _request_stop(self):
+        logger.info("🛑 Encerrando workers...")
+        self._stopping = True
+        for proc in self._procs.values():
+            if proc.returncode is None:
+                proc.terminate()
+
+    async def _keep_alive(self, worker_id: int, channels: list[str]):
+        backoff = 1.0
+        while not self._stopping:
+            started = time.monotonic()
+            proc = await asyncio.create_subprocess_exec(
+                sys.executable, _MAIN, env=self._worker_env(worker_id, channels),
+            )
+            self._procs[worker_id] = proc
+            logger.info(f"👷 Worker {worker_id} (pid {proc.pid}): {', '.join(channels)}")
+            code = await proc.wait()
+            if self._stopping:
+                return
+
+            # rodou um bom tempo antes de cair: não é crash em loop, recomeça a espera
+            if time.monotonic() - started > self.max_backoff:
+                backoff = 1.0
+            logger.error(f"💥 Worker {worker_id} saiu com código {code}; reiniciando em {backoff:.0f}s")
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, self.max_backoff)
+
+    def _worker_env(self, worker_id: int, channels: list[str]) -> dict[str, str]:
+        session = worker_session(worker_id)   # já autorizada (run confere antes de subir)
+
+        # Spool de entrada também por worker: as pendentes voltam no worker que as recebeu
+        root, ext = os.path.splitext(INGEST_SPOOL_PATH)
+        spool = f"{root}_w{worker_id}{ext}"
+
+        env = dict(os.environ)
+        env.update({
+            "WORKER_ID": str(worker_id),
+            "WORKER_PROCESSES": "0",
+            "TELEGRAM_SOURCE_CHANNELS": ",".join(channels),
+            "TELEGRAM_SESSION": session,
+            "INGEST_SPOOL_PATH": spool,
+            "CATALOG_SOCKET_PATH": self.socket_path,
+            "METRICS_PORT": str(METRICS_PORT + 1 + worker_id) if METRICS_PORT else "0",
+        })
+        return env
+
+    async def _stop_workers(self, timeout: float = 10.0):
+        for proc in self._procs.values():
+            if proc.returncode is None:
+                proc.terminate()
+        for worker_id, proc in self._procs.items():
+            try:
+                await asyncio.wait_for(proc.wait(), timeout)
+            except asyncio.TimeoutError:
+                logger.warning(f"Worker {worker_id} não encerrou em {timeout:.0f}s, matando")
+                proc.kill()
+                await proc.wait()
+
+
+async def login(workers: int):
+    """Autoriza a sessão de cada worker com um login próprio (uma chave de autorização por sessão)."""
+    from telethon import TelegramClient
+    for worker_id in range(workers):
+        session = worker_session(worker_id)
+        client = TelegramClient(session, TELEGRAM_API_ID, TELEGRAM_API_HASH)
+        await client.start(phone=TELEGRAM_PHONE)
+        await client.disconnect()
+        logger.info(f"🔑 Sessão {session}.session autorizada")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--login", type=int, metavar="N", required=True,
+                        help="autoriza as sessões dos workers 0..N-1")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(name)s: %(message)s",
+                        datefmt="%H:%M:%S")
+    asyncio.run(login(args.login))
+
+
+if __name__ == "__main__":
+    main()
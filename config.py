@@ -29,15 +29,183 @@ TELEGRAM_SOURCE_CHANNELS = [
     for c in os.getenv("TELEGRAM_SOURCE_CHANNELS", "").split(",")
     if c.strip()
 ]
+# Nome do arquivo de sessão do Telethon (sem .session); os workers usam <nome>_w<N>
+TELEGRAM_SESSION = os.getenv("TELEGRAM_SESSION", "polymarket_source_session").strip()
 
 # Telegram - Alertas
 TELEGRAM_BOT_TOKEN    = os.getenv("TELEGRAM_BOT_TOKEN", "")
 TELEGRAM_ALERT_CHAT_ID = os.getenv("TELEGRAM_ALERT_CHAT_ID", "")
+# Assinaturas (chats com filtros próprios); sem o arquivo, só o TELEGRAM_ALERT_CHAT_ID recebe
+SUBSCRIPTIONS_PATH     = os.getenv("SUBSCRIPTIONS_PATH", "data/subscriptions.json").strip()
+# Limites da Bot API (mensagens/s): do bot inteiro, por chat privado e por grupo/canal
+TELEGRAM_GLOBAL_RATE   = _float("TELEGRAM_GLOBAL_RATE", 30.0)
+TELEGRAM_CHAT_RATE     = _float("TELEGRAM_CHAT_RATE", 1.0)
+TELEGRAM_GROUP_RATE    = _float("TELEGRAM_GROUP_RATE", 20 / 60)
 
 # LLM
 ANTHROPIC_API_KEY = os.getenv("ANTHROPIC_API_KEY", "")
 OPENAI_API_KEY    = os.getenv("OPENAI_API_KEY", "")
+# Provedores em ordem de preferência ("anthropic[:modelo],openai[:modelo]"); vazio =
+# Claude e, com OPENAI_API_KEY, a OpenAI como reserva
+LLM_PROVIDERS = [
+    p.strip()
+    for p in os.getenv("LLM_PROVIDERS", "").split(",")
+    if p.strip()
+]
+# Hedge: sem resposta do provedor principal no p90 observado dele (limitado entre
+# MIN_DELAY e MAX_DELAY s; DEFAULT_DELAY até ter amostras), dispara a mesma
+# chamada no próximo e fica com a primeira válida. LLM_HEDGE=0 desliga
+LLM_HEDGE               = _int("LLM_HEDGE", 1)
+LLM_HEDGE_MIN_DELAY     = _float("LLM_HEDGE_MIN_DELAY", 0.3)
+LLM_HEDGE_MAX_DELAY     = _float("LLM_HEDGE_MAX_DELAY", 10.0)
+LLM_HEDGE_DEFAULT_DELAY = _float("LLM_HEDGE_DEFAULT_DELAY", 2.0)
+# Circuit breaker por provedor: abre após N falhas seguidas e tenta de novo após COOLDOWN s
+LLM_BREAKER_FAILURES = _int("LLM_BREAKER_FAILURES", 3)
+LLM_BREAKER_COOLDOWN = _float("LLM_BREAKER_COOLDOWN", 30.0)
 
 # Bot config
 MIN_EDGE_THRESHOLD = _float("MIN_EDGE_THRESHOLD", 0.07)
 CHECK_INTERVAL     = _int("CHECK_INTERVAL", 60)
+
+# Pré-seleção local de mercados (índice BM25) antes de chamar o LLM
+# PRESELECT_TOP_K=0 desliga a pré-seleção e manda o catálogo por volume até o orçamento
+PRESELECT_TOP_K     = _int("PRESELECT_TOP_K", 25)
+PRESELECT_MIN_SCORE = _float("PRESELECT_MIN_SCORE", 1.0)
+# Orçamento (tokens estimados) da tabela de mercados no prompt; entram os mais relevantes
+# (ordem da pré-seleção, ou volume com PRESELECT_TOP_K=0). 0 = sem limite
+PROMPT_MARKET_TOKENS = _int("PROMPT_MARKET_TOKENS", 2000)
+
+# HTTP assíncrono: conexões keep-alive no pool e teto de requests simultâneos por host
+HTTP_POOL_SIZE      = _int("HTTP_POOL_SIZE", 100)
+HTTP_PER_HOST_LIMIT = _int("HTTP_PER_HOST_LIMIT", 10)
+
+# Catálogo de mercados: intervalo (s) do refresh em background
+CATALOG_REFRESH_INTERVAL = _int("CATALOG_REFRESH_INTERVAL", 60)
+
+# Último catálogo salvo em disco (gzip) e carregado no boot enquanto o primeiro
+# refresh roda em background; snapshots mais velhos que CATALOG_WARM_MAX_AGE (s)
+# são ignorados. Path vazio desliga
+CATALOG_SNAPSHOT_PATH = os.getenv("CATALOG_SNAPSHOT_PATH", "data/catalog_snapshot.json.gz").strip()
+CATALOG_WARM_MAX_AGE  = _int("CATALOG_WARM_MAX_AGE", 3600)
+
+# Sync do catálogo: "top" (100 maiores por volume) ou "full" (universo ativo inteiro)
+MARKET_SYNC_MODE        = os.getenv("MARKET_SYNC_MODE", "top").strip().lower()
+MARKET_SYNC_PAGE_SIZE   = _int("MARKET_SYNC_PAGE_SIZE", 500)
+MARKET_SYNC_CONCURRENCY = _int("MARKET_SYNC_CONCURRENCY", 8)
+# Sync completo que volta com menos que essa fração dos mercados do sync anterior não
+# remove os ausentes (provável resposta truncada da Gamma API); 0 desliga a proteção
+MARKET_SYNC_MIN_RATIO   = _float("MARKET_SYNC_MIN_RATIO", 0.5)
+
+# Feed de preços ao vivo do CLOB: "ws" (websocket, cai para polling se falhar),
+# "poll" (só polling) ou "off"; quantos mercados (por volume) acompanhar
+PRICE_FEED_MODE          = os.getenv("PRICE_FEED_MODE", "ws").strip().lower()
+PRICE_FEED_MAX_MARKETS   = _int("PRICE_FEED_MAX_MARKETS", 500)
+PRICE_FEED_POLL_INTERVAL = _float("PRICE_FEED_POLL_INTERVAL", 2.0)
+
+# Histórico de preços por mercado (ring buffer): pontos guardados e espaçamento mínimo (s)
+PRICE_HISTORY_SIZE       = _int("PRICE_HISTORY_SIZE", 128)
+PRICE_HISTORY_RESOLUTION = _float("PRICE_HISTORY_RESOLUTION", 5.0)
+# Notícia já precificada: candidatos cujo YES andou, desde PRICED_IN_LOOKBACK (s) antes
+# da notícia, mais que PRICED_IN_MIN_MOVE e que PRICED_IN_VOL_MULT desvios padrão da
+# janela PRICED_IN_VOL_WINDOW (s) saem do prompt. PRICED_IN_MIN_MOVE=0 desliga
+PRICED_IN_MIN_MOVE   = _float("PRICED_IN_MIN_MOVE", 0.05)
+PRICED_IN_VOL_MULT   = _float("PRICED_IN_VOL_MULT", 3.0)
+PRICED_IN_VOL_WINDOW = _float("PRICED_IN_VOL_WINDOW", 3600.0)
+PRICED_IN_LOOKBACK   = _float("PRICED_IN_LOOKBACK", 120.0)
+
+# Arquivo histórico do catálogo (colunas binárias + memmap): cada refresh vira um snapshot.
+# Segmentos de ARCHIVE_SEGMENT_SECONDS são compactados mantendo um snapshot a cada
+# ARCHIVE_RESOLUTION s (0 = todos). ARCHIVE_DIR vazio desliga
+ARCHIVE_DIR             = os.getenv("ARCHIVE_DIR", "data/archive").strip()
+ARCHIVE_SEGMENT_SECONDS = _float("ARCHIVE_SEGMENT_SECONDS", 3600.0)
+ARCHIVE_RESOLUTION      = _float("ARCHIVE_RESOLUTION", 300.0)
+
+# Estimativas do LLM guardadas por mercado e reavaliadas a cada movimento de preço:
+# validade (s desde a notícia; 0 desliga), meia-vida (s) do edge estimado e
+# espaçamento mínimo (s) entre reavaliações
+ESTIMATE_TTL            = _float("ESTIMATE_TTL", 3600.0)
+ESTIMATE_HALF_LIFE      = _float("ESTIMATE_HALF_LIFE", 1800.0)
+ESTIMATE_CHECK_INTERVAL = _float("ESTIMATE_CHECK_INTERVAL", 0.5)
+
+# Micro-batching: junta notícias que chegam dentro da janela numa única chamada ao LLM
+# BATCH_WINDOW_MS=0 desliga (uma chamada por notícia)
+BATCH_WINDOW_MS = _int("BATCH_WINDOW_MS", 0)
+BATCH_MAX_ITEMS = _int("BATCH_MAX_ITEMS", 8)
+
+# Notícias quase duplicadas: janela (s) e similaridade de Jaccard mínima entre os termos
+NEWS_DEDUP_WINDOW         = _int("NEWS_DEDUP_WINDOW", 600)
+NEWS_DEDUP_MIN_SIMILARITY = _float("NEWS_DEDUP_MIN_SIMILARITY", 0.7)
+
+# Cache de análises do LLM (LRU + TTL); reaproveita só se o preço não andou mais que a tolerância
+ANALYSIS_CACHE_SIZE            = _int("ANALYSIS_CACHE_SIZE", 1000)
+ANALYSIS_CACHE_TTL             = _int("ANALYSIS_CACHE_TTL", 600)
+ANALYSIS_CACHE_PRICE_TOLERANCE = _float("ANALYSIS_CACHE_PRICE_TOLERANCE", 0.02)
+
+# Deduplicação de alertas persistida em SQLite (compartilhável entre processos)
+# DEDUP_POLICY: "market_direction" (mesmo mercado + direção) ou "edge_growth"
+# (realerta se o edge crescer mais que DEDUP_MIN_EDGE_GROWTH)
+DEDUP_DB_PATH         = os.getenv("DEDUP_DB_PATH", "data/dedup.sqlite3")
+DEDUP_TTL             = _int("DEDUP_TTL", 6 * 3600)
+DEDUP_POLICY          = os.getenv("DEDUP_POLICY", "market_direction").strip().lower()
+DEDUP_MIN_EDGE_GROWTH = _float("DEDUP_MIN_EDGE_GROWTH", 0.05)
+
+# Replay offline: diretório onde gravar notícias, snapshots e respostas do LLM (vazio = não grava)
+REPLAY_RECORD_DIR = os.getenv("REPLAY_RECORD_DIR", "").strip()
+
+# Métricas Prometheus (GET /metrics) num servidor HTTP local; METRICS_PORT=0 desliga
+METRICS_PORT = _int("METRICS_PORT", 0)
+METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1").strip()
+
+# Concorrência adaptativa (AIMD) das chamadas ao LLM: limite inicial, mínimo e máximo;
+# latência acima de LLM_LATENCY_TOLERANCE × a de referência reduz o limite
+LLM_CONCURRENCY_INITIAL = _int("LLM_CONCURRENCY_INITIAL", 3)
+LLM_CONCURRENCY_MIN     = _int("LLM_CONCURRENCY_MIN", 1)
+LLM_CONCURRENCY_MAX     = _int("LLM_CONCURRENCY_MAX", 12)
+LLM_LATENCY_TOLERANCE   = _float("LLM_LATENCY_TOLERANCE", 2.0)
+
+# Notícias que esperam mais que isso (s) na fila do LLM são descartadas (conta da entrada
+# na fila, não do horário da postagem); 0 desliga
+NEWS_FRESHNESS_BUDGET = _float("NEWS_FRESHNESS_BUDGET", 120.0)
+
+# Peso de cada canal na fila do LLM ("canal:peso,..."); canais ausentes pesam 1
+CHANNEL_WEIGHTS = {
+    name.strip().lstrip("@").lower(): float(weight)
+    for name, _, weight in (
+        item.partition(":") for item in os.getenv("CHANNEL_WEIGHTS", "").split(",")
+    )
+    if name.strip() and weight.strip().replace(".", "", 1).isdigit()
+}
+
+# Backfill dos canais: leituras em paralelo, janela máxima (h) recuperada após um
+# restart e arquivo com o último message_id processado por canal
+BACKFILL_CONCURRENCY = _int("BACKFILL_CONCURRENCY", 4)
+BACKFILL_MAX_HOURS   = _float("BACKFILL_MAX_HOURS", 6.0)
+READER_STATE_PATH    = os.getenv("READER_STATE_PATH", "data/telegram_cursors.json")
+
+# Spool de entrada: mensagens recebidas vão para um SQLite antes da análise e só saem
+# depois de processadas (o que ficou pendente volta no próximo boot). INGEST_WORKERS:
+# notícias processadas ao mesmo tempo; INGEST_MAX_REPLAYS: reinícios sem concluir
+# antes de uma mensagem ser descartada
+INGEST_SPOOL_PATH  = os.getenv("INGEST_SPOOL_PATH", "data/ingest_spool.sqlite3")
+INGEST_WORKERS     = _int("INGEST_WORKERS", 16)
+INGEST_MAX_REPLAYS = _int("INGEST_MAX_REPLAYS", 3)
+
+# Streaming da resposta do LLM: cada oportunidade vira alerta assim que o objeto
+# dela fecha no JSON, sem esperar a resposta inteira (0 = espera a resposta completa)
+LLM_STREAMING = _int("LLM_STREAMING", 1)
+
+# Filtro local de relevância antes do LLM (python -m analyzer.relevance para treinar).
+# RELEVANCE_RECALL: fração das mensagens relevantes que o filtro deve deixar passar;
+# RELEVANCE_EXPLORE: fração das reprovadas enviada ao LLM mesmo assim (rótulos para o
+# próximo treino). VERDICT_LOG_PATH: histórico de vereditos (vazio = não grava)
+RELEVANCE_MODEL_PATH = os.getenv("RELEVANCE_MODEL_PATH", "data/relevance.npz")
+RELEVANCE_RECALL     = _float("RELEVANCE_RECALL", 0.95)
+RELEVANCE_EXPLORE    = _float("RELEVANCE_EXPLORE", 0.02)
+VERDICT_LOG_PATH     = os.getenv("VERDICT_LOG_PATH", "data/verdicts.jsonl").strip()
+
+# Vários processos: WORKER_PROCESSES > 1 sobe um supervisor que divide os canais entre
+# os workers e publica o catálogo para eles em CATALOG_SOCKET_PATH. WORKER_ID é
+# definido pelo supervisor em cada worker (vazio = processo único)
+WORKER_PROCESSES    = _int("WORKER_PROCESSES", 0)
+WORKER_ID           = os.getenv("WORKER_ID", "").strip()
+CATALOG_SOCKET_PATH = os.getenv("CATALOG_SOCKET_PATH", "data/catalog.sock")
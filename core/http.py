@@ -0,0 +1,91 @@
+import asyncio
+import logging
+from urllib.parse import urlsplit
+
+import aiohttp
+
+from config import HTTP_POOL_SIZE, HTTP_PER_HOST_LIMIT
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncHTTPPool:
+    """
+    Pool HTTP assíncrono compartilhado (aiohttp) com conexões keep-alive.
+
+    Uma única sessão é reaproveitada por PolymarketClient e TelegramNotifier,
+    então cada request não paga de novo TCP + TLS. Além do limite global de
+    conexões, cada host tem um teto de requisições simultâneas, ajustável
+    por host em `host_limits` (ex: {"api.telegram.org": 4}).
+
+    A sessão é criada sob demanda, já dentro do event loop.
+    """
+
+    def __init__(
+        self,
+        limit: int = HTTP_POOL_SIZE,
+        limit_per_host: int = HTTP_PER_HOST_LIMIT,
+        host_limits: dict[str, int] | None = None,
+        timeout: float = 10,
+    ):
+        self._limit = limit
+        self._limit_per_host = limit_per_host
+        self._host_limits = host_limits or {}
+        self._timeout = aiohttp.ClientTimeout(total=timeout)
+        self._session: aiohttp.ClientSession | None = None
+        self._semaphores: dict[str, asyncio.Semaphore] = {}
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self._limit,
+                limit_per_host=self._limit_per_host,
+                keepalive_timeout=30,
+                ttl_dns_cache=300,
+            )
+            self._session = aiohttp.ClientSession(connector=connector, timeout=self._timeout)
+        return self._session
+
+    def _host_semaphore(self, url: str) -> asyncio.Semaphore:
+        host = urlsplit(url).hostname or ""
+        sem = self._semaphores.get(host)
+        if sem is None:
+            sem = asyncio.Semaphore(self._host_limits.get(host, self._limit_per_host))
+            self._semaphores[host] = sem
+        return sem
+
+    async def get_json(self, url: str, params: dict | None = None):
+        """GET e decodifica JSON. Levanta aiohttp.ClientError em status >= 400."""
+        async with self._host_semaphore(url):
+            async with self._get_session().get(url, params=params) as resp:
+                resp.raise_for_status()
+                return await resp.json(content_type=None)
+
+    async def post_json(self, url: str, payload: dict | list):
+        """POST com corpo JSON. Levanta aiohttp.ClientError em status >= 400."""
+        async with self._host_semaphore(url):
+            async with self._get_session().post(url, json=payload) as resp:
+                resp.raise_for_status()
+                return await resp.json(content_type=None)
+
+    async def post_json_status(self, url: str, payload: dict | list) -> tuple[int, object]:
+        """
+        POST com corpo JSON sem levantar erro pelo status: retorna (status, corpo).
+        Para APIs que explicam o erro no corpo (ex: retry_after do 429 da Bot API).
+        """
+        async with self._host_semaphore(url):
+            async with self._get_session().post(url, json=payload) as resp:
+                try:
+                    data = await resp.json(content_type=None)
+                except ValueError:
+                    data = None
+                return resp.status, data
+
+    def ws_connect(self, url: str, **kwargs):
+        """Abre um websocket reaproveitando a sessão (uso: async with pool.ws_connect(...))."""
+        return self._get_session().ws_connect(url, **kwargs)
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
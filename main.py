@@ -7,19 +7,48 @@ e te alerta quando encontra uma oportunidade de edge na Polymarket.
 Modo de uso:
   python main.py              → modo live (escuta mensagens em tempo real)
   python main.py --test       → modo teste (analisa mensagens da última 2h)
+  python main.py --workers 4  → supervisor com 4 processos (canais divididos entre eles)
 """
 
+import time
+
+_BOOT = time.monotonic()  # antes dos imports: o boot → primeiro alerta inclui o import
+
 import asyncio
-import hashlib
+import dataclasses
 import logging
+import signal
 import sys
-import time
 
 from sources.telegram_reader import TelegramSourceReader
+from sources.spool import IngestSpool
 from polymarket.client import PolymarketClient
+from polymarket.catalog import MarketCatalog
+from polymarket.price_feed import LivePriceTable, PriceFeed
+from polymarket.columnar import ColumnarMarketStore
+from polymarket.price_history import PriceHistory
+from polymarket.archive import MarketArchive
 from analyzer.ai_analyzer import AIAnalyzer, Opportunity
+from analyzer.batcher import MicroBatcher
+from analyzer.estimates import EstimateStore
+from analyzer.news_cache import NewsAnalysisCache
+from analyzer.limiter import AdaptiveLimiter, RateLimitedError, StaleNewsError, news_timestamp
+from analyzer.relevance import RelevanceGate, VerdictLog
 from alerts.notifier import TelegramNotifier
-from config import TELEGRAM_SOURCE_CHANNELS, CHECK_INTERVAL
+from alerts.dedup_store import DedupStore
+from alerts.subscriptions import SubscriptionRegistry
+from core import metrics
+from core.metrics import MetricsServer
+from core.http import AsyncHTTPPool
+from replay.recorder import ReplayRecorder
+from cluster.snapshots import RemoteCatalog
+from config import (
+    TELEGRAM_SOURCE_CHANNELS, CHECK_INTERVAL, MIN_EDGE_THRESHOLD,
+    BATCH_WINDOW_MS, BATCH_MAX_ITEMS, REPLAY_RECORD_DIR,
+    METRICS_PORT, METRICS_HOST, LLM_STREAMING, VERDICT_LOG_PATH,
+    WORKER_PROCESSES, WORKER_ID, CATALOG_SOCKET_PATH, PRICED_IN_LOOKBACK,
+    ARCHIVE_DIR,
+)
 
 # ── Logging ────────────────────────────────────────────────────────────────────
 logging.basicConfig(
@@ -31,117 +60,386 @@ logger = logging.getLogger("main")
 
 
 # ── Instâncias globais ──────────────────────────────────────────────────────────
+# Pool HTTP keep-alive compartilhado entre Polymarket e Telegram Bot API
+http     = AsyncHTTPPool()
 reader   = TelegramSourceReader()
-poly     = PolymarketClient()
+poly     = PolymarketClient(http=http)
 analyzer = AIAnalyzer()
-notifier = TelegramNotifier()
-
-# ── Rate limiting ───────────────────────────────────────────────────────────────
-# Máximo de 3 chamadas simultâneas ao Claude para não saturar a API
-_claude_semaphore = asyncio.Semaphore(3)
-
-# ── Deduplicação ────────────────────────────────────────────────────────────────
-# Evita reenviar a mesma oportunidade (mesmo mercado + direção) dentro de 6h
-_sent_hashes: dict[str, float] = {}   # hash → timestamp Unix do envio
-_DEDUP_TTL = 6 * 3600                 # 6 horas em segundos
+notifier = TelegramNotifier(http=http, scheduled=True)  # fila com os limites da Bot API
 
+# Snapshot do catálogo mantido quente em background (stale-while-revalidate).
+# Num worker (WORKER_ID), o catálogo vem do supervisor pelo unix socket.
+catalog  = (
+    RemoteCatalog(CATALOG_SOCKET_PATH, poly) if WORKER_ID
+    else MarketCatalog(poly, limit=100)
+)
 
-def _opportunity_key(opp: Opportunity) -> str:
-    """Gera chave única para uma oportunidade: mercado + direção."""
-    raw = f"{opp.market.condition_id}:{opp.direction}"
-    return hashlib.md5(raw.encode()).hexdigest()
+# Preços ao vivo do CLOB para os mercados do catálogo
+prices   = LivePriceTable()
+feed     = PriceFeed(prices, http=http)
+poly.on_refresh(feed.track)
+
+# Colunas NumPy do catálogo (preço/volume/vencimento), atualizadas a cada refresh e tick,
+# para recalcular edges do catálogo inteiro numa passada vetorizada
+columns  = ColumnarMarketStore()
+poly.on_refresh(columns.sync)
+prices.on_update(columns.set_prices)
+
+# Histórico curto de preços por mercado (ring buffers), a cada refresh e tick: candidatos
+# que já andaram desde a notícia saem do prompt antes da chamada ao LLM
+history  = PriceHistory()
+poly.on_refresh(history.sync)
+prices.on_update(history.record)
+
+# Mantém o índice de pré-seleção do analyzer em dia com o catálogo
+poly.on_refresh(analyzer.update_index)
+
+# Estimativas do LLM por mercado (inclusive abaixo do threshold), reavaliadas em bloco
+# contra as colunas a cada tick/refresh: movimento de preço que abre edge vira alerta
+# sem nova chamada ao LLM
+estimates = EstimateStore(columns)
+analyzer.on_verdict(estimates.record_verdict)
+prices.on_update(estimates.on_price)
+poly.on_refresh(estimates.on_refresh)
+
+# ── Métricas ────────────────────────────────────────────────────────────────────
+# Histogramas por etapa, expostos em /metrics (Prometheus) com METRICS_PORT > 0
+_PROCESS = metrics.histogram("news_process_seconds", "Pipeline completo por notícia (notícia → alertas enviados)")
+_OPPORTUNITIES = metrics.counter("opportunities_total",
+                                 "Oportunidades por destino (sent, duplicate, evaporated, unmatched)", ("result",))
+_OPP_SENT, _OPP_DUPLICATE, _OPP_EVAPORATED, _OPP_UNMATCHED = (
+    _OPPORTUNITIES.labels(result=r) for r in ("sent", "duplicate", "evaporated", "unmatched")
+)
+_STARTUP = metrics.gauge("startup_seconds", "Tempo desde o boot do processo até cada marco", ("stage",))
+_STARTUP_CATALOG, _STARTUP_FIRST_ALERT = (_STARTUP.labels(stage=s) for s in ("catalog_ready", "first_alert"))
+_first_alert_sent = False
 
+# ── Rate limiting ───────────────────────────────────────────────────────────────
+# Concorrência adaptativa (AIMD) das chamadas ao Claude: sobe enquanto a latência
+# está boa, cai pela metade em 429 ou lentidão. A fila prioriza canais de maior
+# peso e notícias mais recentes, e descarta as que passam de NEWS_FRESHNESS_BUDGET.
+llm_limiter = AdaptiveLimiter()
+
+# ── Micro-batching ──────────────────────────────────────────────────────────────
+# Opcional: notícias que chegam dentro de BATCH_WINDOW_MS dividem uma chamada ao Claude
+# Cada item é (notícia, candidatos): a pré-seleção já filtrada por _process_news (sem os
+# mercados que já precificaram a notícia) vai ao lote como está, sem refazer o BM25
+async def _analyze_batch(items: list[tuple[dict, list]]) -> list[list[Opportunity]]:
+    markets = catalog.snapshot.markets
+    news_list = [news for news, _ in items]
+    candidates = [selected for _, selected in items]
+    return await llm_limiter.run(
+        lambda: asyncio.to_thread(analyzer.analyze_batch, news_list, markets, candidates), news_list
+    )
+
+_batcher = (
+    MicroBatcher(_analyze_batch, window=BATCH_WINDOW_MS / 1000, max_items=BATCH_MAX_ITEMS)
+    if BATCH_WINDOW_MS > 0 else None
+)
 
-def _is_duplicate(opp: Opportunity) -> bool:
+# ── Notícias quase duplicadas ───────────────────────────────────────────────────
+# Repostagens da mesma manchete reaproveitam a análise em vez de chamar o Claude de novo
+news_cache = NewsAnalysisCache()
+
+# ── Filtro de relevância ────────────────────────────────────────────────────────
+# Classificador local (n-gramas + regressão logística) que descarta antes do LLM as
+# mensagens sem chance de mover um mercado. Treinado com o histórico de vereditos.
+relevance = RelevanceGate.from_path()
+
+# ── Assinaturas ─────────────────────────────────────────────────────────────────
+# Chats que recebem cada oportunidade (edge mínimo, direção, palavras-chave, categoria),
+# indexados para o fan-out não varrer todas as assinaturas. Sem SUBSCRIPTIONS_PATH,
+# só o TELEGRAM_ALERT_CHAT_ID.
+subscriptions = SubscriptionRegistry.from_path()
+
+# ── Estado em disco ─────────────────────────────────────────────────────────────
+# Abertos só por _open_state() em run_live/run_test, nunca no import: o replay e os
+# benchmarks importam este módulo e não podem gravar no estado do bot em produção
+# (eles passam um DedupStore em memória por configure).
+#   dedup:       não reenvia a mesma oportunidade (mercado + direção) dentro de 6h;
+#                persistido em SQLite, um redeploy não reenvia os alertas recentes
+#   spool:       o handler do Telegram só grava a mensagem em SQLite e retorna;
+#                INGEST_WORKERS workers rodam process_news e apagam ao terminar
+#   verdict_log: histórico de vereditos do LLM, treino do filtro de relevância
+#   archive:     preço de cada mercado a cada refresh (colunas binárias, memmap), para
+#                avaliar os alertas depois. Num worker, quem arquiva é o supervisor
+#   recorder:    com REPLAY_RECORD_DIR, notícias, snapshots e respostas do LLM em JSONL
+#                para reprocessar offline (python -m replay.engine)
+dedup: DedupStore | None = None
+spool: IngestSpool | None = None
+verdict_log: VerdictLog | None = None
+archive: MarketArchive | None = None
+recorder: ReplayRecorder | None = None
+
+
+def _open_state():
+    """Abre o estado em disco que ainda não foi trocado por configure()."""
+    global dedup, spool, verdict_log, archive, recorder
+    if dedup is None:
+        dedup = DedupStore()
+    if spool is None:
+        spool = IngestSpool()
+    if verdict_log is None and VERDICT_LOG_PATH:
+        verdict_log = VerdictLog(VERDICT_LOG_PATH)
+        analyzer.on_verdict(verdict_log.record)
+    if archive is None and ARCHIVE_DIR and not WORKER_ID:
+        archive = MarketArchive(ARCHIVE_DIR)
+        poly.on_refresh(archive.record)
+    if recorder is None and REPLAY_RECORD_DIR:
+        recorder = ReplayRecorder(REPLAY_RECORD_DIR)
+        poly.on_refresh(recorder.record_snapshot)
+        analyzer.on_verdict(recorder.record_verdict)
+
+
+async def _close_state():
+    """Fecha o que _open_state abriu: workers do spool, arquivo (grava o que está na fila) e logs."""
+    if spool is not None:
+        await spool.stop()   # em andamento fica no spool para o próximo start
+        spool.close()
+    if archive is not None:
+        await asyncio.to_thread(archive.close)
+    if verdict_log is not None:
+        verdict_log.close()
+    if recorder is not None:
+        recorder.close()
+
+
+def configure(**components):
     """
-    Verifica se a oportunidade já foi enviada nas últimas 6h.
-    Aproveita a chamada para limpar entradas expiradas do cache.
+    Substitui componentes globais do pipeline antes de chamar process_news —
+    usado pelo replay offline para trocar catálogo, LLM e notifier por
+    versões locais. Aceita: catalog, analyzer, notifier, dedup, prices,
+    news_cache, llm_limiter, relevance, subscriptions, history e _batcher.
+    Quem chama process_news sem run_live/run_test precisa passar o dedup.
     """
-    now = time.time()
-
-    # Limpa hashes expirados
-    expired = [k for k, t in _sent_hashes.items() if now - t > _DEDUP_TTL]
-    for k in expired:
-        del _sent_hashes[k]
+    allowed = {"catalog", "analyzer", "notifier", "dedup", "prices", "news_cache",
+               "llm_limiter", "relevance", "subscriptions", "history", "_batcher"}
+    unknown = set(components) - allowed
+    if unknown:
+        raise ValueError(f"Componentes desconhecidos: {', '.join(sorted(unknown))}")
+    globals().update(components)
 
-    return _opportunity_key(opp) in _sent_hashes
 
+def _reprice(opp: Opportunity) -> Opportunity | None:
+    """
+    Recalcula preço e edge com o preço ao vivo do CLOB logo antes do alerta.
+    Retorna None se o edge evaporou: ficou abaixo do threshold na direção
+    do alerta (inclusive negativo, quando o preço passou da estimativa).
+    """
+    live = prices.live_price(opp.market.condition_id, opp.direction)
+    if live is None:
+        return opp  # mercado fora do feed: fica com o preço do snapshot
 
-def _mark_sent(opp: Opportunity) -> None:
-    """Registra a oportunidade como já enviada."""
-    _sent_hashes[_opportunity_key(opp)] = time.time()
+    edge = opp.true_prob - live
+    if edge < MIN_EDGE_THRESHOLD:
+        return None
+    return dataclasses.replace(opp, current_price=live, edge=edge)
 
 
 # ── Pipeline principal ──────────────────────────────────────────────────────────
 async def process_news(news: dict):
     """Pipeline completo: notícia → análise → alerta."""
+    with _PROCESS.time():
+        await _process_news(news)
+
+
+async def _process_news(news: dict):
     logger.info(f"⚙️  Processando: {news['text'][:60]}...")
 
-    markets = poly.fetch_active_markets(limit=100)
+    if not relevance.should_analyze(news):
+        logger.info("🚫 Mensagem irrelevante para os mercados (filtro local), LLM não chamado")
+        return
+
+    snapshot = await catalog.get()
+    markets = snapshot.markets
     if not markets:
         logger.warning("Nenhum mercado carregado, pulando análise.")
         return
+    logger.info(f"📊 {len(markets)} mercados (snapshot v{snapshot.version}, {snapshot.age:.0f}s)")
+
+    # Pré-seleção local (BM25) fora do event loop; reaproveitada pelo cache e pelo analyze
+    candidates = await asyncio.to_thread(analyzer.preselect, news, markets)
+
+    # Mercados que já andaram desde pouco antes da notícia: o preço já absorveu a informação
+    moved = history.priced_in(candidates, news_timestamp(news) - PRICED_IN_LOOKBACK)
+    if moved:
+        candidates = [m for m in candidates if m.condition_id not in moved]
+        logger.info(f"📈 {len(moved)} mercado(s) já se moveram desde a notícia, fora do prompt")
+        if not candidates:
+            logger.info("Todos os candidatos já precificaram a notícia, LLM não chamado")
+            return
+
+    # Com LLM_STREAMING, cada oportunidade entra no caminho de alerta assim que
+    # fecha no JSON da resposta; as chaves já alertadas não são repetidas no fim.
+    # Os callbacks da thread chegam ao loop (FIFO) antes do resultado do to_thread.
+    loop = asyncio.get_running_loop()
+    streamed: set[tuple[str, str]] = set()
+    alerts: list = []   # tasks (streaming) e corrotinas de envio
+
+    def on_opportunity(opp: Opportunity):
+        if (opp.market.condition_id, opp.direction) in streamed:
+            return  # reentrega após retry do limiter
+        streamed.add((opp.market.condition_id, opp.direction))
+        alerts.append(asyncio.create_task(_alert(opp)))
+
+    async def analyze() -> list[Opportunity]:
+        if _batcher is not None:
+            return await _batcher.submit((news, candidates))
+        # Rate limiting: aguarda slot na fila do limiter antes de chamar o Claude
+        # asyncio.to_thread evita bloquear o event loop durante a chamada HTTP
+        if LLM_STREAMING:
+            return await llm_limiter.run(
+                lambda: asyncio.to_thread(
+                    analyzer.analyze_stream, news, markets, candidates,
+                    lambda opp: loop.call_soon_threadsafe(on_opportunity, opp),
+                ),
+                news,
+            )
+        return await llm_limiter.run(
+            lambda: asyncio.to_thread(analyzer.analyze, news, markets, candidates), news
+        )
 
-    # Rate limiting: aguarda slot disponível antes de chamar o Claude
-    # asyncio.to_thread evita bloquear o event loop durante a chamada HTTP
-    async with _claude_semaphore:
-        opportunities = await asyncio.to_thread(analyzer.analyze, news, markets)
+    try:
+        opportunities = await news_cache.get_or_analyze(news, markets, analyze, candidates)
+    except StaleNewsError as e:
+        logger.info(f"🗑️  Notícia descartada sem análise: {e}")
+        return
+    except RateLimitedError as e:
+        logger.error(f"LLM com rate limit persistente, notícia não analisada: {e}")
+        return
 
-    if not opportunities:
+    if not opportunities and not alerts:
         logger.info("Nenhuma oportunidade encontrada para essa notícia.")
         return
 
-    for opp in opportunities:
-        if _is_duplicate(opp):
-            logger.info(
-                f"⏭️  Duplicada (já enviada nas últimas 6h): "
-                f"{opp.market.question[:50]}"
-            )
-            continue
+    # Envia os alertas da notícia em paralelo pelo pool HTTP
+    alerts.extend(
+        _alert(opp) for opp in opportunities
+        if (opp.market.condition_id, opp.direction) not in streamed
+    )
+    await asyncio.gather(*alerts)
+
+
+async def _alert(opp: Opportunity):
+    """Reprecifica com o preço ao vivo, deduplica e envia o alerta da oportunidade."""
+    live_opp = _reprice(opp)
+    if live_opp is None:
+        _OPP_EVAPORATED.inc()
+        logger.info(
+            f"📉 Edge evaporou com o preço ao vivo: {opp.market.question[:50]}"
+        )
+        return
+    opp = live_opp
+
+    chats = subscriptions.match(opp)
+    if not chats:
+        _OPP_UNMATCHED.inc()
+        logger.info(f"📭 Nenhuma assinatura para: {opp.market.question[:50]}")
+        return
 
-        _mark_sent(opp)
+    if not await dedup.check_and_mark_async(opp):
+        _OPP_DUPLICATE.inc()
         logger.info(
-            f"🎯 Oportunidade: {opp.direction} em '{opp.market.question[:60]}' | "
-            f"edge={opp.edge*100:+.1f}%"
+            f"⏭️  Duplicada (já enviada nas últimas 6h): "
+            f"{opp.market.question[:50]}"
         )
-        notifier.send_opportunity(opp)
+        return
+
+    logger.info(
+        f"🎯 Oportunidade: {opp.direction} em '{opp.market.question[:60]}' | "
+        f"edge={opp.edge*100:+.1f}% | {len(chats)} chat(s)"
+    )
+    _OPP_SENT.inc()
+    await notifier.send_opportunity_async(opp, chats)
+
+    global _first_alert_sent
+    if not _first_alert_sent:
+        _first_alert_sent = True
+        elapsed = time.monotonic() - _BOOT
+        _STARTUP_FIRST_ALERT.set(elapsed)
+        logger.info(f"⏱️  Primeiro alerta {elapsed:.1f}s após o boot")
+
+
+async def _warm_up():
+    """Deixa catálogo e índice prontos antes da primeira notícia (disco ou Gamma API)."""
+    snapshot = await catalog.get()
+    elapsed = time.monotonic() - _BOOT
+    _STARTUP_CATALOG.set(elapsed)
+    logger.info(f"⏱️  Catálogo pronto {elapsed:.1f}s após o boot ({len(snapshot.markets)} mercados)")
 
 
 # ── Modo LIVE ──────────────────────────────────────────────────────────────────
 async def run_live():
     """Escuta mensagens novas em tempo real."""
-    logger.info("🚀 Iniciando modo LIVE...")
-    notifier.send_startup(TELEGRAM_SOURCE_CHANNELS)
-
-    reader.on_message(process_news)
-    await reader.start()  # bloqueia até desconectar
+    logger.info(f"🚀 Iniciando modo LIVE{f' (worker {WORKER_ID})' if WORKER_ID else ''}...")
+    _open_state()
+    if not WORKER_ID:
+        await notifier.send_startup_async(TELEGRAM_SOURCE_CHANNELS)  # num worker, o supervisor avisa
+
+    if recorder is not None:
+        reader.on_message(recorder.record_news)
+    reader.on_message(spool.put)
+    spool.start(process_news)  # antes do reader: reenfileira o que ficou da última execução
+    warm_up = asyncio.create_task(_warm_up())  # em paralelo com a conexão ao Telegram
+    catalog.start()
+    feed.start()
+    estimates.start(lambda opp: asyncio.create_task(_alert(opp)))
+    metrics_server = MetricsServer(METRICS_PORT, METRICS_HOST) if METRICS_PORT else None
+    if metrics_server is not None:
+        await metrics_server.start()
+    try:
+        await reader.start()  # bloqueia até desconectar
+    finally:
+        warm_up.cancel()
+        if metrics_server is not None:
+            await metrics_server.stop()
+        await estimates.stop()
+        await feed.stop()
+        await catalog.stop()
+        await _close_state()
+        await notifier.close()
+        await http.close()
 
 
 # ── Modo TESTE ─────────────────────────────────────────────────────────────────
 async def run_test(hours: int = 2):
     """Analisa mensagens recentes para validar a estratégia."""
     logger.info(f"🧪 Iniciando modo TESTE (últimas {hours}h)...")
-
-    recent = await reader.fetch_recent(hours=hours)
-    if not recent:
-        logger.info("Nenhuma mensagem recente encontrada nos canais configurados.")
+    # mensagens de até `hours` atrás, uma por vez: nada de descarte por frescor
+    global llm_limiter
+    llm_limiter = AdaptiveLimiter(freshness=0)
+    _open_state()
+
+    try:
+        recent = await reader.fetch_recent(hours=hours)
+        if not recent:
+            logger.info("Nenhuma mensagem recente encontrada nos canais configurados.")
+            return
+
+        logger.info(f"📋 Analisando {len(recent)} mensagens...")
+        for news in recent:
+            await process_news(news)
+            await asyncio.sleep(1)  # pausa para não saturar a API
+        logger.info("✅ Teste concluído.")
+    finally:
         await reader.stop()
-        return
-
-    logger.info(f"📋 Analisando {len(recent)} mensagens...")
-    for news in recent:
-        await process_news(news)
-        await asyncio.sleep(1)  # pausa para não saturar a API
-
-    await reader.stop()
-    logger.info("✅ Teste concluído.")
+        await _close_state()
+        await notifier.close()
+        await http.close()
 
 
 # ── Entry point ────────────────────────────────────────────────────────────────
 if __name__ == "__main__":
     test_mode = "--test" in sys.argv
+    workers = int(sys.argv[sys.argv.index("--workers") + 1]) if "--workers" in sys.argv else WORKER_PROCESSES
 
     if test_mode:
         asyncio.run(run_test(hours=2))
+    elif workers > 1 and not WORKER_ID:
+        from cluster.supervisor import Supervisor
+        asyncio.run(Supervisor(workers).run())
     else:
+        if WORKER_ID:
+            # SIGTERM do supervisor: sai pelo caminho normal (finally fecha feed, catálogo e pool)
+            signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
         asyncio.run(run_live())
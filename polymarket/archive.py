@@ -0,0 +1,508 @@
+"""
+Arquivo histórico do catálogo em colunas binárias, lido por memmap.
+
+Cada refresh do catálogo vira um snapshot: as linhas (id do mercado, yes,
+no, volume 24h) são acrescentadas a arquivos de largura fixa e um índice
+guarda (horário, início, quantidade) de cada snapshot. O condition_id
+vira um inteiro pelo dicionário `ids.txt` (uma linha por mercado, na
+ordem em que apareceu), então cada linha ocupa 16 bytes.
+
+    <dir>/ids.txt                  dicionário condition_id → número da linha
+    <dir>/active/                  segmento em escrita (append-only)
+    <dir>/seg-<início>/            segmentos compactados
+        index.bin                  (ts f8, offset i8, count i8) por snapshot
+        cid.bin yes.bin no.bin volume.bin
+
+Quando o segmento ativo passa de `segment_seconds`, ele é fechado e
+compactado numa thread: fica só o último snapshot de cada janela de
+`resolution` segundos, e snapshots iguais ao anterior viram só uma
+entrada no índice apontando para as mesmas linhas.
+
+Consultas ("preço do mercado X no horário T", "todos os preços em T",
+série de um mercado) localizam o segmento pelo horário e o snapshot por
+busca binária no índice; as colunas são memmaps, então só as páginas
+lidas entram na memória, mesmo com meses de histórico.
+
+Uso (consulta offline):
+  python -m polymarket.archive --at 2026-10-01T12:00:00+00:00 [--market <condition_id>]
+  python -m polymarket.archive --compact          (com o bot parado)
+"""
+
+import argparse
+import bisect
+import logging
+import math
+import os
+import queue
+import shutil
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime
+
+import numpy as np
+
+from core import metrics
+from polymarket.client import Market
+from config import ARCHIVE_DIR, ARCHIVE_SEGMENT_SECONDS, ARCHIVE_RESOLUTION
+
+logger = logging.getLogger(__name__)
+
+_WRITE = metrics.histogram("archive_write_seconds", "Gravação de um snapshot do catálogo no arquivo histórico",
+                           buckets=(0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05))
+_COMPACT = metrics.histogram("archive_compaction_seconds", "Compactação de um segmento do arquivo histórico",
+                             buckets=(0.01, 0.1, 0.5, 1, 5, 30))
+_BYTES = metrics.gauge("archive_bytes", "Tamanho em disco do arquivo histórico do catálogo")
+
+_INDEX = np.dtype([("ts", "<f8"), ("offset", "<i8"), ("count", "<i8")])
+_COLUMNS = {"cid": np.dtype("<u4"), "yes": np.dtype("<f4"), "no": np.dtype("<f4"), "volume": np.dtype("<f4")}
+_ACTIVE = "active"
+
+
+@dataclass
+class ArchivedSnapshot:
+    """Catálogo arquivado num horário: colunas alinhadas por mercado (só leitura)."""
+    ts: float
+    condition_ids: list[str]
+    yes: np.ndarray
+    no: np.ndarray
+    volume: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.condition_ids)
+
+
+class _Segment:
+    """Um diretório do arquivo: índice de snapshots e colunas das linhas, abertos por memmap."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.sealed = os.path.basename(path) != _ACTIVE
+        self._maps: dict[str, np.ndarray] = {}
+
+    def column(self, name: str) -> np.ndarray:
+        if self.sealed and name in self._maps:
+            return self._maps[name]
+        dtype = _INDEX if name == "index" else _COLUMNS[name]
+        try:
+            n = os.path.getsize(os.path.join(self.path, f"{name}.bin")) // dtype.itemsize
+        except FileNotFoundError:
+            n = 0
+        cached = self._maps.get(name)
+        if cached is None or len(cached) != n:
+            # o segmento ativo cresce: o memmap é refeito quando o arquivo muda de tamanho
+            self._maps[name] = (np.memmap(os.path.join(self.path, f"{name}.bin"), dtype=dtype, mode="r", shape=(n,))
+                                if n else np.empty(0, dtype=dtype))
+        return self._maps[name]
+
+    @property
+    def index(self) -> np.ndarray:
+        return self.column("index")
+
+    @property
+    def start(self) -> float:
+        index = self.index
+        return float(index["ts"][0]) if len(index) else math.inf
+
+    def positions(self, lo: int, hi: int, cid: int) -> np.ndarray:
+        """
+        Linha do mercado `cid` em cada snapshot lo..hi-1 do índice (-1 onde ele
+        não aparece). Quase sempre o conjunto de mercados não muda entre
+        refreshes, então a posição do primeiro snapshot é conferida em bloco
+        nos demais e só os que não batem são buscados um a um.
+        """
+        index = self.index[lo:hi]
+        offsets, counts = index["offset"], index["count"]
+        cids = self.column("cid")
+        if not len(index) or not len(cids):
+            return np.full(len(index), -1, dtype=np.int64)
+        j = int(np.searchsorted(cids[offsets[0]:offsets[0] + counts[0]], cid))
+        pos = offsets + j
+        hit = (j < counts) & (cids[np.minimum(pos, len(cids) - 1)] == cid)
+        for i in np.flatnonzero(~hit):
+            ids = cids[offsets[i]:offsets[i] + counts[i]]
+            k = int(np.searchsorted(ids, cid))
+            pos[i] = offsets[i] + k if k < len(ids) and ids[k] == cid else -1
+        return pos
+
+    def rows(self, i: int, index: np.ndarray | None = None) -> tuple[np.ndarray, ...]:
+        """Colunas (cid, yes, no, volume) do snapshot i do índice."""
+        entry = (self.index if index is None else index)[i]
+        lo, hi = int(entry["offset"]), int(entry["offset"] + entry["count"])
+        return tuple(self.column(name)[lo:hi] for name in _COLUMNS)
+
+
+def _append(path: str, name: str, values: np.ndarray):
+    with open(os.path.join(path, f"{name}.bin"), "ab") as f:
+        f.write(values.tobytes())
+
+
+class MarketArchive:
+    """
+    Histórico de snapshots do catálogo em disco (ver o docstring do módulo).
+
+    Gravação ligada em PolymarketClient.on_refresh (record): no event loop
+    só as colunas são extraídas, os appends rodam numa thread de escrita.
+    Um diretório tem um único dono gravando (o main, ou o supervisor com
+    vários workers); as consultas podem rodar no mesmo processo ou
+    offline, sobre o mesmo diretório.
+    Com readonly=True (consulta com o bot rodando) nada é reparado nem
+    compactado; segmentos fechados depois da abertura só aparecem abrindo
+    o arquivo de novo.
+    """
+
+    def __init__(self, path: str = ARCHIVE_DIR, segment_seconds: float = ARCHIVE_SEGMENT_SECONDS,
+                 resolution: float = ARCHIVE_RESOLUTION, readonly: bool = False):
+        self.path = path
+        self.segment_seconds = segment_seconds
+        self.resolution = resolution
+        self.readonly = readonly
+        self._lock = threading.Lock()
+        self._compactor: threading.Thread | None = None
+        self._queue: queue.SimpleQueue = queue.SimpleQueue()
+        self._writer: threading.Thread | None = None
+        os.makedirs(os.path.join(path, _ACTIVE), exist_ok=True)
+
+        self._names: list[str] = []
+        self._ids: dict[str, int] = {}
+        self._ids_size = 0
+        self._load_ids()
+        self._rows = 0 if readonly else self._repair_active()
+        self._segments = self._open_segments()
+        self._starts = [s.start for s in self._segments[:-1]]   # início dos segmentos fechados
+        self._last = None if readonly else self._last_snapshot()
+        if readonly:
+            return
+        _BYTES.set_function(self.disk_bytes)
+        if any(s.path.endswith(".raw") for s in self._segments):
+            self._start_compaction()   # fechado antes de uma queda e ainda não compactado
+
+    def __len__(self) -> int:
+        """Snapshots arquivados."""
+        return sum(len(s.index) for s in self._segments)
+
+    @property
+    def _active(self) -> _Segment:
+        return self._segments[-1]
+
+    # ── Gravação ────────────────────────────────────────────────────────────────
+    def record(self, markets: list[Market]):
+        """
+        Arquiva um refresh do catálogo (ligado em PolymarketClient.on_refresh).
+        Retorna logo: a gravação (appends, ids.txt, rotação) fica com a
+        thread de escrita, na ordem dos refreshes.
+        """
+        if self.readonly:
+            raise RuntimeError("arquivo histórico aberto só para leitura")
+        n = len(markets)
+        self._queue.put((
+            [m.condition_id for m in markets],
+            np.fromiter((m.yes_price for m in markets), np.float32, n),
+            np.fromiter((m.no_price for m in markets), np.float32, n),
+            np.fromiter((m.volume_24h for m in markets), np.float32, n),
+            time.time(),
+        ))
+        if self._writer is None:
+            self._writer = threading.Thread(target=self._write_loop, name="archive-writer", daemon=True)
+            self._writer.start()
+
+    def _write_loop(self):
+        while (item := self._queue.get()) is not None:
+            try:
+                self.record_columns(*item)
+            except OSError as e:
+                logger.error(f"Erro ao gravar snapshot no arquivo histórico: {e}")
+
+    def record_columns(self, condition_ids: list[str], yes: np.ndarray, no: np.ndarray, volume: np.ndarray,
+                       ts: float | None = None):
+        """Arquiva um snapshot já em colunas (alinhadas com `condition_ids`)."""
+        if self.readonly:
+            raise RuntimeError("arquivo histórico aberto só para leitura")
+        if not len(condition_ids):
+            return
+        ts = ts or time.time()
+        with _WRITE.time(), self._lock:
+            ids = np.fromiter((self._id(cid) for cid in condition_ids), np.uint32, len(condition_ids))
+            ids, first = np.unique(ids, return_index=True)   # ordenado por id: busca binária na leitura
+            columns = {"cid": ids, "yes": np.asarray(yes, np.float32)[first],
+                       "no": np.asarray(no, np.float32)[first], "volume": np.asarray(volume, np.float32)[first]}
+
+            active = self._active
+            if len(active.index) and ts - active.start >= self.segment_seconds:
+                self._rotate()
+                active = self._active
+
+            if self._last is not None and all(np.array_equal(columns[k], self._last[1][k]) for k in _COLUMNS):
+                offset = self._last[0]   # nada mudou: só a entrada no índice
+            else:
+                offset = self._rows
+                for name, values in columns.items():
+                    _append(active.path, name, values)
+                self._rows += len(ids)
+                self._last = (offset, columns)
+            # o índice por último: uma queda no meio deixa linhas órfãs, nunca um snapshot pela metade
+            _append(active.path, "index", np.array([(ts, offset, len(ids))], dtype=_INDEX))
+
+    def _id(self, condition_id: str) -> int:
+        i = self._ids.get(condition_id)
+        if i is None:
+            i = self._ids[condition_id] = len(self._names)
+            self._names.append(condition_id)
+            line = (condition_id + "\n").encode("utf-8")
+            with open(os.path.join(self.path, "ids.txt"), "ab") as f:
+                f.write(line)
+            self._ids_size += len(line)
+        return i
+
+    def _rotate(self):
+        """Fecha o segmento ativo (seg-<início>.raw) e abre outro; a compactação roda numa thread."""
+        active = self._active
+        sealed = os.path.join(self.path, f"seg-{int(active.start)}.raw")
+        os.replace(active.path, sealed)
+        os.makedirs(active.path)
+        self._segments = [*self._segments[:-1], _Segment(sealed), _Segment(active.path)]
+        self._starts = [*self._starts, self._segments[-2].start]
+        self._rows = 0
+        self._last = None
+        self._start_compaction()
+
+    # ── Compactação ─────────────────────────────────────────────────────────────
+    def _start_compaction(self):
+        if self._compactor is None or not self._compactor.is_alive():
+            self._compactor = threading.Thread(target=self.compact, name="archive-compaction", daemon=True)
+            self._compactor.start()
+
+    def compact(self):
+        """Compacta os segmentos fechados que ainda estão crus (.raw)."""
+        while True:
+            with self._lock:
+                raw = next((s for s in self._segments if s.path.endswith(".raw")), None)
+            if raw is None:
+                return
+            try:
+                with _COMPACT.time():
+                    compacted = self._compact(raw)
+            except OSError as e:
+                logger.error(f"Erro ao compactar o segmento {raw.path} do arquivo histórico: {e}")
+                return
+            with self._lock:
+                self._segments = [compacted if s is raw else s for s in self._segments]
+                # a compactação pode descartar o começo da janela: o início do segmento muda
+                self._starts = [s.start for s in self._segments[:-1]]
+            shutil.rmtree(raw.path, ignore_errors=True)
+
+    def _compact(self, raw: _Segment) -> _Segment:
+        out = raw.path[:-len(".raw")]
+        if os.path.isdir(out):
+            return _Segment(out)   # compactado antes de uma queda, só faltou apagar o .raw
+        index = np.array(raw.index)
+        if self.resolution > 0 and len(index):
+            bucket = np.floor(index["ts"] / self.resolution)
+            index = index[np.r_[bucket[1:] != bucket[:-1], True]]   # último snapshot de cada janela
+
+        tmp = f"{out}.tmp"
+        shutil.rmtree(tmp, ignore_errors=True)
+        os.makedirs(tmp)
+        entries = np.empty(len(index), dtype=_INDEX)
+        rows, previous, last = 0, None, None
+        for i, entry in enumerate(index):
+            key = (int(entry["offset"]), int(entry["count"]))
+            if key != previous:
+                lo, hi = key[0], key[0] + key[1]
+                columns = [raw.column(name)[lo:hi] for name in _COLUMNS]
+                if last is None or not all(np.array_equal(a, b) for a, b in zip(columns, last[1])):
+                    for name, values in zip(_COLUMNS, columns):
+                        _append(tmp, name, np.ascontiguousarray(values))
+                    last = (rows, columns)
+                    rows += key[1]
+                previous = key
+            entries[i] = (entry["ts"], last[0], entry["count"])
+        _append(tmp, "index", entries)
+        os.replace(tmp, out)
+        logger.info(f"🗜️  Segmento {os.path.basename(out)} do arquivo compactado: "
+                    f"{len(raw.index)} → {len(entries)} snapshots, {rows} linhas")
+        return _Segment(out)
+
+    # ── Consultas ───────────────────────────────────────────────────────────────
+    def _locate(self, t: float) -> tuple[_Segment, int] | None:
+        """Segmento e posição no índice do último snapshot com horário <= t."""
+        with self._lock:
+            segments, starts = self._segments, self._starts
+        active = segments[-1]
+        if t >= active.start:
+            segment = active
+        else:
+            k = bisect.bisect_right(starts, t) - 1
+            if k < 0:
+                return None
+            segment = segments[k]
+        return segment, int(np.searchsorted(segment.index["ts"], t, side="right")) - 1
+
+    def snapshot_at(self, t: float) -> ArchivedSnapshot | None:
+        """Todos os preços do último snapshot até o horário `t` (None se o arquivo começa depois)."""
+        found = self._locate(t)
+        if found is None:
+            return None
+        segment, i = found
+        cid, yes, no, volume = segment.rows(i)
+        if len(cid) and int(cid.max()) >= len(self._names):
+            self._load_ids()   # mercados novos gravados por outro processo
+        names = self._names
+        return ArchivedSnapshot(float(segment.index["ts"][i]), [names[c] for c in cid.tolist()], yes, no, volume)
+
+    def price_at(self, condition_id: str, t: float) -> tuple[float, float, float] | None:
+        """(horário do snapshot, yes, no) do mercado no último snapshot até `t`; None se não estava nele."""
+        cid = self._lookup(condition_id)
+        found = self._locate(t) if cid is not None else None
+        if found is None:
+            return None
+        segment, i = found
+        ids, yes, no, _ = segment.rows(i)
+        j = int(np.searchsorted(ids, cid))
+        if j == len(ids) or ids[j] != cid:
+            return None
+        return float(segment.index["ts"][i]), float(yes[j]), float(no[j])
+
+    def series(self, condition_id: str, start: float = -math.inf,
+               end: float = math.inf) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Horários, yes e no do mercado em cada snapshot entre `start` e `end` em que ele aparece."""
+        cid = self._lookup(condition_id)
+        ts, yes, no = [], [], []
+        with self._lock:
+            segments = self._segments
+        for segment in segments if cid is not None else ():
+            index = segment.index
+            lo = int(np.searchsorted(index["ts"], start, side="left"))
+            hi = int(np.searchsorted(index["ts"], end, side="right"))
+            if lo >= hi:
+                continue
+            pos = segment.positions(lo, hi, cid)
+            found = pos >= 0
+            ts.append(index["ts"][lo:hi][found])
+            yes.append(segment.column("yes")[pos[found]])
+            no.append(segment.column("no")[pos[found]])
+        if not ts:
+            return np.empty(0), np.empty(0, dtype=np.float32), np.empty(0, dtype=np.float32)
+        return np.concatenate(ts), np.concatenate(yes), np.concatenate(no)
+
+    def _lookup(self, condition_id: str) -> int | None:
+        if condition_id not in self._ids and self.readonly:
+            self._load_ids()
+        return self._ids.get(condition_id)
+
+    def disk_bytes(self) -> int:
+        total = 0
+        for root, _, files in os.walk(self.path):
+            total += sum(os.path.getsize(os.path.join(root, f)) for f in files)
+        return total
+
+    def close(self):
+        """Grava os snapshots pendentes e espera a compactação em andamento (se houver)."""
+        if self._writer is not None:
+            self._queue.put(None)
+            self._writer.join()
+            self._writer = None
+        if self._compactor is not None:
+            self._compactor.join()
+
+    # ── Abertura ────────────────────────────────────────────────────────────────
+    def _load_ids(self):
+        """Lê o dicionário a partir de onde parou a última leitura."""
+        path = os.path.join(self.path, "ids.txt")
+        try:
+            with open(path, "rb") as f:
+                f.seek(self._ids_size)
+                data = f.read()
+        except FileNotFoundError:
+            return
+        complete = data[:data.rfind(b"\n") + 1]
+        if len(complete) != len(data) and not self.readonly:
+            with open(path, "r+b") as f:   # linha cortada por uma queda no meio da gravação
+                f.truncate(self._ids_size + len(complete))
+        for cid in complete.decode("utf-8").splitlines():
+            self._ids[cid] = len(self._names)
+            self._names.append(cid)
+        self._ids_size += len(complete)
+
+    def _repair_active(self) -> int:
+        """Descarta o que uma queda deixou pela metade no segmento ativo; retorna as linhas válidas."""
+        path = os.path.join(self.path, _ACTIVE)
+        segment = _Segment(path)
+        index = segment.index
+        rows = int((index["offset"] + index["count"]).max()) if len(index) else 0
+        for name, dtype in [("index", _INDEX), *_COLUMNS.items()]:
+            file = os.path.join(path, f"{name}.bin")
+            size = (len(index) if name == "index" else rows) * dtype.itemsize
+            if os.path.exists(file) and os.path.getsize(file) != size:
+                with open(file, "r+b") as f:
+                    f.truncate(size)
+        return rows
+
+    def _open_segments(self) -> list[_Segment]:
+        entries = [e for e in os.listdir(self.path) if e.startswith("seg-")]
+        compacted = {e for e in entries if not e.endswith((".raw", ".tmp"))}
+        sealed = []
+        for entry in entries:
+            # .tmp: compactação interrompida; .raw com a versão compactada pronta: só faltou apagar
+            stale = entry.endswith(".tmp") or (entry.endswith(".raw") and entry[:-len(".raw")] in compacted)
+            if not stale:
+                sealed.append(entry)
+            elif not self.readonly:
+                shutil.rmtree(os.path.join(self.path, entry), ignore_errors=True)
+        sealed.sort(key=lambda e: int(e[len("seg-"):].split(".")[0]))
+        return [_Segment(os.path.join(self.path, e)) for e in sealed] + [_Segment(os.path.join(self.path, _ACTIVE))]
+
+    def _last_snapshot(self):
+        active = self._active
+        if not len(active.index):
+            return None
+        i = len(active.index) - 1
+        return int(active.index["offset"][i]), dict(zip(_COLUMNS, (np.array(c) for c in active.rows(i))))
+
+
+def _parse_time(value: str) -> float:
+    try:
+        return float(value)
+    except ValueError:
+        return datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dir", default=ARCHIVE_DIR)
+    parser.add_argument("--at", help="horário ISO 8601 ou Unix (padrão: agora)")
+    parser.add_argument("--market", help="condition_id: só o preço desse mercado")
+    parser.add_argument("--compact", action="store_true", help="compacta os segmentos fechados e sai")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    if args.compact:   # com o bot parado
+        archive = MarketArchive(args.dir)
+        archive.compact()
+        archive.close()
+        print(f"{len(archive)} snapshots | {archive.disk_bytes() / 1e6:.1f} MB")
+        return
+
+    archive = MarketArchive(args.dir, readonly=True)
+
+    t = _parse_time(args.at) if args.at else time.time()
+    if args.market:
+        found = archive.price_at(args.market, t)
+        if found is None:
+            print("mercado fora do arquivo nesse horário")
+            return
+        ts, yes, no = found
+        print(f"{datetime.fromtimestamp(ts).isoformat()} | yes {yes:.3f} | no {no:.3f}")
+        return
+
+    snapshot = archive.snapshot_at(t)
+    if snapshot is None:
+        print("arquivo vazio ou começa depois desse horário")
+        return
+    print(f"snapshot de {datetime.fromtimestamp(snapshot.ts).isoformat()} | {len(snapshot)} mercados")
+    for cid, yes, no, volume in zip(snapshot.condition_ids, snapshot.yes, snapshot.no, snapshot.volume):
+        print(f"{cid} | yes {yes:.3f} | no {no:.3f} | vol {volume:,.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,256 @@
+import asyncio
+import dataclasses
+import gzip
+import json
+import logging
+import os
+import time
+from dataclasses import dataclass, field
+
+import aiohttp
+
+from core import metrics
+from polymarket.client import Market, PolymarketClient
+from polymarket.store import MarketStore
+from config import (
+    CATALOG_REFRESH_INTERVAL, MARKET_SYNC_MODE, CATALOG_SNAPSHOT_PATH, CATALOG_WARM_MAX_AGE,
+)
+
+logger = logging.getLogger(__name__)
+
+_GET = metrics.counter("catalog_get_total",
+                       "Pedidos de snapshot (fresh, stale = dispara refresh, cold = espera o 1º fetch)",
+                       ("result",))
+_GET_FRESH, _GET_STALE, _GET_COLD = (_GET.labels(result=r) for r in ("fresh", "stale", "cold"))
+_REFRESH = metrics.histogram("catalog_refresh_seconds", "Duração dos refreshes do catálogo")
+_REFRESH_ERRORS = metrics.counter("catalog_refresh_errors_total", "Refreshes do catálogo que falharam")
+_AGE = metrics.gauge("catalog_snapshot_age_seconds", "Idade do snapshot do catálogo")
+_WARM = metrics.counter("catalog_warm_load_total",
+                        "Carga do catálogo salvo em disco no boot (loaded, stale, missing, error)", ("result",))
+
+_FIELDS = tuple(f.name for f in dataclasses.fields(Market))
+
+
+@dataclass(frozen=True)
+class MarketSnapshot:
+    """Foto imutável do catálogo: a lista nunca é alterada depois de publicada."""
+    markets: list[Market] = field(default_factory=list)
+    version: int = 0          # incrementa a cada refresh bem-sucedido
+    fetched_at: float = 0.0   # timestamp Unix do fetch
+
+    @property
+    def age(self) -> float:
+        """Idade do snapshot em segundos (inf se nunca carregado)."""
+        if not self.fetched_at:
+            return float("inf")
+        return time.time() - self.fetched_at
+
+
+def snapshot_to_bytes(snapshot: MarketSnapshot) -> bytes:
+    """
+    Serialização compacta do snapshot: nomes dos campos uma vez e uma lista
+    de valores por mercado. Usada no arquivo de boot e no socket dos workers.
+    """
+    return json.dumps({
+        "version": snapshot.version,
+        "fetched_at": snapshot.fetched_at,
+        "fields": _FIELDS,
+        "markets": [[getattr(m, f) for f in _FIELDS] for m in snapshot.markets],
+    }, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+def snapshot_from_bytes(data: bytes) -> MarketSnapshot:
+    """Inverso de snapshot_to_bytes; campos que o Market não conhece são descartados."""
+    doc = json.loads(data)
+    names = doc["fields"]
+    known = [i for i, name in enumerate(names) if name in _FIELDS]
+    return MarketSnapshot(
+        markets=[Market(**{names[i]: row[i] for i in known}) for row in doc["markets"]],
+        version=doc["version"],
+        fetched_at=doc["fetched_at"],
+    )
+
+
+class MarketCatalog:
+    """
+    Catálogo de mercados stale-while-revalidate.
+
+    Uma task em background renova o snapshot a cada `refresh_interval`
+    segundos; get() devolve o snapshot atual na hora, sem esperar a Gamma
+    API. Refreshes concorrentes são coalescidos em um único fetch em voo
+    (single-flight): quem chega durante um refresh só aguarda o mesmo.
+
+    Com full_sync=True (MARKET_SYNC_MODE=full) cada refresh percorre o
+    universo ativo inteiro e aplica o delta num MarketStore, em vez de
+    pegar só os `limit` mercados de maior volume.
+
+    Cada snapshot novo é salvo em `snapshot_path`; no boot, o primeiro get()
+    carrega esse arquivo (se tiver menos de `warm_max_age` segundos) e
+    revalida em background, em vez de esperar um fetch frio da Gamma API.
+    """
+
+    def __init__(self, client: PolymarketClient, limit: int = 100,
+                 refresh_interval: float = CATALOG_REFRESH_INTERVAL,
+                 full_sync: bool = MARKET_SYNC_MODE == "full",
+                 snapshot_path: str = CATALOG_SNAPSHOT_PATH,
+                 warm_max_age: float = CATALOG_WARM_MAX_AGE):
+        self.client = client
+        self.limit = limit
+        self.refresh_interval = refresh_interval
+        self.full_sync = full_sync
+        self.snapshot_path = snapshot_path
+        self.warm_max_age = warm_max_age
+        self.store = MarketStore()
+        self._snapshot = MarketSnapshot()
+        self._inflight: asyncio.Task | None = None
+        self._loop_task: asyncio.Task | None = None
+        self._warm_task: asyncio.Task | None = None
+        self._persist_task: asyncio.Task | None = None
+        _AGE.set_function(lambda: self._snapshot.age)
+
+    @property
+    def snapshot(self) -> MarketSnapshot:
+        return self._snapshot
+
+    async def get(self) -> MarketSnapshot:
+        """
+        Retorna o snapshot atual imediatamente.
+        Só espera a rede no primeiro carregamento; se o snapshot estiver
+        velho (background parado ou falhando), dispara um refresh sem esperar.
+        """
+        # No boot, o snapshot salvo em disco já serve; o refresh abaixo o revalida
+        if not self._snapshot.version and not await self.load_warm():
+            _GET_COLD.inc()
+            return await self.refresh()
+
+        if self._snapshot.age > self.refresh_interval:
+            _GET_STALE.inc()
+            if self._inflight is None:
+                self._start_refresh()
+        else:
+            _GET_FRESH.inc()
+        return self._snapshot
+
+    async def refresh(self) -> MarketSnapshot:
+        """Força um refresh, reaproveitando o que já estiver em voo (single-flight)."""
+        task = self._inflight or self._start_refresh()
+        # shield: cancelar quem espera não cancela o fetch compartilhado
+        return await asyncio.shield(task)
+
+    async def load_warm(self) -> bool:
+        """
+        Carrega o catálogo salvo em disco, uma vez só (single-flight). Retorna
+        True se há um snapshot utilizável depois disso.
+        """
+        if self._warm_task is None:
+            self._warm_task = asyncio.create_task(self._load_warm())
+        await asyncio.shield(self._warm_task)
+        return bool(self._snapshot.version)
+
+    async def _load_warm(self):
+        if not self.snapshot_path or self._snapshot.version:
+            return
+        try:
+            snapshot = await asyncio.to_thread(self._read_snapshot)
+        except FileNotFoundError:
+            _WARM.labels(result="missing").inc()
+            return
+        except (OSError, EOFError, ValueError, KeyError, TypeError) as e:
+            _WARM.labels(result="error").inc()
+            logger.error(f"Erro ao ler o catálogo salvo ({self.snapshot_path}): {e}")
+            return
+
+        age = time.time() - snapshot.fetched_at
+        if age > self.warm_max_age or not snapshot.markets:
+            _WARM.labels(result="stale").inc()
+            logger.info(f"🧊 Catálogo salvo com {age:.0f}s, velho demais — esperando a Gamma API")
+            return
+        if self._snapshot.version:
+            return  # um refresh terminou enquanto o arquivo era lido
+
+        # versão 1 e horário original: get() vê a idade real e dispara o refresh
+        self._snapshot = MarketSnapshot(snapshot.markets, version=1, fetched_at=snapshot.fetched_at)
+        _WARM.labels(result="loaded").inc()
+        logger.info(f"🔥 Catálogo carregado do disco: {len(snapshot.markets)} mercados com {age:.0f}s")
+        self.client.publish(snapshot.markets)
+
+    def _read_snapshot(self) -> MarketSnapshot:
+        with gzip.open(self.snapshot_path, "rb") as f:
+            return snapshot_from_bytes(f.read())
+
+    def _write_snapshot(self, snapshot: MarketSnapshot):
+        if os.path.dirname(self.snapshot_path):
+            os.makedirs(os.path.dirname(self.snapshot_path), exist_ok=True)
+        tmp = f"{self.snapshot_path}.tmp"
+        with gzip.open(tmp, "wb", compresslevel=1) as f:
+            f.write(snapshot_to_bytes(snapshot))
+        os.replace(tmp, self.snapshot_path)
+
+    async def _persist(self, snapshot: MarketSnapshot):
+        try:
+            await asyncio.to_thread(self._write_snapshot, snapshot)
+        except OSError as e:
+            logger.error(f"Erro ao salvar o catálogo em disco: {e}")
+
+    def start(self):
+        """Inicia o refresh periódico em background."""
+        if self._loop_task is None or self._loop_task.done():
+            self._loop_task = asyncio.create_task(self._refresh_loop())
+
+    async def stop(self):
+        if self._loop_task is not None:
+            self._loop_task.cancel()
+            try:
+                await self._loop_task
+            except asyncio.CancelledError:
+                pass
+            self._loop_task = None
+
+    def _start_refresh(self) -> asyncio.Task:
+        self._inflight = asyncio.create_task(self._do_refresh())
+        return self._inflight
+
+    async def _do_refresh(self) -> MarketSnapshot:
+        started = time.perf_counter()
+        try:
+            if self.full_sync:
+                markets = await self.client.sync_all_async(self.store)
+            else:
+                markets = await self.client.refresh_async(self.limit)
+            if markets:
+                self._snapshot = MarketSnapshot(
+                    markets=markets,
+                    version=self._snapshot.version + 1,
+                    fetched_at=time.time(),
+                )
+                if self.snapshot_path and (self._persist_task is None or self._persist_task.done()):
+                    # fora do caminho do refresh; se a gravação anterior ainda
+                    # roda, esta é pulada e a próxima pega o catálogo mais novo
+                    self._persist_task = asyncio.create_task(self._persist(self._snapshot))
+            else:
+                logger.warning("⚠️  Gamma API retornou catálogo vazio — mantendo snapshot anterior")
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            _REFRESH_ERRORS.inc()
+            logger.error(f"Erro ao renovar catálogo: {e} (snapshot v{self._snapshot.version} "
+                         f"com {self._snapshot.age:.0f}s)")
+        except Exception as e:
+            # parse (ValueError/KeyError), callback de on_refresh...: o snapshot
+            # anterior continua valendo e o próximo ciclo tenta de novo
+            _REFRESH_ERRORS.inc()
+            logger.exception(f"Erro inesperado ao renovar catálogo: {e!r} (snapshot "
+                             f"v{self._snapshot.version} com {self._snapshot.age:.0f}s)")
+        finally:
+            self._inflight = None
+            _REFRESH.observe(time.perf_counter() - started)
+        return self._snapshot
+
+    async def _refresh_loop(self):
+        logger.info(f"🔄 Refresh do catálogo em background a cada {self.refresh_interval}s")
+        while True:
+            try:
+                await self.refresh()
+            except Exception as e:
+                # _do_refresh já trata os erros dele; isto só garante que o loop não morre
+                _REFRESH_ERRORS.inc()
+                logger.exception(f"Erro no loop de refresh do catálogo: {e!r}")
+            await asyncio.sleep(self.refresh_interval)
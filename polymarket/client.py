@@ -1,15 +1,31 @@
+import asyncio
 import time
-import requests
 import logging
 from dataclasses import dataclass, field
+from typing import TYPE_CHECKING
+
+import aiohttp
+
+from core import metrics
+from core.http import AsyncHTTPPool
+from config import MARKET_SYNC_PAGE_SIZE, MARKET_SYNC_CONCURRENCY, MARKET_SYNC_MIN_RATIO
+
+if TYPE_CHECKING:
+    from polymarket.store import MarketStore
 
 logger = logging.getLogger(__name__)
 
 GAMMA_API = "https://gamma-api.polymarket.com"
 CLOB_API  = "https://clob.polymarket.com"
 
+_CACHE = metrics.counter("polymarket_markets_cache_total",
+                         "Consultas ao cache de mercados (hit, miss, stale = fallback expirado)", ("result",))
+_CACHE_HIT, _CACHE_MISS, _CACHE_STALE = (_CACHE.labels(result=r) for r in ("hit", "miss", "stale"))
+_FETCH = metrics.histogram("polymarket_fetch_seconds", "Duração dos fetches na Gamma API", ("kind",))
+_FETCH_TOP, _FETCH_FULL = _FETCH.labels(kind="top"), _FETCH.labels(kind="full")
 
-@dataclass
+
+@dataclass(slots=True)
 class Market:
     condition_id: str
     question: str
@@ -20,6 +36,9 @@ class Market:
     end_date: str
     active: bool
     slug: str = ""     # slug para URL pública (ex: "will-fed-cut-rates-march-2025")
+    yes_token_id: str = ""  # token do CLOB, usado pelo feed de preços ao vivo
+    no_token_id: str = ""
+    category: str = ""      # categoria da Gamma API (Politics, Crypto, Sports...), usada nos filtros de assinatura
 
     @property
     def implied_yes_prob(self) -> float:
@@ -37,85 +56,230 @@ class PolymarketClient:
 
     Cache TTL de 5 minutos: evita bater na API para cada mensagem
     recebida, especialmente quando várias chegam em sequência.
+
+    Tem dois modos de acesso: fetch_active_markets (requests, bloqueante)
+    e fetch_active_markets_async (pool aiohttp compartilhado), que é o
+    usado pelo pipeline live para não travar o event loop.
     """
 
     _CACHE_TTL = 300  # segundos
 
-    def __init__(self):
+    def __init__(self, http: AsyncHTTPPool | None = None, base_url: str = GAMMA_API):
         self._cache: list[Market] = []
         self._cache_time: float = 0.0
+        self._refresh_handlers = []
+        self.http = http or AsyncHTTPPool()
+        self.base_url = base_url  # sobrescrito em benchmarks para um servidor local
+
+    def on_refresh(self, handler):
+        """Registra callback chamado com a lista nova a cada renovação do cache."""
+        self._refresh_handlers.append(handler)
 
     def fetch_active_markets(self, limit: int = 100) -> list[Market]:
         """Retorna mercados ativos com maior volume. Usa cache de 5 min."""
-        now = time.time()
-        age = now - self._cache_time
+        cached = self._fresh_cache()
+        if cached is not None:
+            return cached
+
+        import requests  # só o caminho síncrono usa; importado sob demanda
+        try:
+            with _FETCH_TOP.time():
+                resp = requests.get(
+                    f"{self.base_url}/markets",
+                    params=self._params(limit),
+                    timeout=10,
+                )
+                resp.raise_for_status()
+            return self._store(self._parse_markets(resp.json()))
+
+        except requests.RequestException as e:
+            logger.error(f"Erro ao buscar mercados: {e}")
+            return self._stale_fallback()
+
+    async def fetch_active_markets_async(self, limit: int = 100) -> list[Market]:
+        """Versão assíncrona de fetch_active_markets, via pool keep-alive."""
+        cached = self._fresh_cache()
+        if cached is not None:
+            return cached
+
+        try:
+            return await self.refresh_async(limit)
+
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            logger.error(f"Erro ao buscar mercados: {e}")
+            return self._stale_fallback()
+
+    async def refresh_async(self, limit: int = 100) -> list[Market]:
+        """
+        Busca o catálogo na Gamma API ignorando o TTL e renova o cache.
+        Diferente de fetch_active_markets_async, propaga erros de rede
+        (usado pelo MarketCatalog, que decide o que fazer com a falha).
+        """
+        with _FETCH_TOP.time():
+            data = await self.http.get_json(f"{self.base_url}/markets", params=self._params(limit))
+        return self._store(self._parse_markets(data))
+
+    async def fetch_all_async(
+        self,
+        page_size: int = MARKET_SYNC_PAGE_SIZE,
+        concurrency: int = MARKET_SYNC_CONCURRENCY,
+    ) -> list[Market]:
+        """
+        Percorre o catálogo ativo inteiro da Gamma API com paginação por offset,
+        usando até `concurrency` páginas em voo ao mesmo tempo.
+
+        A ordenação é por id (estável), para que mercados não troquem de
+        página durante o sync como aconteceria ordenando por volume.
+        Qualquer página com erro derruba o sync inteiro: um catálogo parcial
+        faria o store remover mercados que continuam ativos.
+
+        A Gamma API pode limitar o `limit` abaixo de `page_size`: o passo
+        entre offsets é o tamanho da primeira página, e o fim do catálogo é
+        a primeira página vazia (não a primeira página curta).
+        """
+        async def fetch(offset: int, limit: int) -> list[dict]:
+            params = {**self._params(limit), "offset": offset, "order": "id", "ascending": "true"}
+            return await self.http.get_json(f"{self.base_url}/markets", params=params)
+
+        first = await fetch(0, page_size)
+        if not first:
+            return []
+        step = min(page_size, len(first))
+        pages: dict[int, list[Market]] = {0: self._parse_markets(first)}
+        next_offset = step
+        end_offset: int | None = None  # offset da primeira página vazia
+
+        async def worker():
+            nonlocal next_offset, end_offset
+            while end_offset is None or next_offset < end_offset:
+                offset = next_offset
+                next_offset += step
+                data = await fetch(offset, step)
+                pages[offset] = self._parse_markets(data)
+                if not data and (end_offset is None or offset < end_offset):
+                    end_offset = offset
+
+        tasks = [asyncio.create_task(worker()) for _ in range(concurrency)]
+        try:
+            await asyncio.gather(*tasks)
+        except BaseException:
+            for t in tasks:
+                t.cancel()
+            raise
+        return [m for offset in sorted(pages) if offset < end_offset for m in pages[offset]]
+
+    async def sync_all_async(self, store: "MarketStore", **kwargs) -> list[Market]:
+        """
+        Sync completo: busca todas as páginas e aplica o delta no `store`
+        (por condition_id), renovando o cache com o universo ativo inteiro.
+        """
+        start = time.time()
+        with _FETCH_FULL.time():
+            markets = await self.fetch_all_async(**kwargs)
+        # Queda brusca no tamanho do catálogo: provavelmente resposta truncada, não
+        # mercados encerrados. Atualiza o que veio sem remover os ausentes.
+        complete = not (len(store) and len(markets) < MARKET_SYNC_MIN_RATIO * len(store))
+        if not complete:
+            logger.warning(f"⚠️  Sync completo trouxe {len(markets)} mercados contra {len(store)} no anterior; "
+                           f"ausentes mantidos")
+        stats = store.merge(markets, complete=complete)
+        logger.info(
+            f"🌐 Sync completo em {time.time() - start:.1f}s: "
+            f"{len(store)} mercados ativos ({stats})"
+        )
+        return self._store(store.markets())
+
+    def _fresh_cache(self) -> list[Market] | None:
+        """Retorna o cache se ainda estiver dentro do TTL."""
+        age = time.time() - self._cache_time
 
         if self._cache and age < self._CACHE_TTL:
+            _CACHE_HIT.inc()
             remaining = int(self._CACHE_TTL - age)
             logger.info(
                 f"📊 {len(self._cache)} mercados do cache "
                 f"(expira em {remaining}s)"
             )
             return self._cache
+        _CACHE_MISS.inc()
+        return None
 
-        try:
-            resp = requests.get(
-                f"{GAMMA_API}/markets",
-                params={
-                    "active": "true",
-                    "closed": "false",
-                    "limit": limit,
-                    "order": "volume24hr",
-                    "ascending": "false",
-                },
-                timeout=10,
-            )
-            resp.raise_for_status()
-            data = resp.json()
-            markets = []
-
-            for m in data:
-                try:
-                    tokens = m.get("tokens", [])
-                    yes_token = next((t for t in tokens if t.get("outcome") == "Yes"), None)
-                    no_token  = next((t for t in tokens if t.get("outcome") == "No"), None)
-
-                    if not yes_token or not no_token:
-                        continue
-
-                    yes_price = float(yes_token.get("price", 0))
-                    no_price  = float(no_token.get("price", 0))
-
-                    markets.append(Market(
-                        condition_id = m.get("conditionId", ""),
-                        question     = m.get("question", ""),
-                        description  = m.get("description", ""),
-                        yes_price    = yes_price,
-                        no_price     = no_price,
-                        volume_24h   = float(m.get("volume24hr", 0)),
-                        end_date     = m.get("endDate", ""),
-                        active       = True,
-                        slug         = m.get("slug", ""),
-                    ))
-                except Exception as e:
-                    logger.debug(f"Pulando mercado com erro: {e}")
+    def _stale_fallback(self) -> list[Market]:
+        # Fallback: retorna cache expirado se existir (melhor que lista vazia)
+        if self._cache:
+            _CACHE_STALE.inc()
+            logger.warning("⚠️  API indisponível — usando cache expirado como fallback")
+            return self._cache
+        return []
+
+    @staticmethod
+    def _params(limit: int) -> dict:
+        return {
+            "active": "true",
+            "closed": "false",
+            "limit": limit,
+            "order": "volume24hr",
+            "ascending": "false",
+        }
+
+    @staticmethod
+    def _parse_markets(data: list[dict]) -> list[Market]:
+        """Converte a resposta da Gamma API em Market, pulando itens malformados."""
+        markets = []
+
+        for m in data:
+            try:
+                tokens = m.get("tokens", [])
+                yes_token = next((t for t in tokens if t.get("outcome") == "Yes"), None)
+                no_token  = next((t for t in tokens if t.get("outcome") == "No"), None)
+
+                if not yes_token or not no_token:
                     continue
 
-            # Atualiza cache
-            self._cache = markets
-            self._cache_time = now
-            logger.info(f"📊 {len(markets)} mercados carregados da Polymarket (cache renovado)")
-            return markets
+                yes_price = float(yes_token.get("price", 0))
+                no_price  = float(no_token.get("price", 0))
 
-        except requests.RequestException as e:
-            logger.error(f"Erro ao buscar mercados: {e}")
-            # Fallback: retorna cache expirado se existir (melhor que lista vazia)
-            if self._cache:
-                logger.warning("⚠️  API indisponível — usando cache expirado como fallback")
-                return self._cache
-            return []
+                markets.append(Market(
+                    condition_id = m.get("conditionId", ""),
+                    question     = m.get("question", ""),
+                    description  = m.get("description", ""),
+                    yes_price    = yes_price,
+                    no_price     = no_price,
+                    volume_24h   = float(m.get("volume24hr", 0) or 0),
+                    end_date     = m.get("endDate", ""),
+                    active       = bool(m.get("active", True)) and not m.get("closed", False),
+                    slug         = m.get("slug", ""),
+                    yes_token_id = str(yes_token.get("token_id", "")),
+                    no_token_id  = str(no_token.get("token_id", "")),
+                    category     = m.get("category") or "",
+                ))
+            except Exception as e:
+                logger.debug(f"Pulando mercado com erro: {e}")
+                continue
+
+        return markets
+
+    def publish(self, markets: list[Market]) -> list[Market]:
+        """
+        Adota um catálogo obtido fora deste cliente (ex: snapshot do supervisor
+        num worker) como se viesse da Gamma API: cache e callbacks de on_refresh.
+        """
+        return self._store(markets)
+
+    def _store(self, markets: list[Market]) -> list[Market]:
+        """Atualiza o cache e avisa os callbacks registrados em on_refresh."""
+        self._cache = markets
+        self._cache_time = time.time()
+        logger.info(f"📊 {len(markets)} mercados carregados da Polymarket (cache renovado)")
+        for cb in self._refresh_handlers:
+            try:
+                cb(markets)
+            except Exception as e:
+                logger.error(f"Erro no callback de refresh: {e}")
+        return markets
 
-    def get_market_url(self, market: Market) -> str:
+    @staticmethod
+    def get_market_url(market: Market) -> str:
         """
         Retorna a URL pública do mercado.
         Usa o slug human-readable quando disponível; fallback para condition_id.
@@ -0,0 +1,197 @@
+import math
+from datetime import datetime
+
+import numpy as np
+
+from polymarket.client import Market
+
+
+def _end_ts(end_date: str) -> float:
+    """endDate ISO da Gamma API → timestamp Unix (NaN se ausente ou inválido)."""
+    try:
+        return datetime.fromisoformat(end_date.replace("Z", "+00:00")).timestamp()
+    except (ValueError, AttributeError):
+        return math.nan
+
+
+class ColumnarMarketStore:
+    """
+    Catálogo em colunas NumPy: preços, volume e vencimento ficam em arrays
+    contíguos, com um índice condition_id → linha.
+
+    Os campos de texto ficam em listas paralelas e só viram Market quando
+    alguém pede (view/views). Permite calcular o edge de YES e NO do
+    catálogo inteiro numa passada vetorizada a cada tick de preço
+    (EstimateStore). Fica ao lado do catálogo, não no lugar dele: o
+    MarketSnapshot publicado a cada refresh continua sendo um list[Market].
+
+    Remoção troca a linha removida pela última, então as linhas não são
+    estáveis entre syncs — use sempre o condition_id como chave externa.
+    """
+
+    _TEXT_FIELDS = ("question", "description", "end_date", "slug", "yes_token_id", "no_token_id", "category")
+
+    def __init__(self, capacity: int = 1024):
+        self._size = 0
+        self._row: dict[str, int] = {}
+        self._ids: list[str] = []
+        self._text: dict[str, list[str]] = {f: [] for f in self._TEXT_FIELDS}
+        self.yes = np.zeros(capacity, dtype=np.float64)
+        self.no = np.zeros(capacity, dtype=np.float64)
+        self.volume = np.zeros(capacity, dtype=np.float64)
+        self.end_ts = np.full(capacity, np.nan, dtype=np.float64)
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __contains__(self, condition_id: str) -> bool:
+        return condition_id in self._row
+
+    @property
+    def ids(self) -> list[str]:
+        return self._ids
+
+    def row(self, condition_id: str) -> int | None:
+        return self._row.get(condition_id)
+
+    # ── Escrita ─────────────────────────────────────────────────────────────────
+    def sync(self, markets: list[Market], complete: bool = True):
+        """
+        Aplica um refresh do catálogo (ligado em PolymarketClient.on_refresh).
+        Preços e volumes são gravados em bloco; texto só para linhas novas ou
+        com algum campo de texto alterado (todos os que view() devolve).
+        Com complete=True, mercados ausentes são removidos.
+        """
+        rows = np.empty(len(markets), dtype=np.intp)
+        seen = set()
+
+        for i, m in enumerate(markets):
+            seen.add(m.condition_id)
+            r = self._row.get(m.condition_id)
+            if r is None:
+                r = self._append(m)
+            elif any(self._text[f][r] != getattr(m, f) for f in self._TEXT_FIELDS):
+                self._set_text(r, m)
+            rows[i] = r
+
+        if len(markets):
+            self.yes[rows] = np.fromiter((m.yes_price for m in markets), np.float64, len(markets))
+            self.no[rows] = np.fromiter((m.no_price for m in markets), np.float64, len(markets))
+            self.volume[rows] = np.fromiter((m.volume_24h for m in markets), np.float64, len(markets))
+
+        if complete:
+            for cid in [cid for cid in self._ids if cid not in seen]:
+                self.remove(cid)
+
+    def set_prices(self, condition_id: str, yes: float, no: float, *_):
+        """Atualiza o preço de um mercado (ligado em LivePriceTable.on_update)."""
+        r = self._row.get(condition_id)
+        if r is not None:
+            self.yes[r] = yes
+            self.no[r] = no
+
+    def remove(self, condition_id: str):
+        r = self._row.pop(condition_id, None)
+        if r is None:
+            return
+
+        last = self._size - 1
+        if r != last:
+            moved = self._ids[last]
+            self._ids[r] = moved
+            self._row[moved] = r
+            for col in (self.yes, self.no, self.volume, self.end_ts):
+                col[r] = col[last]
+            for values in self._text.values():
+                values[r] = values[last]
+
+        self._ids.pop()
+        for values in self._text.values():
+            values.pop()
+        self._size = last
+
+    def _append(self, m: Market) -> int:
+        if self._size == len(self.yes):
+            self._grow()
+        r = self._size
+        self._size += 1
+        self._row[m.condition_id] = r
+        self._ids.append(m.condition_id)
+        for f in self._TEXT_FIELDS:
+            self._text[f].append(getattr(m, f))
+        self.end_ts[r] = _end_ts(m.end_date)
+        return r
+
+    def _set_text(self, r: int, m: Market):
+        for f in self._TEXT_FIELDS:
+            self._text[f][r] = getattr(m, f)
+        self.end_ts[r] = _end_ts(m.end_date)
+
+    def _grow(self):
+        cap = max(1024, 2 * len(self.yes))
+        for name in ("yes", "no", "volume"):
+            col = np.zeros(cap, dtype=np.float64)
+            col[:self._size] = getattr(self, name)[:self._size]
+            setattr(self, name, col)
+        end_ts = np.full(cap, np.nan, dtype=np.float64)
+        end_ts[:self._size] = self.end_ts[:self._size]
+        self.end_ts = end_ts
+
+    # ── Leitura ─────────────────────────────────────────────────────────────────
+    def view(self, condition_id: str) -> Market | None:
+        """Market montado sob demanda a partir das colunas."""
+        r = self._row.get(condition_id)
+        if r is None:
+            return None
+        return Market(
+            condition_id = condition_id,
+            question     = self._text["question"][r],
+            description  = self._text["description"][r],
+            yes_price    = float(self.yes[r]),
+            no_price     = float(self.no[r]),
+            volume_24h   = float(self.volume[r]),
+            end_date     = self._text["end_date"][r],
+            active       = True,
+            slug         = self._text["slug"][r],
+            yes_token_id = self._text["yes_token_id"][r],
+            no_token_id  = self._text["no_token_id"][r],
+            category     = self._text["category"][r],
+        )
+
+    def views(self, condition_ids) -> list[Market]:
+        return [m for m in (self.view(cid) for cid in condition_ids) if m is not None]
+
+    def edges(self, estimates: dict[str, float]) -> tuple[list[str], np.ndarray, np.ndarray]:
+        """
+        Edge de YES e NO para cada estimativa de probabilidade (do YES),
+        numa passada vetorizada: edge_yes = p - yes, edge_no = (1 - p) - no.
+        Retorna (condition_ids, edge_yes, edge_no) alinhados; estimativas de
+        mercados fora do store são ignoradas.
+        """
+        ids = [cid for cid in estimates if cid in self._row]
+        rows = np.fromiter((self._row[cid] for cid in ids), np.intp, len(ids))
+        probs = np.fromiter((estimates[cid] for cid in ids), np.float64, len(ids))
+        return ids, probs - self.yes[rows], (1.0 - probs) - self.no[rows]
+
+    def best_edges(self, estimates: dict[str, float], threshold: float) -> list[tuple[str, str, float, float]]:
+        """
+        Mercados cujo melhor lado tem edge >= threshold, como
+        (condition_id, direção, edge, preço_atual), do maior edge para o menor.
+        """
+        ids, edge_yes, edge_no = self.edges(estimates)
+        if not ids:
+            return []
+
+        use_yes = edge_yes >= edge_no
+        best = np.where(use_yes, edge_yes, edge_no)
+        hits = np.flatnonzero(best >= threshold)
+        hits = hits[np.argsort(-best[hits])]
+
+        out = []
+        for i in hits:
+            r = self._row[ids[i]]
+            if use_yes[i]:
+                out.append((ids[i], "YES", float(edge_yes[i]), float(self.yes[r])))
+            else:
+                out.append((ids[i], "NO", float(edge_no[i]), float(self.no[r])))
+        return out
@@ -0,0 +1,246 @@
+import asyncio
+import json
+import logging
+import time
+
+import aiohttp
+
+from core.http import AsyncHTTPPool
+from polymarket.client import CLOB_API, Market
+from config import PRICE_FEED_MODE, PRICE_FEED_MAX_MARKETS, PRICE_FEED_POLL_INTERVAL
+
+logger = logging.getLogger(__name__)
+
+CLOB_WS = "wss://ws-subscriptions-clob.polymarket.com/ws/market"
+
+
+class LivePriceTable:
+    """
+    Tabela em memória de preços YES/NO ao vivo, atualizada no lugar.
+
+    Cada mercado acompanhado tem uma linha [yes, no, updated_at]; o feed
+    traduz token_id → (condition_id, lado) e só escreve o lado que mudou.
+    Callbacks registrados em on_update recebem (condition_id, yes, no, ts)
+    a cada tick.
+    """
+
+    def __init__(self):
+        self._rows: dict[str, list[float]] = {}              # condition_id → [yes, no, ts]
+        self._tokens: dict[str, tuple[str, int]] = {}        # token_id → (condition_id, 0=yes/1=no)
+        self._update_handlers = []
+        self.updates = 0
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def on_update(self, handler):
+        """Registra callback chamado a cada preço novo aplicado."""
+        self._update_handlers.append(handler)
+
+    @property
+    def token_ids(self) -> list[str]:
+        return list(self._tokens)
+
+    def track(self, markets: list[Market]) -> bool:
+        """
+        Define os mercados acompanhados. Mercados novos entram com o preço do
+        snapshot (até o primeiro tick); os que já têm preço ao vivo mantêm o seu.
+        Retorna True se o conjunto de tokens mudou.
+        """
+        tokens: dict[str, tuple[str, int]] = {}
+        rows: dict[str, list[float]] = {}
+
+        for m in markets:
+            if not m.yes_token_id or not m.no_token_id:
+                continue
+            tokens[m.yes_token_id] = (m.condition_id, 0)
+            tokens[m.no_token_id] = (m.condition_id, 1)
+            rows[m.condition_id] = self._rows.get(m.condition_id) or [m.yes_price, m.no_price, 0.0]
+
+        changed = tokens.keys() != self._tokens.keys()
+        self._tokens = tokens
+        self._rows = rows
+        return changed
+
+    def apply(self, token_id: str, price: float, ts: float | None = None) -> bool:
+        """Aplica um preço de token. Retorna False se o token não é acompanhado."""
+        ref = self._tokens.get(token_id)
+        if ref is None:
+            return False
+
+        cid, side = ref
+        row = self._rows[cid]
+        row[side] = price
+        row[2] = ts or time.time()
+        self.updates += 1
+
+        for cb in self._update_handlers:
+            try:
+                cb(cid, row[0], row[1], row[2])
+            except Exception as e:
+                logger.error(f"Erro no callback de preço: {e}")
+        return True
+
+    def get(self, condition_id: str) -> tuple[float, float, float] | None:
+        """(yes, no, updated_at) do mercado; updated_at=0 se ainda sem tick ao vivo."""
+        row = self._rows.get(condition_id)
+        return (row[0], row[1], row[2]) if row else None
+
+    def live_price(self, condition_id: str, direction: str) -> float | None:
+        """Preço ao vivo do lado `direction` ("YES"/"NO"), ou None se não acompanhado."""
+        row = self._rows.get(condition_id)
+        if row is None:
+            return None
+        return row[0] if direction == "YES" else row[1]
+
+
+def _extract_prices(event: dict) -> list[tuple[str, float]]:
+    """
+    Extrai (token_id, preço) de um evento do canal market do CLOB.
+    Usa o mid entre melhor bid/ask quando disponível, senão o preço informado.
+    """
+    kind = event.get("event_type")
+
+    if kind == "book":
+        bids = [float(b["price"]) for b in event.get("bids", [])]
+        asks = [float(a["price"]) for a in event.get("asks", [])]
+        if bids and asks:
+            return [(event["asset_id"], (max(bids) + min(asks)) / 2)]
+        return []
+
+    if kind == "price_change":
+        out = []
+        for ch in event.get("price_changes") or event.get("changes") or []:
+            asset = ch.get("asset_id", event.get("asset_id"))
+            if ch.get("best_bid") and ch.get("best_ask"):
+                out.append((asset, (float(ch["best_bid"]) + float(ch["best_ask"])) / 2))
+            elif ch.get("price") is not None:
+                out.append((asset, float(ch["price"])))
+        return out
+
+    if kind == "last_trade_price" and event.get("price") is not None:
+        return [(event["asset_id"], float(event["price"]))]
+
+    return []
+
+
+class PriceFeed:
+    """
+    Assinatura de preços do CLOB que mantém um LivePriceTable atualizado.
+
+    Modo "ws": websocket do canal market; se a conexão cair ou não abrir,
+    usa polling de /midpoints até a próxima tentativa de reconexão.
+    Modo "poll": só polling, a cada `poll_interval` segundos.
+    """
+
+    _WS_PING_INTERVAL = 10   # o CLOB espera "PING" em texto periodicamente
+    _WS_RETRY = 30           # segundos em polling antes de tentar o websocket de novo
+    _POLL_BATCH = 500        # tokens por request de /midpoints
+
+    def __init__(
+        self,
+        table: LivePriceTable,
+        http: AsyncHTTPPool | None = None,
+        mode: str = PRICE_FEED_MODE,
+        max_markets: int = PRICE_FEED_MAX_MARKETS,
+        poll_interval: float = PRICE_FEED_POLL_INTERVAL,
+        ws_url: str = CLOB_WS,
+        clob_url: str = CLOB_API,
+    ):
+        self.table = table
+        self.http = http or AsyncHTTPPool()
+        self.mode = mode
+        self.max_markets = max_markets
+        self.poll_interval = poll_interval
+        self.ws_url = ws_url
+        self.clob_url = clob_url
+        self._resubscribe = asyncio.Event()
+        self._task: asyncio.Task | None = None
+
+    def track(self, markets: list[Market]):
+        """Acompanha os `max_markets` de maior volume (ligado em PolymarketClient.on_refresh)."""
+        top = sorted(markets, key=lambda m: m.volume_24h, reverse=True)[:self.max_markets]
+        if self.table.track(top):
+            self._resubscribe.set()
+
+    def start(self):
+        if self.mode == "off" or (self._task is not None and not self._task.done()):
+            return
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        logger.info(f"📡 Feed de preços do CLOB iniciado (modo {self.mode})")
+        while True:
+            if self.mode == "ws":
+                try:
+                    await self._run_ws()
+                    continue  # resubscribe: reconecta com o conjunto novo de tokens
+                except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+                    logger.warning(f"⚠️  Websocket do CLOB indisponível ({e}) — usando polling")
+            try:
+                await asyncio.wait_for(self._run_poll(), timeout=self._WS_RETRY if self.mode == "ws" else None)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _run_ws(self):
+        while not self.table.token_ids:
+            await asyncio.sleep(1)
+
+        self._resubscribe.clear()
+        async with self.http.ws_connect(self.ws_url) as ws:
+            await ws.send_str(json.dumps({"assets_ids": self.table.token_ids, "type": "market"}))
+            logger.info(f"📡 Websocket do CLOB: {len(self.table)} mercados assinados")
+            pinger = asyncio.create_task(self._ping(ws))
+            try:
+                while not self._resubscribe.is_set():
+                    try:
+                        msg = await ws.receive(timeout=1)
+                    except asyncio.TimeoutError:
+                        continue
+                    if msg.type != aiohttp.WSMsgType.TEXT:
+                        if msg.type in (aiohttp.WSMsgType.CLOSED, aiohttp.WSMsgType.ERROR):
+                            raise aiohttp.ClientError(f"websocket fechado ({msg.type.name})")
+                        continue
+                    if msg.data == "PONG":
+                        continue
+                    self._handle(json.loads(msg.data))
+            finally:
+                pinger.cancel()
+
+    async def _ping(self, ws):
+        while True:
+            await asyncio.sleep(self._WS_PING_INTERVAL)
+            await ws.send_str("PING")
+
+    def _handle(self, payload):
+        events = payload if isinstance(payload, list) else [payload]
+        now = time.time()
+        for event in events:
+            for token_id, price in _extract_prices(event):
+                self.table.apply(token_id, price, now)
+
+    async def _run_poll(self):
+        while True:
+            tokens = self.table.token_ids
+            for i in range(0, len(tokens), self._POLL_BATCH):
+                batch = tokens[i:i + self._POLL_BATCH]
+                try:
+                    data = await self.http.post_json(
+                        f"{self.clob_url}/midpoints", [{"token_id": t} for t in batch]
+                    )
+                except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                    logger.error(f"Erro no polling de preços: {e}")
+                    break
+                now = time.time()
+                for token_id, price in (data or {}).items():
+                    self.table.apply(token_id, float(price), now)
+            await asyncio.sleep(self.poll_interval)
@@ -0,0 +1,186 @@
+import logging
+import time
+
+import numpy as np
+
+from core import metrics
+from polymarket.client import Market
+from config import (
+    PRICE_HISTORY_SIZE, PRICE_HISTORY_RESOLUTION,
+    PRICED_IN_MIN_MOVE, PRICED_IN_VOL_MULT, PRICED_IN_VOL_WINDOW,
+)
+
+logger = logging.getLogger(__name__)
+
+_PRICED_IN = metrics.counter("priced_in_candidates_total",
+                             "Candidatos da pré-seleção conferidos contra o histórico (kept, skipped)", ("result",))
+_KEPT, _SKIPPED = _PRICED_IN.labels(result="kept"), _PRICED_IN.labels(result="skipped")
+
+
+class PriceHistory:
+    """
+    Histórico recente de preços YES/NO por mercado em ring buffers NumPy.
+
+    Cada mercado ocupa uma linha de três matrizes (horário, yes, no) com
+    `size` posições: memória fixa por mercado, a posição mais velha é
+    sobrescrita. Pontos a menos de `resolution` segundos do anterior só
+    atualizam o preço dele, então uma rajada de ticks não apaga o passado.
+    Os horários são float32 relativos à criação (precisão bem abaixo de 1s
+    por meses).
+
+    Alimentado por PolymarketClient.on_refresh (sync) e
+    LivePriceTable.on_update (record). Linhas de mercados removidos voltam
+    para uma lista livre, então as linhas são estáveis enquanto o mercado existe.
+    """
+
+    def __init__(self, size: int = PRICE_HISTORY_SIZE, resolution: float = PRICE_HISTORY_RESOLUTION,
+                 capacity: int = 256, min_move: float = PRICED_IN_MIN_MOVE,
+                 vol_mult: float = PRICED_IN_VOL_MULT, vol_window: float = PRICED_IN_VOL_WINDOW):
+        self.size = size
+        self.resolution = resolution
+        self.min_move = min_move
+        self.vol_mult = vol_mult
+        self.vol_window = vol_window
+        self._epoch = time.time()
+        self._row: dict[str, int] = {}
+        self._free: list[int] = list(range(capacity - 1, -1, -1))
+        self.ts = np.zeros((capacity, size), dtype=np.float32)
+        self.yes = np.zeros((capacity, size), dtype=np.float32)
+        self.no = np.zeros((capacity, size), dtype=np.float32)
+        self._head = np.zeros(capacity, dtype=np.int32)    # próxima posição a escrever
+        self._count = np.zeros(capacity, dtype=np.int32)
+
+    def __len__(self) -> int:
+        return len(self._row)
+
+    def __contains__(self, condition_id: str) -> bool:
+        return condition_id in self._row
+
+    # ── Escrita ─────────────────────────────────────────────────────────────────
+    def record(self, condition_id: str, yes: float, no: float, ts: float | None = None):
+        """Grava um preço (ligado em LivePriceTable.on_update: (condition_id, yes, no, ts))."""
+        r = self._row.get(condition_id)
+        if r is None:
+            r = self._alloc(condition_id)
+        t = (ts or time.time()) - self._epoch
+        n = self._count[r]
+        if n:
+            last = (self._head[r] - 1) % self.size
+            if t < self.ts[r, last]:
+                return  # fora de ordem (tick atrasado): o ponto mais novo já vale
+            if t - self.ts[r, last] < self.resolution:
+                self.yes[r, last] = yes
+                self.no[r, last] = no
+                return
+        h = self._head[r]
+        self.ts[r, h] = t
+        self.yes[r, h] = yes
+        self.no[r, h] = no
+        self._head[r] = (h + 1) % self.size
+        self._count[r] = min(n + 1, self.size)
+
+    def sync(self, markets: list[Market], ts: float | None = None, complete: bool = True):
+        """
+        Grava os preços de um refresh do catálogo (ligado em on_refresh). Com
+        complete=True, libera as linhas dos mercados que saíram do catálogo.
+        """
+        ts = ts or time.time()
+        for m in markets:
+            self.record(m.condition_id, m.yes_price, m.no_price, ts)
+        if complete and len(self._row) > len(markets):
+            seen = {m.condition_id for m in markets}
+            for cid in [cid for cid in self._row if cid not in seen]:
+                self.remove(cid)
+
+    def remove(self, condition_id: str):
+        r = self._row.pop(condition_id, None)
+        if r is not None:
+            self._count[r] = 0
+            self._head[r] = 0
+            self._free.append(r)
+
+    def _alloc(self, condition_id: str) -> int:
+        if not self._free:
+            self._grow()
+        r = self._free.pop()
+        self._row[condition_id] = r
+        return r
+
+    def _grow(self):
+        old = len(self._head)
+        cap = max(1, 2 * old)
+        for name in ("ts", "yes", "no"):
+            col = np.zeros((cap, self.size), dtype=np.float32)
+            col[:old] = getattr(self, name)
+            setattr(self, name, col)
+        for name in ("_head", "_count"):
+            col = np.zeros(cap, dtype=np.int32)
+            col[:old] = getattr(self, name)
+            setattr(self, name, col)
+        self._free.extend(range(cap - 1, old - 1, -1))
+
+    # ── Consultas ───────────────────────────────────────────────────────────────
+    def series(self, condition_id: str) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """(horários Unix, yes, no) do mais velho ao mais novo; vazios se o mercado não tem histórico."""
+        r = self._row.get(condition_id)
+        if r is None or not self._count[r]:
+            empty = np.zeros(0)
+            return empty, empty, empty
+        n = self._count[r]
+        idx = (self._head[r] - n + np.arange(n)) % self.size
+        return self.ts[r, idx].astype(np.float64) + self._epoch, self.yes[r, idx], self.no[r, idx]
+
+    def price_at(self, condition_id: str, ts: float) -> tuple[float, float] | None:
+        """(yes, no) vigente em `ts`: o último ponto até ali, ou None se o histórico começa depois."""
+        times, yes, no = self.series(condition_id)
+        i = int(np.searchsorted(times, ts, side="right")) - 1
+        if i < 0:
+            return None
+        return float(yes[i]), float(no[i])
+
+    def change_since(self, condition_id: str, since: float) -> float | None:
+        """
+        Variação do preço YES de `since` até o ponto mais novo. Se o histórico
+        começa depois de `since`, mede a partir do ponto mais velho (limite
+        inferior da variação real). None sem histórico.
+        """
+        times, yes, _ = self.series(condition_id)
+        if not len(times):
+            return None
+        i = max(0, int(np.searchsorted(times, since, side="right")) - 1)
+        return float(yes[-1] - yes[i])
+
+    def volatility(self, condition_id: str, window: float, until: float | None = None) -> float:
+        """Desvio padrão do preço YES nos `window` segundos até `until` (padrão: agora); 0 com menos de 3 pontos."""
+        times, yes, _ = self.series(condition_id)
+        until = until if until is not None else time.time()
+        mask = (times > until - window) & (times <= until)
+        if mask.sum() < 3:
+            return 0.0
+        return float(yes[mask].std())
+
+    def already_moved(self, condition_id: str, since: float) -> bool:
+        """
+        O mercado já andou desde `since` mais que o ruído normal dele: a
+        variação passa de `min_move` e de `vol_mult` desvios padrão do preço
+        na janela `vol_window` anterior a `since`.
+        """
+        times, yes, _ = self.series(condition_id)
+        if not len(times):
+            return False
+        i = int(np.searchsorted(times, since, side="right"))
+        change = abs(float(yes[-1] - yes[max(0, i - 1)]))
+        if change < self.min_move:
+            return False
+        window = yes[int(np.searchsorted(times, since - self.vol_window, side="right")):i]
+        noise = self.vol_mult * float(window.std()) if len(window) >= 3 else 0.0
+        return change >= noise
+
+    def priced_in(self, markets: list[Market], since: float) -> set[str]:
+        """condition_ids dos `markets` que já se moveram desde `since` (ver already_moved)."""
+        if self.min_move <= 0:
+            return set()
+        moved = {m.condition_id for m in markets if self.already_moved(m.condition_id, since)}
+        _SKIPPED.inc(len(moved))
+        _KEPT.inc(len(markets) - len(moved))
+        return moved
@@ -0,0 +1,90 @@
+import logging
+from dataclasses import dataclass, fields, replace
+
+from polymarket.client import Market
+
+logger = logging.getLogger(__name__)
+
+# Campos comparados no merge (condition_id é a chave, não muda)
+_MERGE_FIELDS = tuple(f.name for f in fields(Market) if f.name != "condition_id")
+
+
+@dataclass
+class MergeStats:
+    added: int = 0
+    updated: int = 0
+    unchanged: int = 0
+    evicted: int = 0
+
+    def __str__(self) -> str:
+        return (f"+{self.added} novos, ~{self.updated} alterados, "
+                f"={self.unchanged} iguais, -{self.evicted} removidos")
+
+
+class MarketStore:
+    """
+    Catálogo completo em memória, indexado por condition_id.
+
+    merge() troca só os mercados que mudaram (preços, volume, ...) e
+    remove os fechados ou que sumiram do catálogo ativo; os inalterados
+    continuam sendo o mesmo objeto. Um mercado alterado vira um Market
+    novo (dataclasses.replace), nunca é modificado no lugar: os snapshots
+    já publicados e as análises em andamento continuam vendo a foto deles.
+    """
+
+    def __init__(self):
+        self._by_id: dict[str, Market] = {}
+
+    def __len__(self) -> int:
+        return len(self._by_id)
+
+    def __contains__(self, condition_id: str) -> bool:
+        return condition_id in self._by_id
+
+    def get(self, condition_id: str) -> Market | None:
+        return self._by_id.get(condition_id)
+
+    def markets(self) -> list[Market]:
+        """Mercados ativos ordenados por volume 24h (maior primeiro)."""
+        return sorted(self._by_id.values(), key=lambda m: m.volume_24h, reverse=True)
+
+    def merge(self, markets: list[Market], complete: bool = True) -> MergeStats:
+        """
+        Aplica um sync ao store.
+        complete=True indica que `markets` é o universo ativo inteiro: o que
+        não veio nele é considerado encerrado e é removido.
+        """
+        stats = MergeStats()
+        seen = set()
+
+        for incoming in markets:
+            cid = incoming.condition_id
+            if not cid:
+                continue
+            seen.add(cid)
+
+            if not incoming.active:
+                if self._by_id.pop(cid, None) is not None:
+                    stats.evicted += 1
+                continue
+
+            current = self._by_id.get(cid)
+            if current is None:
+                self._by_id[cid] = incoming
+                stats.added += 1
+                continue
+
+            changes = {name: getattr(incoming, name) for name in _MERGE_FIELDS
+                       if getattr(current, name) != getattr(incoming, name)}
+            if changes:
+                self._by_id[cid] = replace(current, **changes)
+                stats.updated += 1
+            else:
+                stats.unchanged += 1
+
+        if complete:
+            for cid in [cid for cid in self._by_id if cid not in seen]:
+                del self._by_id[cid]
+                stats.evicted += 1
+
+        return stats
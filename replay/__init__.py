@@ -0,0 +1,6 @@
+"""
+Replay offline do pipeline notícia → análise → alerta.
+
+  - recorder: grava notícias, snapshots do catálogo e respostas do LLM em JSONL
+  - engine:   reprocessa o que foi gravado com LLM stub/gravado e notifier local
+"""
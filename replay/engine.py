@@ -0,0 +1,464 @@
+"""
+Replay offline do pipeline notícia → análise → alerta.
+
+Lê notícias e snapshots do catálogo gravados em disco (ReplayRecorder ou
+qualquer JSONL no mesmo formato) e passa cada notícia pelo process_news do
+main.py, concorrentemente, com:
+  - catálogo: o snapshot vigente no horário da notícia
+  - LLM: stub local (--llm stub) ou as respostas gravadas (--llm recorded)
+  - notifier: captura os alertas em memória, nada é enviado
+  - dedup e cache de quase duplicadas em memória, no relógio das notícias
+
+Reporta vazão, latência por etapa e a precisão dos alertas contra o preço
+do mercado `--horizon` segundos depois da notícia, por faixa de edge.
+
+Formatos:
+  news.jsonl:      {"text", "channel", "timestamp" (ISO), "message_id"}
+  snapshots.jsonl: {"ts" (Unix), "markets": [campos de Market]}
+  verdicts.jsonl:  {"news": {"text", ...}, "items": [JSON do LLM]}
+
+Uso:
+  python -m replay.engine --dir data/replay --llm recorded --concurrency 100
+  python -m replay.engine --news n.jsonl --snapshots s.jsonl --llm stub --llm-latency-ms 50
+"""
+
+import argparse
+import asyncio
+import bisect
+import contextvars
+import json
+import logging
+import os
+import re
+import statistics
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+
+from analyzer.ai_analyzer import AIAnalyzer, Opportunity
+from analyzer.limiter import AdaptiveLimiter
+from analyzer.news_cache import NewsAnalysisCache
+from analyzer.relevance import RelevanceGate, RelevanceModel
+from alerts.dedup_store import DedupStore
+from alerts.subscriptions import Subscription, SubscriptionRegistry
+from benchmarks.fakes import FakeAnthropic
+from polymarket.catalog import MarketSnapshot
+from polymarket.client import Market
+from polymarket.price_feed import LivePriceTable
+from config import MIN_EDGE_THRESHOLD, RELEVANCE_RECALL
+
+logger = logging.getLogger(__name__)
+
+# Horário (Unix) da notícia em processamento e as medições da sua passagem
+# pelo pipeline. asyncio.to_thread copia o contexto, então o analyzer
+# enxerga os dois também nas threads.
+_news_ts: contextvars.ContextVar[float] = contextvars.ContextVar("replay_news_ts", default=0.0)
+_trace: contextvars.ContextVar[dict | None] = contextvars.ContextVar("replay_trace", default=None)
+
+
+def _clock() -> float:
+    """Relógio do replay: o horário da notícia em processamento."""
+    return _news_ts.get() or time.time()
+
+
+def _stage(name: str, started: float):
+    trace = _trace.get()
+    if trace is not None:
+        trace[name] = trace.get(name, 0.0) + (time.perf_counter() - started) * 1000
+
+
+def news_time(news: dict) -> float:
+    """Timestamp ISO da notícia → Unix."""
+    return datetime.fromisoformat(news["timestamp"].replace("Z", "+00:00")).timestamp()
+
+
+def _read_jsonl(path: str) -> list[dict]:
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+# ── Catálogo no tempo ──────────────────────────────────────────────────────────
+class SnapshotTimeline:
+    """Snapshots do catálogo ordenados no tempo, com busca por horário (bisect)."""
+
+    def __init__(self, snapshots: list[MarketSnapshot]):
+        self.snapshots = sorted(snapshots, key=lambda s: s.fetched_at)
+        self._times = [s.fetched_at for s in self.snapshots]
+        self._by_id: dict[int, dict[str, Market]] = {}
+
+    def __len__(self) -> int:
+        return len(self.snapshots)
+
+    @classmethod
+    def load(cls, path: str) -> "SnapshotTimeline":
+        snapshots = []
+        for i, record in enumerate(sorted(_read_jsonl(path), key=lambda r: r["ts"])):
+            markets = [Market(**m) for m in record["markets"]]
+            snapshots.append(MarketSnapshot(markets=markets, version=i + 1, fetched_at=record["ts"]))
+        return cls(snapshots)
+
+    def at(self, ts: float) -> MarketSnapshot | None:
+        """Último snapshot tirado até `ts`, ou None se não há nenhum antes."""
+        i = bisect.bisect_right(self._times, ts)
+        return self.snapshots[i - 1] if i else None
+
+    def price_at(self, condition_id: str, direction: str, ts: float) -> tuple[float, float] | None:
+        """(preço do lado `direction`, horário do snapshot) vigente em `ts`."""
+        snap = self.at(ts)
+        if snap is None:
+            return None
+        by_id = self._by_id.get(snap.version)
+        if by_id is None:
+            by_id = self._by_id[snap.version] = {m.condition_id: m for m in snap.markets}
+        m = by_id.get(condition_id)
+        if m is None:
+            return None
+        return (m.yes_price if direction == "YES" else m.no_price), snap.fetched_at
+
+
+class ReplayCatalog:
+    """
+    Substitui o MarketCatalog no replay: get() devolve o snapshot vigente
+    no horário da notícia e mantém o índice de pré-seleção do analyzer em
+    dia (só avança — notícias concorrentes um pouco fora de ordem usam o
+    índice mais novo, como aconteceria ao vivo).
+    """
+
+    def __init__(self, timeline: SnapshotTimeline, analyzer: AIAnalyzer):
+        self.timeline = timeline
+        self.analyzer = analyzer
+        self._indexed = 0
+
+    @property
+    def snapshot(self) -> MarketSnapshot:
+        return self.timeline.at(_clock()) or MarketSnapshot()
+
+    async def get(self) -> MarketSnapshot:
+        started = time.perf_counter()
+        snap = self.snapshot
+        if snap.version > self._indexed:
+            self._indexed = snap.version
+            await asyncio.to_thread(self.analyzer.update_index, snap.markets)
+        _stage("catalog", started)
+        return snap
+
+
+# ── LLM ────────────────────────────────────────────────────────────────────────
+_MARKET_RE = re.compile(r"^(m\d+)\|([0-9.]+)\|([0-9.]+)\|", re.M)   # linha da tabela: id|yes|no|vol|pergunta
+_NEWS_RE = re.compile(
+    r"^\[(\d+)\] Canal: [^\n]*\nTexto: (.*?)(?=\n\n\[\d+\] Canal:|\n\Z)",
+    re.S | re.M,
+)
+
+
+def _prompt_news(prompt: str) -> list[tuple[int | None, str]]:
+    """(news_index ou None, texto) de cada notícia do prompt (simples ou em lote)."""
+    return [(int(idx) if idx else None, text) for idx, text in _NEWS_RE.findall(prompt)]
+
+
+def stub_llm(latency_ms: float = 50.0, edge: float = 0.10) -> FakeAnthropic:
+    """
+    LLM ingênuo: toda notícia move o primeiro mercado da tabela do prompt
+    (o candidato de maior volume) `edge` na direção do lado mais barato. Serve de linha de base e para
+    medir o pipeline sem custo de API.
+    """
+
+    def respond(prompt: str) -> str:
+        market = _MARKET_RE.search(prompt)
+        if market is None:
+            return json.dumps({"opportunities": []})
+        cid, yes, no = market.group(1), float(market.group(2)), float(market.group(3))
+        direction, price = ("YES", yes) if yes <= no else ("NO", no)
+        opportunities = []
+        for idx, _ in _prompt_news(prompt) or [(None, "")]:
+            item = {
+                "market_id": cid, "direction": direction,
+                "true_prob": round(min(0.99, price + edge), 3), "edge": edge,
+                "reasoning": "stub do replay",
+            }
+            if idx is not None:
+                item["news_index"] = idx
+            opportunities.append(item)
+        return json.dumps({"opportunities": opportunities})
+
+    return FakeAnthropic(base_ms=latency_ms, ms_per_1k_tokens=0, responder=respond)
+
+
+def recorded_llm(path: str, latency_ms: float = 0.0) -> FakeAnthropic:
+    """
+    Responde com o JSON que o LLM devolveu em produção para o mesmo texto
+    (verdicts.jsonl). Notícias sem resposta gravada voltam sem oportunidades
+    e são contadas em `client.unknown`.
+    """
+    verdicts = {r["news"]["text"]: r["items"] for r in _read_jsonl(path)}
+
+    def respond(prompt: str) -> str:
+        opportunities = []
+        for idx, text in _prompt_news(prompt):
+            items = verdicts.get(text)
+            if items is None:
+                client.unknown += 1
+                continue
+            for item in items:
+                item = {k: v for k, v in item.items() if k != "news_index"}
+                if idx is not None:
+                    item["news_index"] = idx
+                opportunities.append(item)
+        return json.dumps({"opportunities": opportunities})
+
+    client = FakeAnthropic(base_ms=latency_ms, ms_per_1k_tokens=0, responder=respond)
+    client.unknown = 0
+    return client
+
+
+class _TimedAnalyzer(AIAnalyzer):
+    """AIAnalyzer que registra o tempo de pré-seleção e de LLM da notícia corrente."""
+
+    def preselect(self, news: dict, markets: list[Market]) -> list[Market]:
+        started = time.perf_counter()
+        try:
+            return super().preselect(news, markets)
+        finally:
+            _stage("preselect", started)
+
+    def _complete(self, prompt: str, max_tokens: int) -> str:
+        started = time.perf_counter()
+        try:
+            return super()._complete(prompt, max_tokens)
+        finally:
+            _stage("llm", started)
+
+    def _stream(self, prompt: str, max_tokens: int):
+        started = time.perf_counter()
+        try:
+            yield from super()._stream(prompt, max_tokens)
+        finally:
+            _stage("llm", started)
+
+
+# ── Alertas ────────────────────────────────────────────────────────────────────
+@dataclass
+class CapturedAlert:
+    opportunity: Opportunity
+    news_ts: float
+    latency_ms: float   # chegada da notícia → alerta
+
+
+class CapturingNotifier:
+    """Notifier local: guarda os alertas em vez de mandá-los ao Telegram."""
+
+    def __init__(self):
+        self.alerts: list[CapturedAlert] = []
+
+    async def send_opportunity_async(self, opp: Opportunity, chat_ids: list[str] | None = None):
+        trace = _trace.get() or {}
+        started = trace.get("_started", time.perf_counter())
+        self.alerts.append(CapturedAlert(opp, _news_ts.get(), (time.perf_counter() - started) * 1000))
+
+    async def send_startup_async(self, channels: list[str]):
+        pass
+
+    async def send_error_async(self, error: str):
+        pass
+
+
+# ── Engine ─────────────────────────────────────────────────────────────────────
+@dataclass
+class ReplayReport:
+    news: int
+    skipped: int                     # notícias sem snapshot anterior
+    elapsed_s: float
+    stages: dict[str, list[float]]   # etapa → latências em ms
+    alerts: list[CapturedAlert]
+    outcomes: list[tuple[CapturedAlert, float | None]] = field(default_factory=list)  # (alerta, movimento)
+    llm_calls: int = 0
+    cache: dict[str, int] = field(default_factory=dict)
+
+    @property
+    def throughput(self) -> float:
+        """Notícias por minuto."""
+        return self.news / self.elapsed_s * 60 if self.elapsed_s else 0.0
+
+    def precision(self, min_edge: float) -> dict:
+        """
+        Alertas com |edge| >= min_edge e quantos acertaram a direção: o preço
+        do lado comprado subiu até o horizonte. `move` é o movimento médio a
+        favor (em pontos de probabilidade) dos alertas avaliados.
+        """
+        rows = [(a, move) for a, move in self.outcomes if abs(a.opportunity.edge) >= min_edge]
+        evaluated = [move for _, move in rows if move is not None]
+        hits = sum(1 for move in evaluated if move > 0)
+        return {
+            "alerts": len(rows),
+            "evaluated": len(evaluated),
+            "hits": hits,
+            "precision": hits / len(evaluated) if evaluated else None,
+            "move": statistics.fmean(evaluated) if evaluated else None,
+        }
+
+
+class ReplayEngine:
+    """
+    Reprocessa notícias gravadas pelo process_news do main.py, com até
+    `concurrency` notícias em voo e `llm_concurrency` chamadas simultâneas
+    ao LLM (o semáforo do main).
+    """
+
+    def __init__(self, timeline: SnapshotTimeline, llm_client, concurrency: int = 50,
+                 llm_concurrency: int = 3, horizon: float = 3600.0,
+                 relevance: RelevanceGate | None = None):
+        self.timeline = timeline
+        self.relevance = relevance or RelevanceGate()  # sem modelo: tudo vai ao LLM
+        self.llm_client = llm_client
+        self.concurrency = concurrency
+        self.llm_concurrency = llm_concurrency
+        self.horizon = horizon
+
+    async def run(self, news_list: list[dict]) -> ReplayReport:
+        import main  # só aqui: o main monta as instâncias globais ao ser importado
+
+        analyzer = _TimedAnalyzer(client=self.llm_client)
+        notifier = CapturingNotifier()
+        news_cache = NewsAnalysisCache(clock=_clock)
+        main.configure(
+            catalog=ReplayCatalog(self.timeline, analyzer),
+            analyzer=analyzer,
+            notifier=notifier,
+            subscriptions=SubscriptionRegistry([Subscription("replay")]),  # um destino, sem filtros
+            dedup=DedupStore(":memory:", clock=_clock),
+            prices=LivePriceTable(),  # sem feed: o edge fica com o preço do snapshot
+            news_cache=news_cache,
+            # concorrência fixa e sem descarte: as notícias gravadas já são "velhas"
+            llm_limiter=AdaptiveLimiter(initial=self.llm_concurrency, min_limit=self.llm_concurrency,
+                                        max_limit=self.llm_concurrency, freshness=0),
+            relevance=self.relevance,
+            _batcher=None,
+        )
+
+        timed = sorted(((news_time(n), n) for n in news_list), key=lambda t: t[0])
+        stages: dict[str, list[float]] = {"catalog": [], "preselect": [], "llm": [], "total": []}
+        skipped = 0
+        gate = asyncio.Semaphore(self.concurrency)
+
+        async def one(ts: float, news: dict):
+            nonlocal skipped
+            async with gate:
+                if self.timeline.at(ts) is None:
+                    skipped += 1
+                    return
+                trace = {"_started": time.perf_counter()}
+                _news_ts.set(ts)
+                _trace.set(trace)
+                await main.process_news(news)
+                trace["total"] = (time.perf_counter() - trace["_started"]) * 1000
+                for name, values in stages.items():
+                    if name in trace:
+                        values.append(trace[name])
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one(ts, news) for ts, news in timed))
+        elapsed = time.perf_counter() - started
+
+        report = ReplayReport(
+            news=len(timed) - skipped, skipped=skipped, elapsed_s=elapsed,
+            stages=stages, alerts=notifier.alerts,
+            llm_calls=getattr(self.llm_client, "calls", 0), cache=news_cache.stats(),
+        )
+        report.outcomes = [(a, self._move(a)) for a in notifier.alerts]
+        return report
+
+    def _move(self, alert: CapturedAlert) -> float | None:
+        """Quanto o preço do lado do alerta andou a favor até o horizonte (None sem dados)."""
+        opp = alert.opportunity
+        later = self.timeline.price_at(opp.market.condition_id, opp.direction, alert.news_ts + self.horizon)
+        if later is None or later[1] <= alert.news_ts:
+            return None  # nenhum snapshot depois da notícia
+        sign = 1.0 if opp.edge >= 0 else -1.0
+        return (later[0] - opp.current_price) * sign
+
+
+# ── CLI ────────────────────────────────────────────────────────────────────────
+def _pct(values: list[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[int(q * (len(ordered) - 1))]
+
+
+def print_report(report: ReplayReport, buckets: list[float]):
+    print(f"\n{report.news} notícias em {report.elapsed_s:.1f}s "
+          f"({report.throughput:,.0f}/min) | {report.skipped} sem snapshot | "
+          f"{report.llm_calls} chamadas ao LLM | cache {report.cache}")
+
+    print(f"\n{'etapa':<12}{'n':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for name, values in report.stages.items():
+        if values:
+            print(f"{name:<12}{len(values):>8}{statistics.median(values):>10.1f}"
+                  f"{_pct(values, 0.95):>10.1f}{_pct(values, 0.99):>10.1f}")
+    latencies = [a.latency_ms for a in report.alerts]
+    if latencies:
+        print(f"{'alerta':<12}{len(latencies):>8}{statistics.median(latencies):>10.1f}"
+              f"{_pct(latencies, 0.95):>10.1f}{_pct(latencies, 0.99):>10.1f}")
+
+    print(f"\n{'|edge| >=':<12}{'alertas':>9}{'avaliados':>11}{'acertos':>9}{'precisão':>10}{'mov. médio':>12}")
+    for min_edge in buckets:
+        p = report.precision(min_edge)
+        precision = f"{p['precision']:.0%}" if p["precision"] is not None else "-"
+        move = f"{p['move'] * 100:+.1f} pp" if p["move"] is not None else "-"
+        print(f"{min_edge:<12.2f}{p['alerts']:>9}{p['evaluated']:>11}{p['hits']:>9}{precision:>10}{move:>12}")
+
+
+async def _main(args):
+    news_path = args.news or os.path.join(args.dir, "news.jsonl")
+    snapshots_path = args.snapshots or os.path.join(args.dir, "snapshots.jsonl")
+    responses_path = args.responses or os.path.join(args.dir, "verdicts.jsonl")
+
+    news = _read_jsonl(news_path)
+    timeline = SnapshotTimeline.load(snapshots_path)
+    if args.llm == "recorded":
+        client = recorded_llm(responses_path, args.llm_latency_ms)
+    else:
+        client = stub_llm(args.llm_latency_ms, args.stub_edge)
+
+    print(f"Replay: {len(news)} notícias, {len(timeline)} snapshots, LLM {args.llm} | "
+          f"{args.concurrency} em voo, {args.llm_concurrency} no LLM, horizonte {args.horizon:.0f}s")
+
+    relevance = None
+    if args.relevance_model:
+        relevance = RelevanceGate(RelevanceModel.load(args.relevance_model),
+                                  recall=args.relevance_recall, explore=0.0)
+
+    engine = ReplayEngine(timeline, client, concurrency=args.concurrency,
+                          llm_concurrency=args.llm_concurrency, horizon=args.horizon,
+                          relevance=relevance)
+    report = await engine.run(news)
+    print_report(report, sorted({MIN_EDGE_THRESHOLD, 0.07, 0.10, 0.15}))
+    if relevance is not None:
+        stats = relevance.stats()
+        print(f"\nfiltro de relevância (recall alvo {args.relevance_recall:.0%}): "
+              f"{stats['skipped']} descartadas, {stats['passed']} enviadas ao LLM")
+    if args.llm == "recorded" and client.unknown:
+        print(f"\n⚠️  {client.unknown} notícias sem resposta gravada do LLM")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dir", default="data/replay", help="diretório gravado pelo ReplayRecorder")
+    parser.add_argument("--news")
+    parser.add_argument("--snapshots")
+    parser.add_argument("--responses", help="verdicts.jsonl para --llm recorded")
+    parser.add_argument("--llm", choices=("stub", "recorded"), default="stub")
+    parser.add_argument("--llm-latency-ms", type=float, default=50.0)
+    parser.add_argument("--stub-edge", type=float, default=0.10)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--llm-concurrency", type=int, default=3)
+    parser.add_argument("--horizon", type=float, default=3600.0, help="segundos após a notícia")
+    parser.add_argument("--relevance-model", help="avalia o filtro de relevância (.npz) no replay")
+    parser.add_argument("--relevance-recall", type=float, default=RELEVANCE_RECALL)
+    args = parser.parse_args()
+
+    import main as _bot  # noqa: F401 — configura o logging do bot; o replay só mostra avisos
+    logging.getLogger().setLevel(logging.WARNING)
+    asyncio.run(_main(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+import dataclasses
+import json
+import logging
+import os
+import time
+
+from polymarket.client import Market
+
+logger = logging.getLogger(__name__)
+
+
+class ReplayRecorder:
+    """
+    Grava o que o bot viu em produção, em três arquivos JSONL no diretório:
+      - news.jsonl:      uma notícia por linha (o payload do reader)
+      - snapshots.jsonl: {"ts", "markets": [...]} a cada refresh do catálogo
+      - verdicts.jsonl:  {"ts", "news", "items"} — o JSON devolvido pelo LLM
+
+    É o formato lido por replay.engine. Escrita síncrona e com flush por
+    linha: são poucos KB por evento e sobrevivem a um kill do processo.
+    """
+
+    def __init__(self, directory: str):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self._files = {
+            name: open(os.path.join(directory, f"{name}.jsonl"), "a", encoding="utf-8", buffering=1)
+            for name in ("news", "snapshots", "verdicts")
+        }
+        logger.info(f"🎞️  Gravando notícias, snapshots e vereditos em {directory}/")
+
+    async def record_news(self, news: dict):
+        """Ligado em TelegramSourceReader.on_message."""
+        self._write("news", news)
+
+    def record_snapshot(self, markets: list[Market]):
+        """Ligado em PolymarketClient.on_refresh."""
+        self._write("snapshots", {
+            "ts": time.time(),
+            "markets": [dataclasses.asdict(m) for m in markets],
+        })
+
+    def record_verdict(self, news: dict, items: list[dict], opportunities):
+        """Ligado em AIAnalyzer.on_verdict."""
+        self._write("verdicts", {
+            "ts": time.time(),
+            "news": {k: news.get(k) for k in ("text", "channel", "timestamp", "message_id")},
+            "items": items,
+        })
+
+    def close(self):
+        for f in self._files.values():
+            f.close()
+
+    def _write(self, name: str, record: dict):
+        try:
+            self._files[name].write(json.dumps(record, ensure_ascii=False) + "\n")
+        except (OSError, TypeError, ValueError) as e:
+            logger.error(f"Erro ao gravar {name} para replay: {e}")
@@ -0,0 +1,126 @@
+import fcntl
+import json
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+
+def channel_key(channel: str) -> str:
+    """Normaliza o nome do canal ("@Reuters" e "reuters" são o mesmo)."""
+    return str(channel).strip().lstrip("@").lower()
+
+
+class ChannelCursors:
+    """
+    Último message_id processado por canal, persistido em JSON.
+
+    Mensagens são processadas em paralelo, então o cursor só avança até
+    logo antes da menor mensagem ainda em andamento: se o processo cair,
+    nenhuma mensagem abaixo do cursor ficou sem análise. Mensagens já
+    concluídas acima do cursor ficam lembradas para não serem reprocessadas
+    quando o backfill e o listener ao vivo entregam a mesma mensagem.
+
+    Durante o backfill o canal fica preso (pin): mensagens ao vivo
+    concluídas nesse meio tempo não empurram o cursor por cima do buraco
+    que o backfill ainda vai preencher; elas só ficam lembradas como feitas.
+
+    Gravação atômica (arquivo temporário + os.replace) a cada avanço, sob
+    um lock de arquivo: com vários workers (um grupo de canais cada) o
+    arquivo é o mesmo e cada gravação mescla o que está no disco.
+    Com path vazio fica só em memória (benchmarks).
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._cursor: dict[str, int] = {}
+        self._inflight: dict[str, set[int]] = {}
+        self._done: dict[str, set[int]] = {}   # concluídas acima do cursor
+        self._pinned: set[str] = set()          # canais em backfill: cursor não avança
+        self._load()
+
+    def get(self, channel: str) -> int | None:
+        return self._cursor.get(channel_key(channel))
+
+    def set(self, channel: str, message_id: int):
+        """Posiciona o cursor (ex: primeiro boot, sem histórico a recuperar)."""
+        key = channel_key(channel)
+        if message_id > self._cursor.get(key, 0):
+            self._cursor[key] = message_id
+            self._save()
+
+    def begin(self, channel: str, message_id: int) -> bool:
+        """Marca a mensagem como em andamento. False se já foi (ou está sendo) processada."""
+        key = channel_key(channel)
+        if message_id <= self._cursor.get(key, 0):
+            return False
+        inflight = self._inflight.setdefault(key, set())
+        if message_id in inflight or message_id in self._done.get(key, ()):
+            return False
+        inflight.add(message_id)
+        return True
+
+    def pin(self, channel: str):
+        """Segura o cursor do canal na posição atual (início do backfill)."""
+        self._pinned.add(channel_key(channel))
+
+    def unpin(self, channel: str):
+        """Fim do backfill: o cursor volta a avançar pelo que já foi concluído."""
+        key = channel_key(channel)
+        self._pinned.discard(key)
+        self._advance(key)
+
+    def finish(self, channel: str, message_id: int):
+        """Mensagem concluída: avança o cursor até onde não há buraco."""
+        key = channel_key(channel)
+        self._inflight.get(key, set()).discard(message_id)
+        self._done.setdefault(key, set()).add(message_id)
+        self._advance(key)
+
+    def _advance(self, key: str):
+        done = self._done.get(key)
+        if key in self._pinned or not done:
+            return
+        inflight = self._inflight.get(key, set())
+        limit = min(inflight) - 1 if inflight else max(done)
+        advanced = max((i for i in done if i <= limit), default=None)
+        if advanced is not None and advanced > self._cursor.get(key, 0):
+            self._cursor[key] = advanced
+            self._done[key] = {i for i in done if i > advanced}
+            self._save()
+
+    def _load(self):
+        if not self.path:
+            return
+        try:
+            self._cursor = self._read()
+            logger.info(f"📍 Cursores de {len(self._cursor)} canais carregados de {self.path}")
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError, AttributeError) as e:
+            logger.error(f"Erro ao ler cursores dos canais ({self.path}): {e}")
+
+    def _read(self) -> dict[str, int]:
+        with open(self.path, encoding="utf-8") as f:
+            return {channel_key(k): int(v) for k, v in json.load(f).items()}
+
+    def _save(self):
+        if not self.path:
+            return
+        try:
+            if os.path.dirname(self.path):
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with open(f"{self.path}.lock", "w") as lock:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+                try:
+                    for key, value in self._read().items():
+                        if value > self._cursor.get(key, 0):
+                            self._cursor[key] = value
+                except (FileNotFoundError, ValueError, AttributeError):
+                    pass
+                tmp = f"{self.path}.tmp"
+                with open(tmp, "w", encoding="utf-8") as f:
+                    json.dump(self._cursor, f)
+                os.replace(tmp, self.path)
+        except OSError as e:
+            logger.error(f"Erro ao gravar cursores dos canais: {e}")
@@ -0,0 +1,179 @@
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import time
+from dataclasses import dataclass
+
+from core import metrics
+from sources.cursors import channel_key
+from config import INGEST_SPOOL_PATH, INGEST_WORKERS, INGEST_MAX_REPLAYS
+
+logger = logging.getLogger(__name__)
+
+_DEPTH = metrics.gauge("ingest_spool_depth", "Mensagens no spool de entrada ainda não concluídas", ("state",))
+_AGE = metrics.gauge("ingest_spool_oldest_seconds", "Idade da mensagem mais antiga ainda não concluída no spool")
+_WAIT = metrics.histogram("ingest_spool_wait_seconds", "Tempo entre a mensagem entrar no spool e um worker pegá-la",
+                          buckets=(0.001, 0.01, 0.1, 0.5, 1, 5, 15, 60, 300))
+_ITEMS = metrics.counter("ingest_spool_total",
+                         "Mensagens do spool por destino (spooled, duplicate, replayed, done, failed, dropped)",
+                         ("result",))
+_SPOOLED, _DUPLICATE, _REPLAYED, _DONE, _FAILED, _DROPPED = (
+    _ITEMS.labels(result=r) for r in ("spooled", "duplicate", "replayed", "done", "failed", "dropped")
+)
+
+
+@dataclass
+class SpoolItem:
+    id: int
+    payload: dict
+    received_at: float
+
+
+class IngestSpool:
+    """
+    Fila de entrada durável entre o leitor do Telegram e o pipeline de análise.
+
+    O handler do Telethon só grava a mensagem no spool (SQLite em modo WAL,
+    uma inserção por mensagem) e retorna: a leitura dos canais acompanha o
+    ritmo do Telegram mesmo numa rajada, e o cursor do canal pode avançar
+    assim que a mensagem está em disco. Um grupo fixo de `workers` tasks
+    consome o spool em ordem de chegada e roda o `handler` (process_news);
+    a linha só é apagada (ack) depois que o handler termina.
+
+    O que estava no spool quando o processo caiu ou foi encerrado — na fila
+    ou em andamento — é reenfileirado no start() seguinte. Uma mensagem que
+    já foi reenfileirada `max_replays` vezes sem concluir (ex: derruba o
+    processo) é descartada. Erro do handler conta como concluída: o erro é
+    registrado e a mensagem não volta, para não repetir a falha para sempre.
+
+    A mesma mensagem (canal + message_id) entra uma vez só, mesmo entregue
+    pelo backfill e pelo listener ao vivo.
+    """
+
+    def __init__(self, path: str = INGEST_SPOOL_PATH, workers: int = INGEST_WORKERS,
+                 max_replays: int = INGEST_MAX_REPLAYS):
+        self.path = path
+        self.workers = max(1, workers)
+        self.max_replays = max_replays
+        self._queue: asyncio.Queue[SpoolItem] = asyncio.Queue()
+        self._unacked: dict[int, float] = {}    # id → received_at, em ordem de chegada
+        self._inflight = 0
+        self._tasks: list[asyncio.Task] = []
+
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._db = sqlite3.connect(path, timeout=5, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS spool ("
+            " id INTEGER PRIMARY KEY AUTOINCREMENT, channel TEXT NOT NULL, message_id INTEGER NOT NULL,"
+            " payload TEXT NOT NULL, received_at REAL NOT NULL, replays INTEGER NOT NULL DEFAULT 0,"
+            " UNIQUE (channel, message_id))"
+        )
+        _DEPTH.set_function(lambda: self._queue.qsize(), state="queued")
+        _DEPTH.set_function(lambda: self._inflight, state="inflight")
+        _AGE.set_function(self.oldest_age)
+
+    def __len__(self) -> int:
+        return len(self._unacked)
+
+    def oldest_age(self) -> float:
+        """Segundos desde a chegada da mensagem mais antiga ainda não concluída (0 com o spool vazio)."""
+        oldest = next(iter(self._unacked.values()), None)
+        return time.time() - oldest if oldest is not None else 0.0
+
+    # ── Entrada ─────────────────────────────────────────────────────────────────
+    def append(self, payload: dict) -> bool:
+        """Grava a mensagem no spool e a enfileira para os workers. False se já estava lá."""
+        received_at = time.time()
+        cursor = self._db.execute(
+            "INSERT OR IGNORE INTO spool (channel, message_id, payload, received_at) VALUES (?, ?, ?, ?)",
+            (channel_key(payload["channel"]), int(payload["message_id"]),
+             json.dumps(payload, ensure_ascii=False), received_at),
+        )
+        if not cursor.rowcount:
+            _DUPLICATE.inc()
+            return False
+        self._enqueue(SpoolItem(cursor.lastrowid, payload, received_at))
+        _SPOOLED.inc()
+        return True
+
+    async def put(self, payload: dict):
+        """Versão para TelegramSourceReader.on_message."""
+        self.append(payload)
+
+    def _enqueue(self, item: SpoolItem):
+        self._unacked[item.id] = item.received_at
+        self._queue.put_nowait(item)
+
+    # ── Workers ─────────────────────────────────────────────────────────────────
+    def start(self, handler):
+        """Reenfileira o que ficou pendente da última execução e sobe os workers com `handler(payload)`."""
+        if self._tasks:
+            return
+        self._replay()
+        self._tasks = [asyncio.create_task(self._worker(handler)) for _ in range(self.workers)]
+
+    async def stop(self):
+        """Encerra os workers; mensagens em andamento ficam no spool para o próximo start()."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def close(self):
+        self._db.close()
+
+    async def join(self):
+        """Espera o spool esvaziar (benchmarks e testes)."""
+        await self._queue.join()
+
+    def _replay(self):
+        self._db.execute("BEGIN IMMEDIATE")
+        try:
+            self._db.execute("UPDATE spool SET replays = replays + 1")
+            dropped = self._db.execute(
+                "SELECT channel, message_id FROM spool WHERE replays > ?", (self.max_replays,)
+            ).fetchall()
+            self._db.execute("DELETE FROM spool WHERE replays > ?", (self.max_replays,))
+            rows = self._db.execute("SELECT id, payload, received_at FROM spool ORDER BY id").fetchall()
+            self._db.execute("COMMIT")
+        except BaseException:
+            self._db.execute("ROLLBACK")
+            raise
+
+        for channel, message_id in dropped:
+            logger.warning(f"🗑️  Mensagem {message_id} de @{channel} descartada do spool depois de "
+                           f"{self.max_replays} reinícios sem concluir")
+        _DROPPED.inc(len(dropped))
+        pending = [SpoolItem(i, json.loads(p), t) for i, p, t in rows if i not in self._unacked]
+        for item in pending:
+            self._enqueue(item)
+        if pending:
+            _REPLAYED.inc(len(pending))
+            logger.info(f"♻️  {len(pending)} mensagens pendentes no spool reenfileiradas "
+                        f"(mais antiga de {self.oldest_age() / 60:.0f} min atrás)")
+
+    async def _worker(self, handler):
+        while True:
+            item = await self._queue.get()
+            self._inflight += 1
+            _WAIT.observe(max(0.0, time.time() - item.received_at))
+            try:
+                await handler(item.payload)
+                _DONE.inc()
+            except Exception as e:
+                _FAILED.inc()
+                logger.error(f"Erro ao processar mensagem {item.payload.get('message_id')} do spool: {e}")
+            finally:
+                self._inflight -= 1
+            # CancelledError (encerrando) não chega aqui: a mensagem fica no spool
+            self._ack(item)
+            self._queue.task_done()
+
+    def _ack(self, item: SpoolItem):
+        self._db.execute("DELETE FROM spool WHERE id = ?", (item.id,))
+        self._unacked.pop(item.id, None)
@@ -1,13 +1,18 @@
 import asyncio
 import logging
 from datetime import datetime, timedelta, timezone
-from telethon import TelegramClient, events
-from telethon.tl.types import Message
+from typing import TYPE_CHECKING
+from sources.cursors import ChannelCursors, channel_key
 from config import (
     TELEGRAM_API_ID, TELEGRAM_API_HASH,
-    TELEGRAM_PHONE, TELEGRAM_SOURCE_CHANNELS
+    TELEGRAM_PHONE, TELEGRAM_SOURCE_CHANNELS, TELEGRAM_SESSION,
+    READER_STATE_PATH, BACKFILL_CONCURRENCY, BACKFILL_MAX_HOURS,
 )
 
+if TYPE_CHECKING:
+    from telethon import TelegramClient, events
+    from telethon.tl.types import Message
+
 logger = logging.getLogger(__name__)
 
 
@@ -15,17 +20,37 @@ class TelegramSourceReader:
     """
     Lê mensagens dos canais configurados como fontes de notícia.
     Funciona de dois modos:
-      - listen(): fica ouvindo mensagens novas em tempo real
+      - start(): recupera o que chegou desde o último cursor e fica ouvindo
+        mensagens novas em tempo real
       - fetch_recent(): busca mensagens das últimas N horas (útil pra testes)
+
+    O último message_id processado de cada canal fica em `cursors`
+    (READER_STATE_PATH): depois de um restart, o backfill retoma exatamente
+    de onde parou, sem reler o que já foi analisado. No modo live o callback
+    é o IngestSpool.put, então "processada" aqui é "gravada no spool".
     """
 
-    def __init__(self):
-        self.client = TelegramClient(
-            "polymarket_source_session",
-            TELEGRAM_API_ID,
-            TELEGRAM_API_HASH
-        )
+    def __init__(self, cursors: ChannelCursors | None = None,
+                 concurrency: int = BACKFILL_CONCURRENCY):
+        self._client: "TelegramClient | None" = None
         self._message_handlers = []
+        self.cursors = cursors or ChannelCursors(READER_STATE_PATH)
+        self.concurrency = concurrency
+        self._tasks: set[asyncio.Task] = set()
+        self._channel_by_id: dict[int, str] = {}   # chat_id → canal configurado (chave dos cursores)
+
+    @property
+    def client(self) -> "TelegramClient":
+        # Criado no primeiro uso: importar o pipeline (replay, benchmarks)
+        # não importa o Telethon, não exige credenciais nem cria a sessão
+        if self._client is None:
+            from telethon import TelegramClient
+            self._client = TelegramClient(
+                TELEGRAM_SESSION,
+                TELEGRAM_API_ID,
+                TELEGRAM_API_HASH
+            )
+        return self._client
 
     def on_message(self, handler):
         """Decorator/registro de callback chamado a cada nova mensagem."""
@@ -35,52 +60,135 @@ class TelegramSourceReader:
         await self.client.start(phone=TELEGRAM_PHONE)
         logger.info("✅ TelegramSourceReader conectado")
 
-        @self.client.on(events.NewMessage(chats=TELEGRAM_SOURCE_CHANNELS))
-        async def handler(event: events.NewMessage.Event):
-            msg: Message = event.message
-            if not msg.text:
-                return
-
-            payload = {
-                "text": msg.text,
-                "channel": getattr(event.chat, "username", str(event.chat_id)),
-                "timestamp": msg.date.isoformat(),
-                "message_id": msg.id,
-            }
-            logger.info(f"📨 Nova mensagem de @{payload['channel']}: {msg.text[:80]}...")
-
-            for cb in self._message_handlers:
-                await cb(payload)
+        from telethon import events
 
+        await self._resolve_channels()
+        # Handler registrado antes do backfill: nada que chegue agora fica no buraco
+        self.client.add_event_handler(
+            self._handle_event, events.NewMessage(chats=TELEGRAM_SOURCE_CHANNELS)
+        )
+        await self.catch_up()
         await self.client.run_until_disconnected()
 
-    async def fetch_recent(self, hours: int = 1) -> list[dict]:
-        """Busca mensagens recentes para testes sem precisar esperar eventos."""
-        await self.client.start(phone=TELEGRAM_PHONE)
-        since = datetime.now(timezone.utc) - timedelta(hours=hours)
-        messages = []
+    async def catch_up(self, max_hours: float = BACKFILL_MAX_HOURS):
+        """
+        Processa o que chegou nos canais enquanto o bot estava fora, a partir
+        do cursor de cada canal (no máximo `max_hours` para trás). Canais sem
+        cursor (primeiro boot) só têm o cursor posicionado na última mensagem.
+        """
+        # Mensagens ao vivo que chegam durante a busca não movem o cursor por cima do buraco
+        channels = [c for c in TELEGRAM_SOURCE_CHANNELS if c.strip()]
+        for channel in channels:
+            self.cursors.pin(channel)
+        try:
+            backlog = await self.fetch_recent(hours=max_hours, resume=True)
+            backlog = [p for p in backlog if self.cursors.begin(p["channel"], p["message_id"])]
+            if backlog:
+                logger.info(f"⏪ Recuperando {len(backlog)} mensagens perdidas desde o último cursor")
+            # Todas marcadas antes de despachar: o cursor não pula nenhuma delas
+            for payload in backlog:
+                task = asyncio.create_task(self._process(payload))
+                self._tasks.add(task)
+                task.add_done_callback(self._tasks.discard)
+        finally:
+            for channel in channels:
+                self.cursors.unpin(channel)
 
+    async def _resolve_channels(self):
+        """Mapeia o chat_id de cada canal configurado para o nome usado pelo backfill e pelos cursores."""
         for channel in TELEGRAM_SOURCE_CHANNELS:
-            channel = channel.strip()
-            if not channel:
+            if not channel.strip():
                 continue
             try:
-                async for msg in self.client.iter_messages(channel, limit=50):
-                    if not msg.text:
-                        continue
-                    if msg.date.replace(tzinfo=timezone.utc) < since:
-                        break
-                    messages.append({
-                        "text": msg.text,
-                        "channel": channel,
-                        "timestamp": msg.date.isoformat(),
-                        "message_id": msg.id,
-                    })
+                self._channel_by_id[await self.client.get_peer_id(channel.strip())] = channel_key(channel)
             except Exception as e:
-                logger.error(f"Erro ao ler canal {channel}: {e}")
+                logger.error(f"Erro ao resolver o canal {channel}: {e}")
+
+    def _channel_for(self, event: "events.NewMessage.Event") -> str:
+        channel = self._channel_by_id.get(event.chat_id)
+        if channel is None:
+            username = getattr(event.chat, "username", None)
+            channel = channel_key(username or str(event.chat_id))
+        return channel
+
+    async def _handle_event(self, event: "events.NewMessage.Event"):
+        """Handler do Telethon: converte a mensagem em payload e repassa aos callbacks."""
+        msg: "Message" = event.message
+        if not msg.text:
+            return
+
+        payload = self._payload(msg, self._channel_for(event))
+        logger.info(f"📨 Nova mensagem de @{payload['channel']}: {msg.text[:80]}...")
+        await self._dispatch(payload)
 
-        logger.info(f"📦 {len(messages)} mensagens recentes carregadas")
+    async def _dispatch(self, payload: dict):
+        # Pula mensagens já processadas (ex: entregues pelo backfill e ao vivo)
+        if not self.cursors.begin(payload["channel"], payload["message_id"]):
+            return
+        await self._process(payload)
+
+    async def _process(self, payload: dict):
+        try:
+            for cb in self._message_handlers:
+                await cb(payload)
+        finally:
+            self.cursors.finish(payload["channel"], payload["message_id"])
+
+    async def fetch_recent(self, hours: float = 1, resume: bool = False) -> list[dict]:
+        """
+        Busca as mensagens das últimas `hours` horas de todos os canais, em
+        ordem cronológica. Os canais são lidos em paralelo (até `concurrency`
+        por vez) e cada um é paginado até o corte de tempo, sem limite fixo.
+        Com resume=True, começa do cursor salvo de cada canal.
+        """
+        await self.client.start(phone=TELEGRAM_PHONE)
+        since = datetime.now(timezone.utc) - timedelta(hours=hours)
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def one(channel: str) -> list[dict]:
+            async with semaphore:
+                return await self._fetch_channel(channel, since, resume)
+
+        channels = [c.strip() for c in TELEGRAM_SOURCE_CHANNELS if c.strip()]
+        results = await asyncio.gather(*(one(c) for c in channels))
+        messages = sorted((m for r in results for m in r), key=lambda m: m["timestamp"])
+
+        logger.info(f"📦 {len(messages)} mensagens recentes carregadas de {len(channels)} canais")
         return messages
 
+    async def _fetch_channel(self, channel: str, since: datetime, resume: bool) -> list[dict]:
+        last_id = self.cursors.get(channel) if resume else None
+        messages = []
+        try:
+            if resume and last_id is None:
+                latest = await self.client.get_messages(channel, limit=1)
+                if latest:
+                    self.cursors.set(channel, latest[0].id)
+                return []
+
+            # reverse=True: do mais antigo para o mais novo, a partir de offset_date;
+            # sem limit, o Telethon pagina (100 por request) até o fim
+            kwargs = {"offset_date": since, "reverse": True}
+            if last_id:
+                kwargs["min_id"] = last_id
+            async for msg in self.client.iter_messages(channel, **kwargs):
+                if msg.text:
+                    messages.append(self._payload(msg, channel_key(channel)))
+        except Exception as e:
+            logger.error(f"Erro ao ler canal {channel}: {e}")
+        return messages
+
+    @staticmethod
+    def _payload(msg: "Message", channel: str) -> dict:
+        return {
+            "text": msg.text,
+            "channel": channel,
+            "timestamp": msg.date.isoformat(),
+            "message_id": msg.id,
+        }
+
     async def stop(self):
-        await self.client.disconnect()
+        for task in list(self._tasks):
+            task.cancel()
+        if self._client is not None:
+            await self._client.disconnect()